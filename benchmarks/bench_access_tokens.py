@@ -0,0 +1,46 @@
+"""
+Authentication cost per request: database auth tokens against signed
+access tokens.
+
+    python benchmarks/bench_access_tokens.py --requests 20000
+"""
+import argparse
+
+import benchutils
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    benchutils.setup()
+
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIRequestFactory
+
+    from jobs_backend.users import access_tokens
+    from jobs_backend.users.models import User
+
+    factory = APIRequestFactory()
+
+    with benchutils.test_database():
+        user = User.objects.create_user('bench@example.com', is_active=True)
+        token = Token.objects.create(user=user)
+        access_token = access_tokens.issue(user)
+        cases = (
+            ('auth token', TokenAuthentication(),
+             factory.get('/', HTTP_AUTHORIZATION='Token ' + token.key)),
+            ('access token', access_tokens.AccessTokenAuthentication(),
+             factory.get('/', HTTP_AUTHORIZATION='Bearer ' + access_token)),
+        )
+        for label, authentication, request in cases:
+            authentication.authenticate(request)
+            with benchutils.timer(label, args.requests):
+                for _ in range(args.requests):
+                    authentication.authenticate(request)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Title autocomplete latency on a large in-memory index.
+
+    python benchmarks/bench_autocomplete.py --titles 2000000
+"""
+import argparse
+import itertools
+import random
+import time
+
+import benchutils
+
+LEVELS = ('junior', 'middle', 'senior', 'lead', 'principal', 'head of')
+ROLES = ('developer', 'engineer', 'architect', 'analyst', 'tester',
+         'designer', 'manager', 'administrator', 'consultant')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=2000000)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    benchutils.setup()
+
+    from jobs_backend.vacancies.autocomplete import TitleIndex
+
+    rnd = random.Random(args.seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    vocabulary = [''.join(rnd.choice(letters)
+                          for _ in range(rnd.randint(2, 10)))
+                  for _ in range(args.vocabulary)]
+    cum_weights = list(itertools.accumulate(
+        1.0 / (rank + 1) for rank in range(args.vocabulary)))
+
+    def title():
+        skill = rnd.choices(vocabulary, cum_weights=cum_weights)[0]
+        parts = [skill, rnd.choice(ROLES)]
+        if rnd.random() < 0.5:
+            parts.insert(0, rnd.choice(LEVELS))
+        return ' '.join(parts).capitalize()
+
+    titles = [title() for _ in range(args.titles)]
+    index = TitleIndex(memo_size=20)
+    with benchutils.timer('build %d titles' % args.titles):
+        index.add_many(titles)
+    with benchutils.timer('warm up short prefixes'):
+        index.warm()
+    print('distinct titles: %d' % len(index))
+
+    queries = []
+    for _ in range(args.queries):
+        source = rnd.choice(titles)
+        queries.append(source[:rnd.randint(1, min(12, len(source)))])
+
+    latencies = []
+    with benchutils.timer('search %d prefixes' % args.queries, args.queries):
+        for prefix in queries:
+            started = time.perf_counter()
+            index.search(prefix, args.limit)
+            latencies.append(time.perf_counter() - started)
+
+    new_titles = [title() for _ in range(1000)]
+    with benchutils.timer('add 1000 titles', 1000):
+        for new_title in new_titles:
+            index.add(new_title)
+
+    latencies.sort()
+    for percentile in (50, 99, 99.9):
+        position = min(len(latencies) - 1,
+                       int(len(latencies) * percentile / 100))
+        print('p%-5s %8.3f ms' % (percentile, latencies[position] * 1000))
+    print('max    %8.3f ms' % (latencies[-1] * 1000))
+
+
+if __name__ == '__main__':
+    main()
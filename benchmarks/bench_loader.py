@@ -0,0 +1,78 @@
+"""
+Vacancy ingestion: ORM bulk inserts against the COPY loader.
+
+Run against PostgreSQL to measure COPY, other databases use bulk_create
+in both cases:
+
+    DATABASE_URL=postgres://localhost/jobs_backend \
+        python benchmarks/bench_loader.py --vacancies 200000
+"""
+import argparse
+import datetime
+import random
+
+import benchutils
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--vacancies', type=int, default=200000)
+    parser.add_argument('--batch-size', type=int,
+                        help='Rows per bulk_create statement, as many as '
+                             'the database takes by default')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    benchutils.setup()
+
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    from jobs_backend.vacancies import loader
+    from jobs_backend.vacancies.models import Vacancy
+    from jobs_backend.vacancies.synthetic import TextGenerator
+
+    generator = TextGenerator(args.seed)
+    end = timezone.now()
+    rows = list(generator.vacancies(random.Random(args.seed), args.vacancies,
+                                    end - datetime.timedelta(days=365), end))
+
+    def vacancies():
+        return [Vacancy(title=title, description=description,
+                        created_on=created_on, modified_on=created_on,
+                        views_count=views_count)
+                for title, description, created_on, views_count in rows]
+
+    with benchutils.test_database():
+        print('database: %s' % connection.vendor)
+        # Computed by both, subtract it to compare inserts alone
+        objs = vacancies()
+        with benchutils.timer('signatures %d' % args.vacancies,
+                              args.vacancies):
+            for vacancy in objs:
+                vacancy.update_signature()
+
+        objs = vacancies()
+        with benchutils.timer('bulk_create %d' % args.vacancies,
+                              args.vacancies):
+            with transaction.atomic():
+                Vacancy.objects.bulk_create(objs, args.batch_size)
+        Vacancy.objects.all().delete()
+
+        objs = vacancies()
+        with benchutils.timer('loader %d' % args.vacancies, args.vacancies):
+            loader.load(objs)
+        Vacancy.objects.all().delete()
+
+        loader.load(vacancies())
+        pks = Vacancy.objects.order_by('pk').values_list('pk', flat=True)
+        objs = vacancies()
+        for vacancy, pk in zip(objs, pks):
+            vacancy.pk = pk
+        with benchutils.timer('loader, update %d' % args.vacancies,
+                              args.vacancies):
+            loader.load(objs, loader.UPDATE)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Cost of recording metrics, alone and per request on the vacancy list and
+login endpoints.
+
+    python benchmarks/bench_metrics.py --operations 1000000 --requests 2000
+"""
+import argparse
+import tempfile
+
+import benchutils
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--operations', type=int, default=1000000)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    benchutils.setup()
+
+    from django.test import Client, override_settings
+
+    from jobs_backend.core import metrics
+    from jobs_backend.users.models import User
+    from jobs_backend.vacancies.models import Vacancy
+
+    metrics_dir = tempfile.mkdtemp()
+    labels = ('api:vacancies:vacancy-list', 'GET', 200)
+    with override_settings(METRICS_DIR=metrics_dir):
+        metrics.clear()
+        metrics.REQUESTS.inc(labels)
+        with benchutils.timer('counter inc', args.operations):
+            for _ in range(args.operations):
+                metrics.REQUESTS.inc(labels)
+        with benchutils.timer('histogram observe', args.operations):
+            for _ in range(args.operations):
+                metrics.REQUEST_DURATION.observe(0.03, labels[:1])
+        metrics.clear()
+
+    with benchutils.test_database():
+        user = User.objects.create_user('bench@example.com', 'password',
+                                        is_active=True)
+        Vacancy.objects.create(title='title', description='description')
+        login = {'email': user.email, 'password': 'password'}
+
+        for label, metrics_dir in (('without metrics', None),
+                                   ('with metrics', metrics_dir)):
+            with override_settings(METRICS_DIR=metrics_dir):
+                metrics.clear()
+                client = Client()
+                client.get('/api/vacancies/')
+                with benchutils.timer('%s GET list' % label, args.requests):
+                    for _ in range(args.requests):
+                        client.get('/api/vacancies/')
+                with benchutils.timer('%s POST login' % label,
+                                      args.requests // 10):
+                    for _ in range(args.requests // 10):
+                        client.post('/api/account/login/', login)
+                metrics.clear()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Per-request overhead of the stock and the stateless-aware middleware stacks
+for token-authenticated and anonymous API calls.
+
+    python benchmarks/bench_middleware.py --requests 2000
+"""
+import argparse
+
+import benchutils
+
+STOCK_MIDDLEWARE = (
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--session-engine',
+                        default='django.contrib.sessions.backends.db',
+                        help='Session engine used with the stock stack')
+    args = parser.parse_args()
+
+    benchutils.setup()
+
+    from django.conf import settings
+    from django.test import Client, override_settings
+    from rest_framework.authtoken.models import Token
+
+    from jobs_backend.users.models import User
+    from jobs_backend.vacancies.models import Vacancy
+
+    stacks = (
+        ('stock', STOCK_MIDDLEWARE, args.session_engine),
+        ('stateless', settings.MIDDLEWARE, settings.SESSION_ENGINE),
+    )
+
+    with benchutils.test_database():
+        user = User.objects.create_user('bench@example.com', is_active=True)
+        token = Token.objects.create(user=user)
+        Vacancy.objects.create(title='title', description='description')
+
+        for name, middleware, engine in stacks:
+            with override_settings(MIDDLEWARE=middleware,
+                                   SESSION_ENGINE=engine,
+                                   VACANCY_VIEWS_FLUSH_THRESHOLD=10 ** 9):
+                anonymous = Client()
+                authorized = Client(HTTP_AUTHORIZATION='Token ' + token.key)
+                for label, client in (('anonymous', anonymous),
+                                      ('token', authorized)):
+                    client.get('/api/vacancies/1/')
+                    with benchutils.timer('%s %s GET' % (name, label),
+                                          args.requests):
+                        for _ in range(args.requests):
+                            client.get('/api/vacancies/1/')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Saved search matching against a large number of subscriptions.
+
+    python benchmarks/bench_saved_searches.py --subscriptions 1000000
+"""
+import argparse
+import itertools
+import random
+
+import benchutils
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--subscriptions', type=int, default=1000000)
+    parser.add_argument('--vocabulary', type=int, default=50000)
+    parser.add_argument('--vacancies', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    benchutils.setup()
+
+    from jobs_backend.users.models import User
+    from jobs_backend.vacancies.models import SavedSearch, SavedSearchKeyword
+
+    rnd = random.Random(args.seed)
+    vocabulary = ['kw%d' % i for i in range(args.vocabulary)]
+    # Keyword popularity is heavily skewed, as in real queries
+    cum_weights = list(itertools.accumulate(
+        1.0 / (rank + 1) for rank in range(args.vocabulary)))
+
+    def pick(k):
+        return set(rnd.choices(vocabulary, cum_weights=cum_weights, k=k))
+
+    with benchutils.test_database():
+        user = User.objects.create_user('bench@example.com')
+
+        with benchutils.timer('index %d subscriptions' % args.subscriptions):
+            batch = 10000
+            end = args.subscriptions + 1
+            for start in range(1, end, batch):
+                searches, keywords = [], []
+                for pk in range(start, min(start + batch, end)):
+                    words = pick(rnd.randint(1, 3))
+                    searches.append(SavedSearch(pk=pk, user=user,
+                                                query=' '.join(words),
+                                                keywords_count=len(words)))
+                    keywords.extend(SavedSearchKeyword(search_id=pk, keyword=w)
+                                    for w in words)
+                SavedSearch.objects.bulk_create(searches)
+                SavedSearchKeyword.objects.bulk_create(keywords)
+
+        documents = [pick(150) for _ in range(args.vacancies)]
+        matches = 0
+        with benchutils.timer('match %d vacancies' % args.vacancies,
+                              args.vacancies):
+            for tokens in documents:
+                matches += len(SavedSearch.objects.match(tokens))
+        print('average matches per vacancy: %.1f' % (matches / args.vacancies))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Bulk user invitation through the API, including activation emails
+rendered by the background task queue.
+
+    python benchmarks/bench_user_invite.py --users 5000
+"""
+import argparse
+
+import benchutils
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=5000)
+    args = parser.parse_args()
+
+    benchutils.setup()
+
+    from django.core import mail
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    from jobs_backend.core import tasks
+    from jobs_backend.users.models import User
+
+    with benchutils.test_database(), \
+            override_settings(TASKS_ALWAYS_EAGER=False,
+                              USER_INVITE_MAX_EMAILS=args.users):
+        admin = User.objects.create_superuser('admin@example.com', 'secret')
+        client = APIClient()
+        client.force_authenticate(admin)
+        emails = ['user%d@example.com' % i for i in range(args.users)]
+
+        with benchutils.timer('invite %d users (request)' % args.users,
+                              args.users):
+            response = client.post('/api/users/invite/', {'emails': emails},
+                                   format='json')
+        assert response.status_code == 201, response.data
+
+        with benchutils.timer('send %d activation emails' % args.users,
+                              args.users):
+            tasks._queue.join()
+        assert len(mail.outbox) == args.users
+
+
+if __name__ == '__main__':
+    main()
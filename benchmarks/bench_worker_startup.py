@@ -0,0 +1,71 @@
+"""
+Cold-start latency and private memory of forked workers, with and without
+warming up the master process first (Linux only).
+
+    python benchmarks/bench_worker_startup.py --requests 50
+"""
+import argparse
+import os
+import time
+
+import benchutils
+
+
+def private_dirty_kb():
+    with open('/proc/self/smaps_rollup') as smaps:
+        for line in smaps:
+            if line.startswith('Private_Dirty:'):
+                return int(line.split()[1])
+    return 0
+
+
+def run_worker(requests, write):
+    from django.test import Client
+
+    client = Client()
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        client.get('/api/')
+        client.get('/api/vacancies/')
+        latencies.append(time.perf_counter() - started)
+    write('first request %8.1f ms, median %8.1f ms, private dirty %8d kB\n' % (
+        latencies[0] * 1000, sorted(latencies)[len(latencies) // 2] * 1000,
+        private_dirty_kb()))
+
+
+def fork_worker(label, requests):
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        with os.fdopen(write_fd, 'w') as pipe:
+            run_worker(requests, lambda line: pipe.write(label + line))
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        print(pipe.read(), end='')
+    os.waitpid(pid, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    benchutils.setup()
+
+    from django.core.wsgi import get_wsgi_application
+    from jobs_backend.core.startup import warm_up
+
+    with benchutils.test_database():
+        get_wsgi_application()
+        fork_worker('%-10s' % 'cold', args.requests)
+
+        timings = warm_up()
+        print('warm-up took %.1f ms' % (sum(timings.values()) * 1000))
+        fork_worker('%-10s' % 'warm', args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Helpers shared by benchmark scripts.
+
+Benchmarks are run from the repository root, e.g.:
+
+    python benchmarks/bench_saved_searches.py --help
+
+Scripts touching the database create and destroy a throwaway test database,
+so they never modify the configured one.
+"""
+import contextlib
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup(settings_module='config.settings.test'):
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+
+    import django
+    from django.test.utils import setup_test_environment
+
+    django.setup()
+    # Allows the test client host and keeps outgoing mail in memory
+    setup_test_environment()
+
+
+@contextlib.contextmanager
+def test_database():
+    from django.db import connection
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextlib.contextmanager
+def timer(label, count=None):
+    started = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - started
+    if count:
+        print('%-40s %10.3f s  %12.1f us/op' % (
+            label, elapsed, elapsed / count * 1e6))
+    else:
+        print('%-40s %10.3f s' % (label, elapsed))
@@ -0,0 +1,46 @@
+"""
+Gunicorn configuration
+
+    gunicorn -c config/gunicorn.py config.wsgi
+
+The application is loaded and warmed up in the master process, so forked
+workers start hot and share its memory pages.
+
+Workers are gevent based, so long-lived connections such as event streams
+take a greenlet each instead of a whole worker.
+"""
+import multiprocessing
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+
+if worker_class == 'gevent':
+    # The application is preloaded, so patch before it imports anything
+    from gevent import monkey
+    monkey.patch_all()
+
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS',
+                             multiprocessing.cpu_count() * 2 + 1))
+# Concurrent connections per gevent worker, mostly idle event streams
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 5000))
+
+preload_app = True
+
+
+def on_starting(server):
+    # Counters of the previous run
+    from jobs_backend.core import metrics
+
+    metrics.clear()
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported, before fork
+    from jobs_backend.core.startup import warm_up
+
+    timings = warm_up()
+    server.log.info('Warmed up in %.1f ms', sum(timings.values()) * 1000)
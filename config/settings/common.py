@@ -31,6 +31,7 @@ THIRD_PARTY_APPS = (
     'rest_framework.authtoken',
 )
 LOCAL_APPS = (
+    'jobs_backend.core',
     'jobs_backend.users',
     'jobs_backend.vacancies',
 )
@@ -40,17 +41,45 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 # MIDDLEWARE CONFIGURATION
 # ------------------------------------------------------------------------------
+# Session, CSRF, auth and messages middleware are replaced with versions
+# skipping stateless API requests, see jobs_backend.core.middleware
 MIDDLEWARE = (
+    'jobs_backend.core.access_log.AccessLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'jobs_backend.core.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'jobs_backend.core.middleware.CsrfViewMiddleware',
+    'jobs_backend.core.middleware.AuthenticationMiddleware',
+    'jobs_backend.core.profiling.ProfilerMiddleware',
+    'jobs_backend.core.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 )
 
+# Token-authenticated calls and anonymous reads under this prefix skip
+# session, CSRF and messages processing. Non-DRF views must be excluded.
+STATELESS_API_PREFIX = '/api/'
+STATELESS_API_EXCLUDE = ('/api/api-auth/',)
+
+# Queries running longer than SLOW_QUERY_THRESHOLD milliseconds are logged,
+# None disables it. SLOW_QUERY_EXPLAIN_RATE of them are logged with their plan
+SLOW_QUERY_THRESHOLD = env.int('DJANGO_SLOW_QUERY_THRESHOLD', 500)
+SLOW_QUERY_EXPLAIN_RATE = env.float('DJANGO_SLOW_QUERY_EXPLAIN_RATE', 0)
+
+# Worker processes keep metrics in files of METRICS_DIR, served at /metrics
+# to clients sending "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_DIR = env('DJANGO_METRICS_DIR', default=str(ROOT_DIR('var/metrics')))
+METRICS_TOKEN = env('DJANGO_METRICS_TOKEN', default=None)
+# Max samples per process, each histogram takes a sample per bucket
+METRICS_MAX_SAMPLES = 4096
+
+# Requests of staff users sending the X-Profile header, and SAMPLE_RATE of
+# all requests are profiled. Latest MAX_PROFILES are kept in PROFILER_DIR.
+PROFILER_SAMPLE_RATE = env.float('DJANGO_PROFILER_SAMPLE_RATE', 0)
+PROFILER_DIR = env('DJANGO_PROFILER_DIR',
+                   default=str(ROOT_DIR('var/profiles')))
+PROFILER_MAX_PROFILES = 1000
+
 # DEBUG
 # ------------------------------------------------------------------------------
 # See: https://docs.djangoproject.com/en/dev/ref/settings/#debug
@@ -86,6 +115,20 @@ DATABASES = {
     'default': env.db('DATABASE_URL', default='postgres:///jobs_backend'),
 }
 
+# CACHE CONFIGURATION
+# ------------------------------------------------------------------------------
+# See: https://docs.djangoproject.com/en/dev/ref/settings/#caches
+CACHES = {
+    'default': env.cache('DJANGO_CACHE_URL', default='locmemcache://'),
+}
+
+# SESSION CONFIGURATION
+# ------------------------------------------------------------------------------
+# Keep sessions out of the database.
+# See: https://docs.djangoproject.com/en/dev/topics/http/sessions/#using-cached-sessions
+SESSION_ENGINE = env('DJANGO_SESSION_ENGINE',
+                     default='django.contrib.sessions.backends.cache')
+
 # GENERAL CONFIGURATION
 # ------------------------------------------------------------------------------
 # Local time zone for this installation. Choices can be found here:
@@ -204,12 +247,26 @@ AUTHENTICATION_BACKENDS = (
 # Custom user app defaults
 AUTH_USER_MODEL = 'users.User'
 
+# Bulk user invitation: max emails per request and activation emails sent
+# over one SMTP connection
+USER_INVITE_MAX_EMAILS = 5000
+USER_INVITE_MAIL_BATCH_SIZE = 100
+# Password reset requests for a user within that many seconds of the last
+# one sent send no email
+USER_PASSWORD_RESET_INTERVAL = 300
+# Login issues access tokens valid for TTL seconds, checked without a query,
+# if keys are set, see users.access_tokens. They are signed with the first
+# key and verified with any: prepend a new key, drop the old one after TTL.
+ACCESS_TOKEN_KEYS = env.list('ACCESS_TOKEN_KEYS', default=[])
+ACCESS_TOKEN_TTL = env.int('ACCESS_TOKEN_TTL', 900)
+
 # Location of root django.contrib.admin URL, use {% url 'admin:index' %}
 ADMIN_URL = env('DJANGO_ADMIN_URL', default=r'^admin/')
 
 # 3rd party library settings
 # ------------------------------------------------------------------------------
 REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'jobs_backend.core.pagination.EstimatedCountPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_PERMISSION_CLASSES': [
         # 'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly',
@@ -220,7 +277,102 @@ REST_FRAMEWORK = {
         # 'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.TokenAuthentication',
+        'jobs_backend.users.access_tokens.AccessTokenAuthentication',
     )
 }
 
 CORS_ORIGIN_ALLOW_ALL = env.bool('CORS_ORIGIN_ALLOW_ALL', False)
+
+# PAGINATION
+# ------------------------------------------------------------------------------
+# Most objects list endpoints return by ?ids= at once
+BATCH_RETRIEVE_MAX_IDS = 100
+# API lists and admin changelists report the query planner estimate instead
+# of exact count for querysets larger than that (PostgreSQL only)
+PAGINATION_ESTIMATE_THRESHOLD = env.int('PAGINATION_ESTIMATE_THRESHOLD', 10000)
+
+# SINGLE-FLIGHT CACHE
+# ------------------------------------------------------------------------------
+# Callers waiting for another process to compute a cached value give up and
+# compute it themselves after that many seconds
+SINGLE_FLIGHT_LOCK_TIMEOUT = 10
+
+# IDEMPOTENCY
+# ------------------------------------------------------------------------------
+# Responses of create requests sent with Idempotency-Key header are replayed
+# to repeats with the same key for that many seconds
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+
+# STARTUP
+# ------------------------------------------------------------------------------
+# Cold import of config.wsgi must fit this many seconds, checked by tests.
+# Run `manage.py profile_imports` to find out what is slow.
+IMPORT_TIME_BUDGET = 1.0
+
+# BROADCAST
+# ------------------------------------------------------------------------------
+# Delivers messages, e.g. new vacancy events, to all worker processes.
+# LocalBackend reaches the current process only, use PostgresBackend when
+# running more than one worker.
+BROADCAST_BACKEND = env('DJANGO_BROADCAST_BACKEND',
+                        default='jobs_backend.core.broadcast.LocalBackend')
+
+# BACKGROUND TASKS
+# ------------------------------------------------------------------------------
+# Run background tasks synchronously in the calling thread
+TASKS_ALWAYS_EAGER = env.bool('DJANGO_TASKS_ALWAYS_EAGER', False)
+
+# VACANCIES
+# ------------------------------------------------------------------------------
+# View counters are buffered per worker process and saved in background once
+# this many seconds passed or views collected. A crashed worker loses at most
+# that much.
+VACANCY_VIEWS_FLUSH_INTERVAL = env.int('VACANCY_VIEWS_FLUSH_INTERVAL', 10)
+VACANCY_VIEWS_FLUSH_THRESHOLD = env.int('VACANCY_VIEWS_FLUSH_THRESHOLD', 1000)
+# Size of the precomputed most viewed vacancies list
+VACANCY_POPULAR_SIZE = 20
+# Vacancies sharing at least that fraction of search tokens are near
+# duplicates. New near-duplicates are either 'flag'ged with duplicate_of or
+# 'reject'ed, empty value disables the check.
+VACANCY_DUPLICATE_MIN_SIMILARITY = env.float(
+    'VACANCY_DUPLICATE_MIN_SIMILARITY', 0.8)
+VACANCY_DUPLICATE_ACTION = env('VACANCY_DUPLICATE_ACTION', default='flag')
+# Title autocomplete index is updated with new vacancies at most once per
+# REFRESH_INTERVAL seconds and rebuilt to drop changed titles once per
+# REBUILD_INTERVAL seconds, per worker process
+VACANCY_AUTOCOMPLETE_REFRESH_INTERVAL = env.int(
+    'VACANCY_AUTOCOMPLETE_REFRESH_INTERVAL', 5)
+VACANCY_AUTOCOMPLETE_REBUILD_INTERVAL = env.int(
+    'VACANCY_AUTOCOMPLETE_REBUILD_INTERVAL', 3600)
+VACANCY_AUTOCOMPLETE_MAX_LIMIT = 20
+# Similar vacancies index, see the build_similarity_index command. Workers
+# fold in new vacancies at most once per REFRESH_INTERVAL seconds.
+VACANCY_SIMILARITY_INDEX_DIR = env('VACANCY_SIMILARITY_INDEX_DIR',
+                                   default=str(ROOT_DIR('var/similarity')))
+VACANCY_SIMILARITY_REFRESH_INTERVAL = env.int(
+    'VACANCY_SIMILARITY_REFRESH_INTERVAL', 5)
+VACANCY_SIMILAR_COUNT = 10
+# Change feed holds back rows modified that many seconds ago or later,
+# whose transactions may still be in progress
+VACANCY_CHANGES_LAG = env.int('VACANCY_CHANGES_LAG', 5)
+VACANCY_CHANGES_MAX_LIMIT = 1000
+# New vacancy event streams send a comment every HEARTBEAT seconds to keep
+# idle connections open, and replay missed vacancies REPLAY_LIMIT at a time
+VACANCY_STREAM_HEARTBEAT = 15
+VACANCY_STREAM_RETRY = 5
+VACANCY_STREAM_REPLAY_LIMIT = 100
+# Max vacancies created by one POST of a list
+VACANCY_BATCH_CREATE_MAX = 100
+# Max periods returned by the vacancy statistics endpoint
+VACANCY_STATS_MAX_LIMIT = 366
+# Vacancy list and detail responses are cached for LIST_CACHE_TTL and
+# DETAIL_CACHE_TTL seconds, 0 disables caching, and served stale for
+# LIST_CACHE_STALE_TTL more seconds while being recomputed, also after a
+# vacancy is changed
+VACANCY_LIST_CACHE_TTL = env.int('VACANCY_LIST_CACHE_TTL', 10)
+VACANCY_LIST_CACHE_STALE_TTL = env.int('VACANCY_LIST_CACHE_STALE_TTL', 30)
+VACANCY_DETAIL_CACHE_TTL = env.int('VACANCY_DETAIL_CACHE_TTL', 30)
+# The warm_caches command requests WARM_PAGES first list pages with each of
+# WARM_LIST_PRESETS query strings
+VACANCY_WARM_PAGES = 5
+VACANCY_WARM_LIST_PRESETS = ['', 'ordering=popular']
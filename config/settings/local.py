@@ -8,6 +8,7 @@ Local settings
 
 import socket
 import os
+import sys
 
 from .common import *  # noqa
 
@@ -34,8 +35,11 @@ EMAIL_BACKEND = env('DJANGO_EMAIL_BACKEND',
 
 # django-debug-toolbar
 # ------------------------------------------------------------------------------
-MIDDLEWARE += ('debug_toolbar.middleware.DebugToolbarMiddleware',)
-INSTALLED_APPS += ('debug_toolbar',)
+# Toolbar import takes longer than the rest of the project startup, so it is
+# loaded by the development server only unless DJANGO_DEBUG_TOOLBAR is set
+if env.bool('DJANGO_DEBUG_TOOLBAR', default='runserver' in sys.argv):
+    MIDDLEWARE += ('debug_toolbar.middleware.DebugToolbarMiddleware',)
+    INSTALLED_APPS += ('debug_toolbar',)
 
 INTERNAL_IPS = ['127.0.0.1', '10.0.2.2', ]
 # tricks to have debug toolbar when developing with docker
@@ -76,15 +76,27 @@ TEMPLATES[0]['OPTIONS']['loaders'] = [
 # Raises ImproperlyConfigured exception if DATABASE_URL not in os.environ
 DATABASES['default'] = env.db('DATABASE_URL')
 
+# CACHE CONFIGURATION
+# ------------------------------------------------------------------------------
+# Cache is shared by all workers: it stores sessions among other things.
+# Raises ImproperlyConfigured exception if DJANGO_CACHE_URL not in os.environ
+CACHES['default'] = env.cache('DJANGO_CACHE_URL')
+
+# BROADCAST CONFIGURATION
+# ------------------------------------------------------------------------------
+# Reaches every worker through PostgreSQL LISTEN/NOTIFY
+BROADCAST_BACKEND = env('DJANGO_BROADCAST_BACKEND',
+                        default='jobs_backend.core.broadcast.PostgresBackend')
 
 # LOGGING CONFIGURATION
 # ------------------------------------------------------------------------------
 # See: https://docs.djangoproject.com/en/dev/ref/settings/#logging
-# A sample logging configuration. The only tangible logging
-# performed by this configuration is to send an email to
-# the site admins on every HTTP 500 error when DEBUG=False.
-# See http://docs.djangoproject.com/en/dev/topics/logging for
-# more details on how to customize your logging configuration.
+# Access log and slow queries (see jobs_backend.core.access_log) are written
+# to stdout as JSON lines, and errors are mailed to the site admins when
+# DEBUG=False. Handlers run in background threads, so logging never blocks
+# requests, see jobs_backend.core.log.
+SLOW_QUERY_EXPLAIN_RATE = env.float('DJANGO_SLOW_QUERY_EXPLAIN_RATE', 0.01)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -98,18 +110,28 @@ LOGGING = {
             'format': '%(levelname)s %(asctime)s %(module)s '
                       '%(process)d %(thread)d %(message)s'
         },
+        'json': {
+            '()': 'jobs_backend.core.log.JSONFormatter',
+        },
     },
     'handlers': {
         'mail_admins': {
             'level': 'ERROR',
             'filters': ['require_debug_false'],
-            'class': 'django.utils.log.AdminEmailHandler'
+            'class': 'jobs_backend.core.log.BufferedHandler',
+            'target': 'django.utils.log.AdminEmailHandler',
         },
         'console': {
             'level': 'DEBUG',
-            'class': 'logging.StreamHandler',
+            'class': 'jobs_backend.core.log.BufferedHandler',
             'formatter': 'verbose',
         },
+        'json': {
+            'level': 'INFO',
+            'class': 'jobs_backend.core.log.BufferedHandler',
+            'formatter': 'json',
+            'stream': 'ext://sys.stdout',
+        },
     },
     'loggers': {
         'django.request': {
@@ -121,7 +143,17 @@ LOGGING = {
             'level': 'ERROR',
             'handlers': ['console', 'mail_admins'],
             'propagate': True
-        }
+        },
+        'jobs_backend.access': {
+            'level': 'INFO',
+            'handlers': ['json'],
+            'propagate': False
+        },
+        'jobs_backend.sql.slow': {
+            'level': 'WARNING',
+            'handlers': ['json'],
+            'propagate': False
+        },
     }
 }
 
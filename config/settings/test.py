@@ -38,6 +38,33 @@ EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
 # ------------------------------------------------------------------------------
 TEST_RUNNER = 'django.test.runner.DiscoverRunner'
 
+# BACKGROUND TASKS
+# ------------------------------------------------------------------------------
+# Run tasks synchronously so their results can be asserted right away
+TASKS_ALWAYS_EAGER = True
+
+# ACCESS TOKENS
+# ------------------------------------------------------------------------------
+ACCESS_TOKEN_KEYS = ['test-access-token-key']
+
+# METRICS
+# ------------------------------------------------------------------------------
+# Not recorded, tests enable them in a temporary directory
+METRICS_DIR = None
+
+# VACANCIES
+# ------------------------------------------------------------------------------
+# Save every view right away, buffering is tested explicitly
+VACANCY_VIEWS_FLUSH_THRESHOLD = 1
+# Rebuild the autocomplete index on every request, rows are rolled back
+# between tests
+VACANCY_AUTOCOMPLETE_REBUILD_INTERVAL = 0
+VACANCY_SIMILARITY_REFRESH_INTERVAL = 0
+VACANCY_CHANGES_LAG = 0
+# Invalidation runs on commit, which never happens in TestCase
+VACANCY_LIST_CACHE_TTL = 0
+VACANCY_DETAIL_CACHE_TTL = 0
+
 # PASSWORD HASHING
 # ------------------------------------------------------------------------------
 # Use fast password hasher so tests run faster
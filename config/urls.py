@@ -3,7 +3,7 @@ from django.conf.urls import include, url
 from django.conf.urls.static import static
 from django.contrib import admin
 
-from jobs_backend.views import APIRoot
+from jobs_backend.views import APIRoot, metrics_view
 
 
 api_urlpatterns = [
@@ -23,6 +23,11 @@ urlpatterns += [
     url(r'^api/$', APIRoot.as_view(urlpatterns=urlpatterns, app_namespace='api_v1'), name='api_root')
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
+# A new list, so that APIRoot does not list it
+urlpatterns = urlpatterns + [
+    url(r'^metrics$', metrics_view, name='metrics'),
+]
+
 if settings.DEBUG:
     if 'debug_toolbar' in settings.INSTALLED_APPS:
         import debug_toolbar
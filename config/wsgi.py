@@ -27,6 +27,7 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
 # This application object is used by any WSGI server configured to use this
 # file. This includes Django's development server, if the WSGI_APPLICATION
 # setting points here.
+# Gunicorn warms it up before forking workers, see config/gunicorn.py
 application = get_wsgi_application()
 
 # Apply WSGI middleware here.
@@ -0,0 +1,205 @@
+"""
+Access and slow query logging.
+
+`AccessLogMiddleware` logs a record per request to the
+``jobs_backend.access`` logger with the request id, view name, status,
+duration and time spent in the database. The request id is taken from the
+``X-Request-ID`` header set by the proxy, or generated, and is returned in
+the response.
+
+Queries running longer than ``SLOW_QUERY_THRESHOLD`` milliseconds are logged
+to ``jobs_backend.sql.slow`` along with the view and request id they belong
+to. ``SLOW_QUERY_EXPLAIN_RATE`` of slow SELECT queries are logged with their
+plan, at the cost of running EXPLAIN on the request path.
+
+Records carry their fields in ``data``, see jobs_backend.core.log. Request
+and query durations are recorded in metrics as well, see
+jobs_backend.core.metrics.
+"""
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+from . import metrics
+
+access_logger = logging.getLogger('jobs_backend.access')
+slow_query_logger = logging.getLogger('jobs_backend.sql.slow')
+
+REQUEST_ID_HEADER = 'HTTP_X_REQUEST_ID'
+# Other methods are counted together, clients may send anything
+METRICS_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT',
+                             'PATCH', 'DELETE'))
+# Ids from the proxy not matching are replaced
+REQUEST_ID_RE = re.compile(r'[\w.-]{1,64}\Z')
+SQL_MAX_LENGTH = 2000
+EXPLAINABLE_RE = re.compile(r'^\s*SELECT\b', re.IGNORECASE)
+
+# Request being handled by the current thread (greenlet under gevent)
+_local = threading.local()
+
+_cursor = BaseDatabaseWrapper.cursor
+
+
+class RequestContext(object):
+
+    def __init__(self, request_id):
+        self.request_id = request_id
+        self.view = None
+        self.db_time = 0.0
+        self.db_queries = 0
+
+
+def get_context():
+    return getattr(_local, 'context', None)
+
+
+def _explain(db, sql, params):
+    # A failed statement would break the transaction
+    if db.in_atomic_block:
+        return None
+    if db.vendor == 'postgresql':
+        statement = 'EXPLAIN ' + sql
+    elif db.vendor == 'sqlite':
+        statement = 'EXPLAIN QUERY PLAN ' + sql
+    else:
+        return None
+    try:
+        # Another cursor keeps rows of the query unfetched, and an untimed
+        # one keeps EXPLAIN out of the statistics
+        with _cursor(db) as cursor:
+            cursor.execute(statement, params)
+            return [' '.join(str(column) for column in row)
+                    for row in cursor.fetchall()]
+    except Exception:
+        return None
+
+
+def _log_slow_query(db, sql, params, duration):
+    context = get_context()
+    data = {
+        'duration_ms': round(duration * 1000, 1),
+        'sql': sql[:SQL_MAX_LENGTH],
+        'database': db.alias,
+        'view': context.view if context else None,
+        'request_id': context.request_id if context else None,
+    }
+    if EXPLAINABLE_RE.match(sql) and random.random() < getattr(
+            settings, 'SLOW_QUERY_EXPLAIN_RATE', 0):
+        data['plan'] = _explain(db, sql, params)
+    slow_query_logger.warning('Slow query: %.1f ms', duration * 1000,
+                              extra={'data': data})
+
+
+class TimedCursor(object):
+    """
+    Cursor wrapper which measures execution time of queries
+    """
+    def __init__(self, cursor, db):
+        self.cursor = cursor
+        self.db = db
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return self.cursor.__exit__(*exc_info)
+
+    def _timed(self, method, sql, params):
+        started = time.perf_counter()
+        try:
+            return method(sql, params)
+        finally:
+            duration = time.perf_counter() - started
+            metrics.DB_QUERY_DURATION.observe(duration, (self.db.alias,))
+            context = get_context()
+            if context is not None:
+                context.db_time += duration
+                context.db_queries += 1
+            threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD', None)
+            if threshold is not None and duration * 1000 >= threshold:
+                _log_slow_query(self.db, sql, params, duration)
+
+    def execute(self, sql, params=None):
+        return self._timed(self.cursor.execute, sql, params)
+
+    def executemany(self, sql, param_list):
+        return self._timed(self.cursor.executemany, sql, param_list)
+
+
+def _timed_cursor(self):
+    return TimedCursor(_cursor(self), self)
+
+
+def install():
+    """
+    Makes all database connections measure their queries
+    """
+    BaseDatabaseWrapper.cursor = _timed_cursor
+
+
+def _get_request_id(request):
+    request_id = request.META.get(REQUEST_ID_HEADER, '')
+    if REQUEST_ID_RE.match(request_id):
+        return request_id
+    return uuid.uuid4().hex
+
+
+class AccessLogMiddleware(object):
+    """
+    Logs every request, put it first to measure all other middleware too
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install()
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        context = _local.context = RequestContext(_get_request_id(request))
+        request.request_id = context.request_id
+        try:
+            response = self.get_response(request)
+        finally:
+            _local.context = None
+
+        response['X-Request-ID'] = context.request_id
+        duration = time.perf_counter() - started
+        view = context.view or ''
+        metrics.REQUESTS.inc((
+            view, request.method if request.method in METRICS_METHODS
+            else 'OTHER', response.status_code))
+        metrics.REQUEST_DURATION.observe(duration, (view,))
+        user = getattr(request, 'user', None)
+        access_logger.info(
+            '%s %s %d', request.method, request.get_full_path(),
+            response.status_code, extra={'data': {
+                'request_id': context.request_id,
+                'method': request.method,
+                'path': request.path,
+                'view': context.view,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 1),
+                'db_ms': round(context.db_time * 1000, 1),
+                'db_queries': context.db_queries,
+                'user_id': user.pk if user is not None and
+                user.is_authenticated else None,
+            }})
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        context = get_context()
+        if context is not None:
+            match = request.resolver_match
+            context.view = match.view_name if match else \
+                getattr(view_func, '__name__', None)
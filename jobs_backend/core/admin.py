@@ -0,0 +1,50 @@
+from django.conf.urls import url
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.html import format_html
+
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_on', 'method', 'path', 'status', 'duration_ms',
+                    'user', 'download_link')
+    list_filter = ('method', 'status')
+    search_fields = ('path', 'view', 'request_id')
+    ordering = ('-pk',)
+    list_select_related = ('user',)
+    readonly_fields = ('created_on', 'method', 'path', 'view', 'status',
+                       'duration_ms', 'user', 'request_id', 'filename',
+                       'download_link')
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            url(r'^(?P<pk>\d+)/download/$',
+                self.admin_site.admin_view(self.download_view),
+                name='core_requestprofile_download'),
+        ] + super(RequestProfileAdmin, self).get_urls()
+
+    def download_link(self, obj):
+        return format_html('<a href="{}">{}.prof</a>', reverse(
+            'admin:core_requestprofile_download', args=[obj.pk]), obj.pk)
+    download_link.short_description = 'Profile'
+
+    def download_view(self, request, pk):
+        if not self.has_change_permission(request):
+            raise Http404
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        try:
+            profile_file = open(profile.get_file_path(), 'rb')
+        except FileNotFoundError:
+            raise Http404
+        response = FileResponse(profile_file,
+                                content_type='application/octet-stream')
+        response['Content-Disposition'] = \
+            'attachment; filename="profile-%d.prof"' % profile.pk
+        return response
@@ -0,0 +1,270 @@
+"""
+Publish/subscribe across worker processes.
+
+Each process keeps one hub which fans messages out to in-process subscribers,
+e.g. open event streams, through bounded queues. Messages reach the hubs of
+all processes through the backend set by ``BROADCAST_BACKEND``:
+
+* ``LocalBackend`` delivers within the current process only, fine for the
+  development server and tests;
+* ``PostgresBackend`` uses LISTEN/NOTIFY, one listening connection per
+  process however many subscribers it has.
+
+`subscribe` returns once the backend listens to the channel, so anything
+committed after it returns and then published is received. Messages sent
+while the listening connection is lost cannot be recovered, so all
+subscribers are dropped when it reconnects and should catch up from the
+database.
+
+Under gevent (see config/gunicorn.py) waiting subscribers are greenlets, so
+thousands of them cost little more than their sockets.
+"""
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Messages a subscriber may lag behind before it is dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+LISTEN_TIMEOUT = 5
+RECONNECT_DELAY = 1
+# Seconds subscribe() waits for the listening connection
+LISTEN_WAIT_TIMEOUT = 10
+
+
+class Subscription(object):
+
+    def __init__(self, hub, channel):
+        self.hub = hub
+        self.channel = channel
+        self.queue = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = False
+
+    def get(self, timeout):
+        """
+        Returns the next message or None after timeout. Raises EOFError if
+        the subscriber was dropped for not keeping up.
+        """
+        try:
+            message = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if message is None:
+            raise EOFError
+        return message
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Hub(object):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.channel, None)
+
+    def dispatch(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(message)
+            except queue.Full:
+                self._drop(subscription)
+
+    def drop_all(self):
+        """
+        Drops all subscribers, e.g. when messages may have been lost
+        """
+        with self._lock:
+            subscribers = [subscription
+                           for channel in self._subscribers.values()
+                           for subscription in channel]
+        for subscription in subscribers:
+            self._drop(subscription)
+
+    def _drop(self, subscription):
+        self.unsubscribe(subscription)
+        subscription.dropped = True
+        # Make room for the end of stream marker
+        while True:
+            try:
+                subscription.queue.get_nowait()
+            except queue.Empty:
+                break
+        subscription.queue.put_nowait(None)
+
+
+class LocalBackend(object):
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def listen(self, channel):
+        pass
+
+    def publish(self, channel, message):
+        self.hub.dispatch(channel, message)
+
+
+class PostgresBackend(object):
+
+    def __init__(self, hub):
+        self.hub = hub
+        self._lock = threading.Lock()
+        self._channels = set()
+        # Channels LISTENed to by the current connection
+        self._listening = set()
+        # channel -> Event set once it is listened to
+        self._waiters = {}
+        self._listener = None
+        self._wake_fds = None
+
+    def listen(self, channel):
+        """
+        Returns once the listening connection runs LISTEN for channel
+        """
+        with self._lock:
+            if channel in self._listening:
+                return
+            self._channels.add(channel)
+            waiter = self._waiters.setdefault(channel, threading.Event())
+            # Threads do not survive fork(), so a preforked worker starts its own
+            if self._listener is None or not self._listener.is_alive():
+                if self._wake_fds is not None:
+                    for fd in self._wake_fds:
+                        os.close(fd)
+                self._wake_fds = os.pipe()
+                self._listener = threading.Thread(
+                    target=self._listen, name='broadcast', daemon=True)
+                self._listener.start()
+            else:
+                # Interrupts select() of the listener
+                os.write(self._wake_fds[1], b'\0')
+        if not waiter.wait(LISTEN_WAIT_TIMEOUT):
+            logger.warning('Broadcast listener is not listening to %s yet',
+                           channel)
+
+    def publish(self, channel, message):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)',
+                           [channel, json.dumps(message)])
+
+    def _connect(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        params = settings.DATABASES['default']
+        conn = psycopg2.connect(
+            dbname=params['NAME'], user=params.get('USER') or None,
+            password=params.get('PASSWORD') or None,
+            host=params.get('HOST') or None, port=params.get('PORT') or None)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        return conn
+
+    def _listen(self):
+        while True:
+            try:
+                self._receive()
+            except Exception:
+                logger.exception('Broadcast listener failed, reconnecting')
+                time.sleep(RECONNECT_DELAY)
+
+    def _receive(self):
+        conn = self._connect()
+        wake_fd = self._wake_fds[0]
+        with self._lock:
+            self._listening = set()
+        # Subscribers of the previous connection may have missed messages
+        self.hub.drop_all()
+        try:
+            while True:
+                with self._lock:
+                    channels = self._channels - self._listening
+                with conn.cursor() as cursor:
+                    for channel in channels:
+                        cursor.execute('LISTEN "%s"' % channel.replace('"', ''))
+                with self._lock:
+                    self._listening |= channels
+                    for channel in channels:
+                        waiter = self._waiters.pop(channel, None)
+                        if waiter is not None:
+                            waiter.set()
+
+                readable = select.select([conn, wake_fd], [], [],
+                                         LISTEN_TIMEOUT)[0]
+                if wake_fd in readable:
+                    os.read(wake_fd, 1024)
+                if conn in readable:
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self.hub.dispatch(notify.channel,
+                                          json.loads(notify.payload))
+        finally:
+            with self._lock:
+                self._listening = set()
+            conn.close()
+
+
+hub = Hub()
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(getattr(
+            settings, 'BROADCAST_BACKEND',
+            'jobs_backend.core.broadcast.LocalBackend'))(hub)
+    return _backend
+
+
+def subscribe(channel):
+    """
+    Returns subscription to messages published to channel from now on.
+    Messages may be lost only if it is dropped.
+    """
+    get_backend().listen(channel)
+    return hub.subscribe(channel)
+
+
+def publish(channel, message):
+    """
+    Sends JSON serializable message to subscribers of all processes once
+    the current transaction is committed
+    """
+    def send():
+        try:
+            get_backend().publish(channel, message)
+        except Exception:
+            logger.exception('Failed to publish to %s', channel)
+    transaction.on_commit(send)
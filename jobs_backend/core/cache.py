@@ -0,0 +1,175 @@
+"""
+Single-flight caching.
+
+`get_or_set` makes sure that only one caller at a time recomputes a missing
+or stale value, so a burst of requests after an invalidation runs the
+expensive work once instead of once per request:
+
+* callers in the same process wait for the one already computing;
+* across processes, a lock taken with ``cache.add`` elects the caller which
+  computes while the others poll the cache for the result;
+* once a value is older than its ``ttl`` it is still served for
+  ``stale_ttl`` more seconds while one caller revalidates it.
+
+Values may belong to a namespace: `invalidate` marks all of them stale at
+once by bumping the namespace generation, so they keep being served stale
+until recomputed rather than all missing at the same moment.
+"""
+import functools
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+KEY_PREFIX = 'singleflight:'
+POLL_INTERVAL = 0.01
+
+
+def _value_key(key):
+    return KEY_PREFIX + key
+
+
+def _lock_key(key):
+    return KEY_PREFIX + 'lock:' + key
+
+
+def _generation_key(namespace):
+    return KEY_PREFIX + 'generation:' + namespace
+
+
+def _read(key, namespace):
+    keys = [_value_key(key)]
+    if namespace:
+        keys.append(_generation_key(namespace))
+    values = cache.get_many(keys)
+    generation = values.get(_generation_key(namespace), 0) \
+        if namespace else 0
+    return values.get(_value_key(key)), generation
+
+
+def _lock_timeout():
+    return getattr(settings, 'SINGLE_FLIGHT_LOCK_TIMEOUT', 10)
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+_calls = {}
+_calls_lock = threading.Lock()
+
+
+def _local_single_flight(key, func):
+    """
+    Runs func once for concurrent callers of the same key in this process
+    """
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    try:
+        call.value = func()
+        return call.value
+    except Exception as error:
+        call.error = error
+        raise
+    finally:
+        with _calls_lock:
+            del _calls[key]
+        call.done.set()
+
+
+def _compute(key, compute, ttl, stale_ttl, generation):
+    value = compute()
+    cache.set(_value_key(key), (value, time.time() + ttl, generation),
+              ttl + stale_ttl)
+    return value
+
+
+def _locked_compute(key, compute, ttl, stale_ttl, generation):
+    try:
+        return _compute(key, compute, ttl, stale_ttl, generation)
+    finally:
+        cache.delete(_lock_key(key))
+
+
+def _fill(key, compute, ttl, stale_ttl, namespace, generation):
+    deadline = time.monotonic() + _lock_timeout()
+    while True:
+        if cache.add(_lock_key(key), 1, _lock_timeout()):
+            return _locked_compute(key, compute, ttl, stale_ttl, generation)
+        time.sleep(POLL_INTERVAL)
+        entry, generation = _read(key, namespace)
+        if entry is not None:
+            return entry[0]
+        if time.monotonic() >= deadline:
+            # The lock holder is too slow or gone
+            return _compute(key, compute, ttl, stale_ttl, generation)
+
+
+def get_or_set(key, compute, ttl, stale_ttl=0, namespace=None):
+    """
+    Returns cached value of key, calling compute() to get it if missing.
+    Concurrent callers across all processes share one compute() call.
+    """
+    entry, generation = _read(key, namespace)
+    if entry is not None:
+        value, fresh_until, entry_generation = entry
+        if time.time() < fresh_until and entry_generation == generation:
+            metrics.CACHE_REQUESTS.inc((namespace or '', 'hit'))
+            return value
+        metrics.CACHE_REQUESTS.inc((namespace or '', 'stale'))
+        # Stale: the one taking the lock revalidates, the rest get it as is
+        if cache.add(_lock_key(key), 1, _lock_timeout()):
+            return _locked_compute(key, compute, ttl, stale_ttl, generation)
+        return value
+    metrics.CACHE_REQUESTS.inc((namespace or '', 'miss'))
+    return _local_single_flight(key, lambda: _fill(
+        key, compute, ttl, stale_ttl, namespace, generation))
+
+
+def invalidate(namespace):
+    """
+    Marks all values of namespace stale
+    """
+    key = _generation_key(namespace)
+    # Generation must not expire before the values it guards
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted in between
+        cache.set(key, 1, None)
+
+
+def single_flight(ttl, stale_ttl=0, namespace=None):
+    """
+    Caches results of the decorated function by its arguments, see
+    get_or_set
+    """
+    def decorator(func):
+        prefix = '%s.%s' % (func.__module__, func.__qualname__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            arguments = repr((args, sorted(kwargs.items()))).encode()
+            key = '%s:%s' % (prefix, hashlib.md5(arguments).hexdigest())
+            return get_or_set(key, lambda: func(*args, **kwargs), ttl,
+                              stale_ttl, namespace)
+        return wrapper
+    return decorator
@@ -0,0 +1,143 @@
+"""
+Import time profiler.
+
+Measures how long every module takes to import, as a tree of nested imports.
+Profiling always runs in a fresh interpreter, so nothing is imported yet:
+
+    python -m jobs_backend.core.importtime config.wsgi manage
+
+`manage` stands for what manage.py does before running a command, which is
+configuring settings and calling django.setup(). Results are printed as JSON.
+"""
+import builtins
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+
+MANAGE = 'manage'
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+
+class ImportNode(object):
+
+    def __init__(self, name):
+        self.name = name
+        self.total = 0.0
+        self.children = []
+
+    @property
+    def self_time(self):
+        return self.total - sum(child.total for child in self.children)
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'total': self.total,
+            'self': self.self_time,
+            'children': [child.as_dict() for child in self.children],
+        }
+
+
+class ImportTimer(object):
+    """
+    Replaces builtins.__import__ to time imports of not yet loaded modules
+    """
+    def __init__(self):
+        self.root = ImportNode('<root>')
+        self._stack = [self.root]
+        self._import = None
+
+    def __enter__(self):
+        self._import = builtins.__import__
+        self._import_module = importlib.import_module
+        builtins.__import__ = self._timed_import
+        # Used by Django to load apps, urlconfs, middleware and so on
+        importlib.import_module = self._timed_import_module
+        return self
+
+    def __exit__(self, *exc_info):
+        builtins.__import__ = self._import
+        importlib.import_module = self._import_module
+
+    def _resolve(self, name, globals, fromlist, level):
+        if not level:
+            return name
+        package = (globals or {}).get('__package__') or ''
+        try:
+            resolved = importlib.util.resolve_name('.' * level + name, package)
+        except (ImportError, ValueError):
+            return name
+        if not name and fromlist:
+            return '%s.{%s}' % (resolved, ','.join(fromlist))
+        return resolved
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(),
+                      level=0):
+        return self._timed(self._resolve(name, globals, fromlist, level),
+                           self._import, name, globals, locals, fromlist, level)
+
+    def _timed_import_module(self, name, package=None):
+        resolved = name
+        if name.startswith('.'):
+            resolved = importlib.util.resolve_name(name, package)
+        return self._timed(resolved, self._import_module, name, package)
+
+    def _timed(self, label, func, *args):
+        loaded = len(sys.modules)
+        node = ImportNode(label)
+        self._stack.append(node)
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            node.total = time.perf_counter() - started
+            self._stack.pop()
+            # Imports of already loaded modules are not interesting
+            if len(sys.modules) > loaded:
+                self._stack[-1].children.append(node)
+
+
+def _import_target(target):
+    if target == MANAGE:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.local')
+        import django
+        django.setup()
+    else:
+        importlib.import_module(target)
+
+
+def profile_targets(targets):
+    """
+    Profiles imports of targets in the current interpreter
+    """
+    result = []
+    for target in targets:
+        with ImportTimer() as timer:
+            started = time.perf_counter()
+            _import_target(target)
+            timer.root.total = time.perf_counter() - started
+        timer.root.name = target
+        result.append(timer.root.as_dict())
+    return result
+
+
+def profile(target, settings_module=None):
+    """
+    Profiles imports of target in a fresh interpreter
+    """
+    env = dict(os.environ)
+    if settings_module:
+        env['DJANGO_SETTINGS_MODULE'] = settings_module
+    output = subprocess.check_output(
+        [sys.executable, '-m', __name__, target], env=env, cwd=ROOT_DIR,
+    )
+    return json.loads(output.decode())[0]
+
+
+if __name__ == '__main__':
+    json.dump(profile_targets(sys.argv[1:]), sys.stdout)
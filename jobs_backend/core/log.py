@@ -0,0 +1,124 @@
+"""
+Logging formatter and handler for production.
+
+`BufferedHandler` only puts records in a bounded queue, a background thread
+formats and writes them with the target handler. Logging then never waits for
+a slow or blocked stream, e.g. a full pipe to the log collector, or for a mail
+server: when the queue is full records are dropped and counted instead.
+
+`JSONFormatter` writes a record per line, with the fields passed as
+``extra={'data': {...}}`` at the top level.
+"""
+import atexit
+import datetime
+import json
+import logging
+import queue
+import threading
+
+from django.utils.module_loading import import_string
+
+DEFAULT_CAPACITY = 10000
+
+
+class JSONFormatter(logging.Formatter):
+
+    def format(self, record):
+        data = {
+            'time': datetime.datetime.utcfromtimestamp(
+                record.created).isoformat() + 'Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(getattr(record, 'data', None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, default=str, separators=(',', ':'))
+
+
+class BufferedHandler(logging.Handler):
+    """
+    Passes records to the target handler, given by its class path and
+    arguments, in a background thread
+    """
+    def __init__(self, target='logging.StreamHandler',
+                 capacity=DEFAULT_CAPACITY, **kwargs):
+        super(BufferedHandler, self).__init__()
+        self.target = import_string(target)(**kwargs)
+        self.queue = queue.Queue(capacity)
+        self.dropped = 0
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        atexit.register(self.drain)
+
+    def setFormatter(self, fmt):
+        super(BufferedHandler, self).setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def _ensure_writer(self):
+        # Threads do not survive fork(), so a preforked worker starts its own
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._write, name='log', daemon=True)
+                self._writer.start()
+
+    def prepare(self, record):
+        # Arguments may change by the time the record is written
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def emit(self, record):
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            self.dropped += 1
+            return
+        except Exception:
+            self.handleError(record)
+            return
+        self._ensure_writer()
+
+    def _report_dropped(self):
+        # emit() runs under the handler lock
+        self.acquire()
+        try:
+            dropped, self.dropped = self.dropped, 0
+        finally:
+            self.release()
+        if dropped:
+            self.target.handle(logging.LogRecord(
+                __name__, logging.WARNING, __file__, 0,
+                '%d log records dropped, the handler is too slow',
+                (dropped,), None))
+
+    def _write(self):
+        while True:
+            self.target.handle(self.queue.get())
+            if self.queue.empty():
+                self._report_dropped()
+                self.target.flush()
+            self.queue.task_done()
+
+    def drain(self):
+        """
+        Passes all queued records to the target in the calling thread
+        """
+        while True:
+            try:
+                record = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.target.handle(record)
+            self.queue.task_done()
+        self.target.flush()
+
+    def close(self):
+        self.target.close()
+        super(BufferedHandler, self).close()
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from jobs_backend.core import importtime
+
+
+class Command(BaseCommand):
+    help = ('Reports import time of modules as a tree. Targets are module '
+            'names or "manage" for what manage.py does before any command.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='*',
+                            default=['config.wsgi', importtime.MANAGE])
+        parser.add_argument('--min-ms', type=float, default=5.0,
+                            help='Hide imports faster than that')
+        parser.add_argument('--top', type=int, default=15,
+                            help='Number of modules listed by self time')
+
+    def handle(self, *args, **options):
+        for target in options['targets']:
+            tree = importtime.profile(target, options['settings'])
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                '%s: %.1f ms' % (target, tree['total'] * 1000)))
+            self.write_tree(tree, options['min_ms'] / 1000)
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                'Slowest modules by self time:'))
+            for node in self.top(tree, options['top']):
+                self.stdout.write('%8.1f ms  %s' % (node['self'] * 1000,
+                                                    node['name']))
+            self.stdout.write('')
+
+    def write_tree(self, node, min_time, depth=0):
+        for child in node['children']:
+            if child['total'] < min_time:
+                continue
+            self.stdout.write('%8.1f ms %8.1f ms  %s%s' % (
+                child['total'] * 1000, child['self'] * 1000,
+                '  ' * depth, child['name']))
+            self.write_tree(child, min_time, depth + 1)
+
+    def top(self, tree, count):
+        nodes, stack = [], list(tree['children'])
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            stack.extend(node['children'])
+        return sorted(nodes, key=lambda node: node['self'], reverse=True)[:count]
@@ -0,0 +1,292 @@
+"""
+Metrics shared by all worker processes.
+
+Every process keeps its samples in a memory-mapped file of doubles in
+``METRICS_DIR``, so recording is an in-memory addition with no system call
+or lock shared with other processes. Sample names are appended to a keys file
+next to it when first used. `render` sums the samples of all files, those of
+exited workers included, into the Prometheus text format.
+
+Remove the files when the server starts (see config/gunicorn.py), as
+counters are cumulative since then. Metrics are not recorded if
+``METRICS_DIR`` is None.
+"""
+import bisect
+import ctypes
+import json
+import logging
+import math
+import mmap
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+              0.5, 1.0, 5.0)
+
+_registry = OrderedDict()
+
+
+def get_metrics_dir():
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+class _Samples(object):
+    """
+    Samples of the current process
+    """
+    def __init__(self, metrics_dir, capacity):
+        os.makedirs(metrics_dir, exist_ok=True)
+        path = os.path.join(metrics_dir, '%d' % os.getpid())
+        self.pid = os.getpid()
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.slots = {}
+        # (metric name, label values) -> slots of the metric
+        self.metric_slots = {}
+        self._keys_file = open(path + '.keys', 'w')
+        with open(path + '.values', 'wb') as values_file:
+            values_file.truncate(capacity * 8)
+        with open(path + '.values', 'r+b') as values_file:
+            self._mmap = mmap.mmap(values_file.fileno(), capacity * 8)
+        self.values = (ctypes.c_double * capacity).from_buffer(self._mmap)
+
+    def slot(self, name, labels):
+        key = json.dumps([name, labels])
+        with self.lock:
+            slot = self.slots.get(key)
+            if slot is not None:
+                return slot
+            if len(self.slots) >= self.capacity:
+                logger.warning('METRICS_MAX_SAMPLES exceeded, %s %s is not '
+                               'recorded', name, labels)
+                return None
+            slot = self.slots[key] = len(self.slots)
+            # The value is zero already, readers skip incomplete lines
+            self._keys_file.write(key + '\n')
+            self._keys_file.flush()
+            return slot
+
+
+_samples = None
+_samples_lock = threading.Lock()
+
+
+def _get_samples():
+    global _samples
+    # A forked worker writes to its own file
+    samples = _samples
+    if samples is None or samples.pid != os.getpid():
+        metrics_dir = get_metrics_dir()
+        if metrics_dir is None:
+            return None
+        with _samples_lock:
+            if _samples is None or _samples.pid != os.getpid():
+                _samples = _Samples(metrics_dir, getattr(
+                    settings, 'METRICS_MAX_SAMPLES', 4096))
+            samples = _samples
+    return samples
+
+
+class Metric(object):
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry[name] = self
+
+    def _get_slots(self, labelvalues):
+        """
+        Returns samples of the process and slots of labelvalues in them
+        """
+        samples = _get_samples()
+        if samples is None:
+            return None, None
+        try:
+            return samples, samples.metric_slots[self.name, labelvalues]
+        except KeyError:
+            slots = samples.metric_slots[self.name, labelvalues] = \
+                self._make_slots(samples, labelvalues)
+            return samples, slots
+
+    def _make_slots(self, samples, labelvalues):
+        raise NotImplementedError
+
+    def _labels(self, labelvalues, **extra):
+        labels = OrderedDict(zip(self.labelnames,
+                                 (str(value) for value in labelvalues)))
+        labels.update(extra)
+        return labels
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def _make_slots(self, samples, labelvalues):
+        return samples.slot(self.name, self._labels(labelvalues))
+
+    def inc(self, labelvalues=(), amount=1):
+        samples, slot = self._get_slots(labelvalues)
+        if slot is not None:
+            with samples.lock:
+                samples.values[slot] += amount
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _make_slots(self, samples, labelvalues):
+        # Bucket counts are not cumulative until rendered
+        bounds = [_format_value(bound) for bound in self.buckets] + ['+Inf']
+        slots = [samples.slot(self.name + '_bucket',
+                              self._labels(labelvalues, le=bound))
+                 for bound in bounds]
+        slots.append(samples.slot(self.name + '_sum',
+                                  self._labels(labelvalues)))
+        if None in slots:
+            return None
+        return slots
+
+    def observe(self, value, labelvalues=()):
+        samples, slots = self._get_slots(labelvalues)
+        if slots is not None:
+            bucket = slots[bisect.bisect_left(self.buckets, value)]
+            with samples.lock:
+                samples.values[bucket] += 1
+                samples.values[slots[-1]] += value
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if value == int(value):
+        return '%d' % value if abs(value) < 1e15 else repr(float(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return value.replace('\\', r'\\').replace('\n', r'\n') \
+        .replace('"', r'\"')
+
+
+def _read_samples(metrics_dir):
+    """
+    Returns {(name, labels as JSON): value} summed over all processes
+    """
+    totals = {}
+    if metrics_dir is None:
+        return totals
+    try:
+        names = os.listdir(metrics_dir)
+    except FileNotFoundError:
+        return totals
+    for name in names:
+        if not name.endswith('.keys'):
+            continue
+        path = os.path.join(metrics_dir, name[:-len('.keys')])
+        try:
+            with open(path + '.keys') as keys_file:
+                keys = keys_file.read().split('\n')[:-1]
+            with open(path + '.values', 'rb') as values_file:
+                data = values_file.read(len(keys) * 8)
+        except FileNotFoundError:
+            continue
+        values = (ctypes.c_double * (len(data) // 8)).from_buffer_copy(data)
+        for slot, key in enumerate(keys[:len(values)]):
+            sample_name, labels = json.loads(key)
+            total_key = (sample_name, json.dumps(labels, sort_keys=True))
+            totals[total_key] = totals.get(total_key, 0.0) + values[slot]
+    return totals
+
+
+def _render_labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (name, _escape(value))
+                             for name, value in labels.items())
+
+
+def render():
+    """
+    Returns samples of all processes in the Prometheus text format
+    """
+    totals = _read_samples(get_metrics_dir())
+    by_name = {}
+    for (sample_name, labels), value in totals.items():
+        by_name.setdefault(sample_name, []).append(
+            (json.loads(labels, object_pairs_hook=OrderedDict), value))
+
+    lines = []
+    for metric in _registry.values():
+        lines.append('# HELP %s %s' % (metric.name, _escape(
+            metric.documentation)))
+        lines.append('# TYPE %s %s' % (metric.name, metric.type))
+        if metric.type == 'counter':
+            for labels, value in sorted(by_name.get(metric.name, []),
+                                        key=lambda sample: list(
+                                            sample[0].items())):
+                lines.append('%s%s %s' % (metric.name, _render_labels(labels),
+                                          _format_value(value)))
+            continue
+
+        buckets = {}
+        for labels, value in by_name.get(metric.name + '_bucket', []):
+            bound = labels.pop('le')
+            buckets.setdefault(json.dumps(labels), {})[bound] = value
+        sums = {json.dumps(labels): value
+                for labels, value in by_name.get(metric.name + '_sum', [])}
+        bounds = [_format_value(bound) for bound in metric.buckets] + ['+Inf']
+        for key in sorted(buckets):
+            labels = json.loads(key, object_pairs_hook=OrderedDict)
+            total = 0.0
+            for bound in bounds:
+                total += buckets[key].get(bound, 0.0)
+                bucket_labels = OrderedDict(labels, le=bound)
+                lines.append('%s_bucket%s %s' % (
+                    metric.name, _render_labels(bucket_labels),
+                    _format_value(total)))
+            lines.append('%s_count%s %s' % (
+                metric.name, _render_labels(labels), _format_value(total)))
+            lines.append('%s_sum%s %s' % (
+                metric.name, _render_labels(labels),
+                _format_value(sums.get(key, 0.0))))
+    return '\n'.join(lines) + '\n'
+
+
+def clear():
+    """
+    Removes samples of all processes
+    """
+    global _samples
+    with _samples_lock:
+        _samples = None
+    if get_metrics_dir() is not None:
+        shutil.rmtree(get_metrics_dir(), ignore_errors=True)
+
+
+REQUESTS = Counter(
+    'http_requests_total', 'Requests by view, method and status',
+    ('view', 'method', 'status'))
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Request duration by view', ('view',))
+DB_QUERY_DURATION = Histogram(
+    'db_query_duration_seconds', 'Database query duration', ('database',),
+    buckets=DB_BUCKETS)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', 'Single-flight cache lookups by namespace and '
+    'result: hit, stale or miss', ('namespace', 'result'))
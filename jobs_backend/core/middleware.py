@@ -0,0 +1,86 @@
+"""
+Drop-in replacements for the stock session, authentication, messages and
+CSRF middleware which do nothing for stateless API requests.
+
+Token-authenticated API calls and anonymous API reads never use a session,
+flash messages or the CSRF cookie (DRF enforces CSRF itself for session
+authenticated users), so loading and saving that state is pure overhead.
+"""
+from django.conf import settings
+from django.contrib.auth.middleware import (
+    AuthenticationMiddleware as BaseAuthenticationMiddleware,
+)
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.middleware import (
+    MessageMiddleware as BaseMessageMiddleware,
+)
+from django.contrib.sessions.middleware import (
+    SessionMiddleware as BaseSessionMiddleware,
+)
+from django.middleware.csrf import CsrfViewMiddleware as BaseCsrfViewMiddleware
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+TOKEN_KEYWORDS = ('Token', 'Bearer')
+
+
+def is_stateless_api_request(request):
+    """
+    Tells whether request is an API call which needs no session state
+    """
+    try:
+        return request._stateless_api
+    except AttributeError:
+        pass
+
+    path = request.path_info
+    stateless = (
+        path.startswith(getattr(settings, 'STATELESS_API_PREFIX', '/api/')) and
+        not path.startswith(getattr(settings, 'STATELESS_API_EXCLUDE', ())) and
+        (
+            request.META.get('HTTP_AUTHORIZATION', '').split(' ', 1)[0]
+            in TOKEN_KEYWORDS or
+            (request.method in SAFE_METHODS and
+             settings.SESSION_COOKIE_NAME not in request.COOKIES)
+        )
+    )
+    request._stateless_api = stateless
+    return stateless
+
+
+class SessionMiddleware(BaseSessionMiddleware):
+
+    def process_request(self, request):
+        if not is_stateless_api_request(request):
+            super(SessionMiddleware, self).process_request(request)
+
+    def process_response(self, request, response):
+        if not hasattr(request, 'session'):
+            return response
+        return super(SessionMiddleware, self).process_response(
+            request, response)
+
+
+class AuthenticationMiddleware(BaseAuthenticationMiddleware):
+
+    def process_request(self, request):
+        if is_stateless_api_request(request):
+            # DRF authentication classes replace it when credentials are sent
+            request.user = AnonymousUser()
+        else:
+            super(AuthenticationMiddleware, self).process_request(request)
+
+
+class MessageMiddleware(BaseMessageMiddleware):
+
+    def process_request(self, request):
+        if not is_stateless_api_request(request):
+            super(MessageMiddleware, self).process_request(request)
+
+
+class CsrfViewMiddleware(BaseCsrfViewMiddleware):
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_stateless_api_request(request):
+            return None
+        return super(CsrfViewMiddleware, self).process_view(
+            request, callback, callback_args, callback_kwargs)
@@ -0,0 +1,175 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from rest_framework import exceptions, serializers, status
+from rest_framework.response import Response
+
+IDEMPOTENCY_PENDING = 'pending'
+IDEMPOTENCY_DONE = 'done'
+
+
+class BatchRetrieveMixin(object):
+    """
+    Lets list action return objects by ?ids=1,2,3 in one query, in the
+    requested order, along with the ids which were not found
+    """
+    batch_param = 'ids'
+
+    def get_batch_ids(self, value):
+        try:
+            ids = [int(pk) for pk in value.split(',') if pk.strip()]
+        except ValueError:
+            raise serializers.ValidationError(
+                {self.batch_param: ['Expected comma separated integers.']})
+        # Duplicates are returned once
+        ids = list(OrderedDict.fromkeys(ids))
+        max_ids = getattr(settings, 'BATCH_RETRIEVE_MAX_IDS', 100)
+        if not ids or len(ids) > max_ids:
+            raise serializers.ValidationError(
+                {self.batch_param: ['Expected 1 to %d ids.' % max_ids]})
+        return ids
+
+    def list(self, request, *args, **kwargs):
+        value = request.query_params.get(self.batch_param)
+        if value is None:
+            return super(BatchRetrieveMixin, self).list(
+                request, *args, **kwargs)
+
+        ids = self.get_batch_ids(value)
+        objects = self.filter_queryset(self.get_queryset()).in_bulk(ids)
+        serializer = self.get_serializer(
+            [objects[pk] for pk in ids if pk in objects], many=True)
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in objects],
+        })
+
+
+class BatchCreateMixin(object):
+    """
+    Lets create action take a list of objects
+    """
+    batch_create_max = 100
+
+    def get_batch_create_max(self):
+        return self.batch_create_max
+
+    def perform_create_many(self, serializers):
+        """
+        Saves validated serializers in one transaction, override to insert
+        them at once
+        """
+        with transaction.atomic():
+            for serializer in serializers:
+                self.perform_create(serializer)
+
+    def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            return self.create_many(request, request.data)
+        return super(BatchCreateMixin, self).create(request, *args, **kwargs)
+
+    def create_many(self, request, items):
+        """
+        Creates objects from a list. Nothing is created if any item is
+        invalid, unless ?mode=partial is given.
+        """
+        max_items = self.get_batch_create_max()
+        if not items or len(items) > max_items:
+            raise exceptions.ValidationError({
+                'non_field_errors': ['Expected 1 to %d items.' % max_items]
+            })
+        partial = request.query_params.get('mode') == 'partial'
+
+        item_serializers = [self.get_serializer(data=item) for item in items]
+        valid = [serializer.is_valid() for serializer in item_serializers]
+        errors = [{} if ok else serializer.errors
+                  for serializer, ok in zip(item_serializers, valid)]
+        if not all(valid) and not partial:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        if any(valid):
+            self.perform_create_many(
+                [serializer for serializer, ok in zip(item_serializers, valid)
+                 if ok])
+        results = [serializer.data if ok else None
+                   for serializer, ok in zip(item_serializers, valid)]
+
+        if not partial:
+            return Response(results, status=status.HTTP_201_CREATED)
+        return Response(
+            {'results': results, 'errors': errors},
+            status=status.HTTP_201_CREATED if any(valid)
+            else status.HTTP_400_BAD_REQUEST)
+
+
+class IdempotencyConflict(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is in progress.'
+
+
+class IdempotentCreateMixin(object):
+    """
+    Makes create action safe to retry with the same Idempotency-Key header:
+    a successful response is stored in cache and replayed for repeats within
+    IDEMPOTENCY_KEY_TTL seconds instead of creating anything again
+    """
+    idempotency_header = 'HTTP_IDEMPOTENCY_KEY'
+
+    def get_idempotency_cache_key(self, request, key):
+        user = request.user.pk if request.user.is_authenticated() else ''
+        digest = hashlib.sha256(
+            ('%s\n%s\n%s' % (request.path, user, key)).encode()).hexdigest()
+        return 'idempotency:%s' % digest
+
+    def create(self, request, *args, **kwargs):
+        key = request.META.get(self.idempotency_header)
+        if not key:
+            return super(IdempotentCreateMixin, self).create(
+                request, *args, **kwargs)
+        if len(key) > 255:
+            raise serializers.ValidationError(
+                {'Idempotency-Key': ['Ensure it has at most 255 characters.']})
+
+        cache_key = self.get_idempotency_cache_key(request, key)
+        fingerprint = hashlib.sha256(json.dumps(
+            request.data, sort_keys=True, default=str).encode()).hexdigest()
+        ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+
+        # Atomically claims the key, so concurrent repeats do not run twice
+        if not cache.add(cache_key, (IDEMPOTENCY_PENDING, fingerprint), ttl):
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return self.replay_idempotent(stored, fingerprint)
+
+        try:
+            response = super(IdempotentCreateMixin, self).create(
+                request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+        if status.is_success(response.status_code):
+            cache.set(cache_key, (IDEMPOTENCY_DONE, fingerprint,
+                                  response.status_code, response.data,
+                                  response.get('Location')), ttl)
+        else:
+            # Failed requests may be retried once fixed
+            cache.delete(cache_key)
+        return response
+
+    def replay_idempotent(self, stored, fingerprint):
+        if stored[1] != fingerprint:
+            raise serializers.ValidationError({'Idempotency-Key': [
+                'Already used with a different request body.']})
+        if stored[0] == IDEMPOTENCY_PENDING:
+            raise IdempotencyConflict()
+        _, _, status_code, data, location = stored
+        response = Response(data, status=status_code)
+        if location:
+            response['Location'] = location
+        response['Idempotent-Replayed'] = 'true'
+        return response
@@ -0,0 +1,41 @@
+import os
+
+from django.conf import settings
+from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+
+def get_profile_dir():
+    return getattr(settings, 'PROFILER_DIR')
+
+
+class RequestProfile(models.Model):
+    """
+    Profile of a single request, see core.profiling
+    """
+    created_on = models.DateTimeField(auto_now_add=True, db_index=True)
+    method = models.CharField(max_length=16)
+    path = models.CharField(max_length=2000)
+    view = models.CharField(max_length=255, blank=True)
+    status = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True,
+                             on_delete=models.SET_NULL, related_name='+')
+    request_id = models.CharField(max_length=64, blank=True)
+    # pstats file in PROFILER_DIR
+    filename = models.CharField(max_length=255)
+
+    def __str__(self):
+        return '%s %s' % (self.method, self.path)
+
+    def get_file_path(self):
+        return os.path.join(get_profile_dir(), self.filename)
+
+
+@receiver(post_delete, sender=RequestProfile)
+def _delete_file(sender, instance, **kwargs):
+    try:
+        os.remove(instance.get_file_path())
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,72 @@
+"""
+Pagination with estimated counts.
+
+SELECT COUNT(*) scans the whole table on PostgreSQL and becomes the slowest
+part of every page on large tables. Above PAGINATION_ESTIMATE_THRESHOLD rows
+the query planner estimate is used instead, which costs an EXPLAIN.
+"""
+import json
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+
+from rest_framework.pagination import PageNumberPagination
+
+
+def estimate_count(queryset):
+    """
+    Returns planner estimate of queryset rows or None if not available
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses estimated count for large querysets. The estimate can be off, so
+    in that case page numbers are not validated against it.
+    """
+    estimated = False
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            estimate = estimate_count(self.object_list)
+            threshold = getattr(settings, 'PAGINATION_ESTIMATE_THRESHOLD',
+                                10000)
+            if estimate is not None and estimate >= threshold:
+                self.estimated = True
+                return estimate
+        return super(EstimatedCountPaginator, self).count
+
+    def validate_number(self, number):
+        try:
+            return super(EstimatedCountPaginator, self).validate_number(number)
+        except EmptyPage:
+            if self.estimated and int(number) > 1:
+                return int(number)
+            raise
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.estimated:
+            return super(EstimatedCountPaginator, self).page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self)
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    django_paginator_class = EstimatedCountPaginator
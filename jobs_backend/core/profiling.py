@@ -0,0 +1,103 @@
+"""
+On-demand request profiling.
+
+`ProfilerMiddleware` runs a request under cProfile when a staff user sends
+the ``X-Profile`` header, or for a ``PROFILER_SAMPLE_RATE`` share of all
+requests. Other requests only cost a header lookup.
+
+Profiles are saved in the pstats format to ``PROFILER_DIR`` by a background
+task, and are listed in the admin where they can be downloaded. Open them
+with ``python -m pstats``, snakeviz, or turn them into flame graphs with
+flameprof. Only the latest ``PROFILER_MAX_PROFILES`` are kept.
+"""
+import cProfile
+import marshal
+import os
+import random
+import time
+import uuid
+
+from django.conf import settings
+
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .access_log import get_context
+from .models import RequestProfile, get_profile_dir
+from .tasks import enqueue
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+
+def _get_staff_user(request):
+    """
+    Returns request user if it is staff, authenticating API credentials too
+    """
+    user = getattr(request, 'user', None)
+    try:
+        if user is None or not user.is_authenticated:
+            # Stateless API requests are authenticated by views only
+            user = Request(request, authenticators=[
+                authenticator() for authenticator in
+                api_settings.DEFAULT_AUTHENTICATION_CLASSES]).user
+        # Users of access tokens are read here
+        return user if user.is_authenticated and user.is_staff else None
+    except APIException:
+        return None
+
+
+def save_profile(stats, user_id, **fields):
+    profile_dir = get_profile_dir()
+    os.makedirs(profile_dir, exist_ok=True)
+    filename = '%s.prof' % uuid.uuid4().hex
+    with open(os.path.join(profile_dir, filename), 'wb') as profile_file:
+        # The format pstats.Stats.dump_stats writes
+        marshal.dump(stats, profile_file)
+    RequestProfile.objects.create(user_id=user_id, filename=filename,
+                                  **fields)
+
+    keep = getattr(settings, 'PROFILER_MAX_PROFILES', 1000)
+    old = RequestProfile.objects.order_by('-pk')[keep:]
+    # One by one, so that their files are deleted
+    for profile in old:
+        profile.delete()
+
+
+class ProfilerMiddleware(object):
+    """
+    Put it after the authentication middleware
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = getattr(settings, 'PROFILER_SAMPLE_RATE', 0)
+        if PROFILE_HEADER in request.META:
+            user = _get_staff_user(request)
+            if user is None:
+                return self.get_response(request)
+        elif rate and random.random() < rate:
+            user = None
+        else:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        response = profiler.runcall(self.get_response, request)
+        duration = time.perf_counter() - started
+        profiler.create_stats()
+
+        match = request.resolver_match
+        context = get_context()
+        fields = {
+            'method': request.method[:16],
+            'path': request.get_full_path()[:2000],
+            'view': match.view_name if match else '',
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'request_id': context.request_id if context else '',
+        }
+        enqueue(save_profile, profiler.stats,
+                user.pk if user is not None else None, **fields)
+        return response
@@ -0,0 +1,136 @@
+"""
+Process warm-up.
+
+Django and DRF build most of their state lazily, so every freshly forked
+worker pays for URL resolver population, template compilation and the like
+on its first requests. `warm_up` does that work up front. Call it in the
+master process before forking workers (see config/gunicorn.py): the state is
+then inherited by all workers and, once the garbage collector is frozen,
+stays in memory pages shared with the master.
+"""
+import gc
+import importlib
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.urlresolvers import RegexURLResolver, get_resolver
+from django.db import connections
+from django.template.loader import get_template
+
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt')
+# WSGI environ key marking requests made by internal_get, clients can only
+# set HTTP_* keys
+INTERNAL_REQUEST = 'jobs_backend.internal'
+
+
+def _walk_resolver(resolver):
+    # Populating reverse_dict compiles patterns and imports included urlconfs
+    resolver.reverse_dict
+    resolver.namespace_dict
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.regex
+        if isinstance(pattern, RegexURLResolver):
+            count += _walk_resolver(pattern)
+        else:
+            pattern.callback
+            count += 1
+    return count
+
+
+def warm_urls():
+    return _walk_resolver(get_resolver())
+
+
+def _local_app_configs():
+    return [app_config for app_config in apps.get_app_configs()
+            if app_config.name.startswith('jobs_backend.')]
+
+
+def warm_templates():
+    count = 0
+    for app_config in _local_app_configs():
+        template_dir = os.path.join(app_config.path, 'templates')
+        for root, _, files in os.walk(template_dir):
+            for filename in files:
+                if filename.endswith(TEMPLATE_EXTENSIONS):
+                    name = os.path.relpath(os.path.join(root, filename),
+                                           template_dir)
+                    get_template(name)
+                    count += 1
+    return count
+
+
+def warm_serializers():
+    count = 0
+    for app_config in _local_app_configs():
+        try:
+            module = importlib.import_module(app_config.name + '.serializers')
+        except ImportError:
+            continue
+        for value in vars(module).values():
+            if isinstance(value, type) \
+                    and issubclass(value, serializers.Serializer) \
+                    and value.__module__ == module.__name__:
+                value().fields
+                count += 1
+    return count
+
+
+def default_host():
+    hosts = [host.lstrip('.') for host in settings.ALLOWED_HOSTS
+             if host != '*']
+    return hosts[0] if hosts else 'localhost'
+
+
+def internal_get(path, host=None, secure=True, **extra):
+    """
+    Handles GET request to path in process, the same way as a request
+    from a client, and returns the response
+    """
+    # Test utilities are heavy and not needed by workers otherwise
+    from django.test import RequestFactory
+
+    extra.setdefault(INTERNAL_REQUEST, True)
+    request = RequestFactory().get(path, secure=secure,
+                                   HTTP_HOST=host or default_host(), **extra)
+    return WSGIHandler().get_response(request)
+
+
+def warm_api_root():
+    return internal_get('/api/').status_code
+
+
+def warm_up(freeze=True):
+    """
+    Warms up process state, returns time spent on each step
+    """
+    timings = OrderedDict()
+    for name, step in (('urls', warm_urls),
+                       ('templates', warm_templates),
+                       ('serializers', warm_serializers),
+                       ('api_root', warm_api_root)):
+        started = time.perf_counter()
+        result = step()
+        timings[name] = time.perf_counter() - started
+        logger.info('Warm-up %s: %s in %.1f ms',
+                    name, result, timings[name] * 1000)
+
+    # Connections must not be shared with forked workers
+    connections.close_all()
+
+    gc.collect()
+    if freeze and hasattr(gc, 'freeze'):
+        # Python 3.7+: keep warmed objects out of collections, so workers
+        # do not touch (and copy) the pages they live in
+        gc.freeze()
+    return timings
@@ -0,0 +1,66 @@
+"""
+Minimal in-process background task queue.
+
+Keeps slow work (mail delivery, notification fan-out) off the request path.
+Tasks are handed to a daemon worker thread once the current transaction is
+committed. Tasks still waiting in the queue are lost if the process dies.
+
+Set ``TASKS_ALWAYS_EAGER = True`` to run tasks immediately in the calling
+thread, e.g. in tests.
+"""
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _execute(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', func.__name__)
+
+
+def _work():
+    while True:
+        func, args, kwargs = _queue.get()
+        close_old_connections()
+        try:
+            _execute(func, args, kwargs)
+        finally:
+            close_old_connections()
+            _queue.task_done()
+
+
+def _ensure_worker():
+    global _worker
+    # Threads do not survive fork(), so a preforked worker starts its own
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='tasks', daemon=True)
+            _worker.start()
+
+
+def _put(func, args, kwargs):
+    _ensure_worker()
+    _queue.put((func, args, kwargs))
+
+
+def enqueue(func, *args, **kwargs):
+    """
+    Schedules `func(*args, **kwargs)` to run in background after commit
+    """
+    if getattr(settings, 'TASKS_ALWAYS_EAGER', False):
+        func(*args, **kwargs)
+        return
+    transaction.on_commit(lambda: _put(func, args, kwargs))
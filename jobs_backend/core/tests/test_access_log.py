@@ -0,0 +1,51 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from jobs_backend.vacancies.tests.factories import VacancyFactory
+
+
+class AccessLogMiddlewareTestCase(TestCase):
+
+    def test_ok_logged(self):
+        VacancyFactory.create()
+        with self.assertLogs('jobs_backend.access', 'INFO') as logs:
+            response = self.client.get('/api/vacancies/')
+
+        data = logs.records[0].data
+        self.assertEqual(data['status'], 200)
+        self.assertEqual(data['view'], 'api:vacancies:vacancy-list')
+        self.assertGreater(data['db_queries'], 0)
+        self.assertEqual(data['request_id'], response['X-Request-ID'])
+
+    def test_ok_request_id_passed(self):
+        with self.assertLogs('jobs_backend.access', 'INFO') as logs:
+            response = self.client.get('/api/', HTTP_X_REQUEST_ID='abc-1')
+
+        self.assertEqual(response['X-Request-ID'], 'abc-1')
+        self.assertEqual(logs.records[0].data['request_id'], 'abc-1')
+
+    def test_fail_request_id_invalid(self):
+        response = self.client.get('/api/', HTTP_X_REQUEST_ID='a b\n')
+        self.assertEqual(len(response['X-Request-ID']), 32)
+
+
+class SlowQueryLogTestCase(TestCase):
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_EXPLAIN_RATE=1)
+    def test_ok_logged_with_plan(self):
+        with self.assertLogs('jobs_backend.sql.slow', 'WARNING') as logs:
+            self.client.get('/api/vacancies/')
+
+        data = logs.records[0].data
+        self.assertTrue(data['sql'].startswith('SELECT'))
+        self.assertEqual(data['view'], 'api:vacancies:vacancy-list')
+        self.assertTrue(data['plan'] is None or data['plan'])
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_ok_outside_request(self):
+        with self.assertLogs('jobs_backend.sql.slow', 'WARNING') as logs:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                self.assertEqual(cursor.fetchone(), (1,))
+
+        self.assertIsNone(logs.records[0].data['request_id'])
@@ -0,0 +1,142 @@
+import collections
+import contextlib
+import json
+import socket
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from .. import broadcast
+from ..broadcast import Hub, LocalBackend, PostgresBackend
+
+
+class HubTestCase(SimpleTestCase):
+
+    def test_dispatch(self):
+        hub = Hub()
+        first = hub.subscribe('news')
+        second = hub.subscribe('news')
+        other = hub.subscribe('other')
+
+        hub.dispatch('news', {'id': 1})
+
+        self.assertEqual(first.get(timeout=0), {'id': 1})
+        self.assertEqual(second.get(timeout=0), {'id': 1})
+        self.assertIsNone(other.get(timeout=0))
+
+    def test_unsubscribe(self):
+        hub = Hub()
+        with hub.subscribe('news') as subscription:
+            pass
+        hub.dispatch('news', {'id': 1})
+        self.assertIsNone(subscription.get(timeout=0))
+        self.assertEqual(hub._subscribers, {})
+
+    @mock.patch.object(broadcast, 'SUBSCRIBER_QUEUE_SIZE', 2)
+    def test_slow_subscriber_dropped(self):
+        hub = Hub()
+        slow = hub.subscribe('news')
+        for number in range(3):
+            hub.dispatch('news', {'id': number})
+
+        self.assertTrue(slow.dropped)
+        self.assertRaises(EOFError, slow.get, timeout=0)
+        self.assertEqual(hub._subscribers, {})
+
+    def test_drop_all(self):
+        hub = Hub()
+        first = hub.subscribe('news')
+        second = hub.subscribe('other')
+        hub.drop_all()
+
+        self.assertRaises(EOFError, first.get, timeout=0)
+        self.assertRaises(EOFError, second.get, timeout=0)
+        self.assertEqual(hub._subscribers, {})
+
+
+@override_settings(BROADCAST_BACKEND='jobs_backend.core.broadcast.LocalBackend')
+class PublishTestCase(SimpleTestCase):
+
+    def test_local_publish(self):
+        self.assertIsInstance(broadcast.get_backend(), LocalBackend)
+        with broadcast.subscribe('news') as subscription:
+            broadcast.publish('news', {'id': 1})
+            self.assertEqual(subscription.get(timeout=0), {'id': 1})
+
+
+Notify = collections.namedtuple('Notify', 'channel payload')
+
+
+class FakeConnection(object):
+    """
+    Stands for a psycopg2 connection, readable once notified
+    """
+    def __init__(self):
+        self._reader, self._writer = socket.socketpair()
+        self.executed = []
+        self.notifies = []
+        self.error = None
+
+    def fileno(self):
+        return self._reader.fileno()
+
+    @contextlib.contextmanager
+    def cursor(self):
+        yield mock.Mock(execute=self.executed.append)
+
+    def notify(self, channel, message):
+        self.notifies.append(Notify(channel, json.dumps(message)))
+        self._writer.send(b'\0')
+
+    def poll(self):
+        self._reader.recv(1024)
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        self._reader.close()
+        self._writer.close()
+
+
+@mock.patch.object(broadcast, 'RECONNECT_DELAY', 0)
+class PostgresBackendTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.hub = Hub()
+        self.backend = PostgresBackend(self.hub)
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_listen_returns_once_listening(self):
+        conn = FakeConnection()
+        with mock.patch.object(self.backend, '_connect', return_value=conn):
+            self.backend.listen('news')
+            self.assertEqual(conn.executed, ['LISTEN "news"'])
+            # The listener is woken up for new channels
+            self.backend.listen('other')
+            self.assertEqual(conn.executed,
+                             ['LISTEN "news"', 'LISTEN "other"'])
+            self.backend.listen('news')
+            self.assertEqual(len(conn.executed), 2)
+
+        subscription = self.hub.subscribe('news')
+        conn.notify('news', {'id': 1})
+        self.assertEqual(subscription.get(timeout=5), {'id': 1})
+
+    def test_subscribers_dropped_on_reconnect(self):
+        first, second = FakeConnection(), FakeConnection()
+        with mock.patch.object(self.backend, '_connect',
+                               side_effect=[first, second]):
+            self.backend.listen('news')
+            subscription = self.hub.subscribe('news')
+
+            first.error = OSError('connection lost')
+            with self.assertLogs('jobs_backend.core.broadcast', 'ERROR'):
+                first.notify('news', {'id': 1})
+                self.assertRaises(EOFError, subscription.get, timeout=5)
+            self.wait_for(lambda: second.executed == ['LISTEN "news"'])
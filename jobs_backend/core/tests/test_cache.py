@@ -0,0 +1,108 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache as django_cache
+from django.test import SimpleTestCase
+
+from .. import cache
+
+
+class SingleFlightTestCase(SimpleTestCase):
+
+    def setUp(self):
+        django_cache.clear()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def compute(self, value='value', delay=0):
+        def compute():
+            with self.calls_lock:
+                self.calls += 1
+            time.sleep(delay)
+            return value
+        return compute
+
+    def burst(self, func, size=20):
+        barrier = threading.Barrier(size)
+        results = []
+
+        def run():
+            barrier.wait()
+            results.append(func())
+
+        threads = [threading.Thread(target=run) for _ in range(size)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_cached(self):
+        self.assertEqual(cache.get_or_set('key', self.compute(), 60), 'value')
+        self.assertEqual(cache.get_or_set('key', self.compute(), 60), 'value')
+        self.assertEqual(self.calls, 1)
+
+    def test_burst_computes_once(self):
+        results = self.burst(lambda: cache.get_or_set(
+            'key', self.compute(delay=0.1), 60))
+        self.assertEqual(results, ['value'] * 20)
+        self.assertEqual(self.calls, 1)
+
+    def test_burst_across_processes_computes_once(self):
+        # Without in-process coalescing only the cache lock is left
+        with mock.patch.object(cache, '_local_single_flight',
+                               lambda key, func: func()):
+            results = self.burst(lambda: cache.get_or_set(
+                'key', self.compute(delay=0.1), 60))
+        self.assertEqual(results, ['value'] * 20)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_while_revalidate(self):
+        cache.get_or_set('key', self.compute('old'), 60, 60, namespace='ns')
+        cache.invalidate('ns')
+
+        results = self.burst(lambda: cache.get_or_set(
+            'key', self.compute('new', delay=0.1), 60, 60, namespace='ns'))
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(results.count('new'), 1)
+        self.assertEqual(results.count('old'), 19)
+        self.assertEqual(cache.get_or_set(
+            'key', self.compute('newer'), 60, 60, namespace='ns'), 'new')
+
+    def test_expired_served_stale(self):
+        cache.get_or_set('key', self.compute('old'), 60, 60)
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertEqual(
+                cache.get_or_set('key', self.compute('new'), 60, 60), 'new')
+        self.assertEqual(self.calls, 2)
+
+    def test_error_shared_and_not_cached(self):
+        def fail():
+            time.sleep(0.1)
+            raise ValueError
+
+        errors = []
+
+        def call():
+            try:
+                cache.get_or_set('key', fail, 60)
+            except ValueError:
+                errors.append(True)
+            return None
+
+        self.burst(call, size=5)
+        self.assertEqual(len(errors), 5)
+        self.assertEqual(cache.get_or_set('key', self.compute(), 60), 'value')
+
+    def test_decorator(self):
+        @cache.single_flight(60)
+        def double(value):
+            self.calls += 1
+            return value * 2
+
+        self.assertEqual(double(2), 4)
+        self.assertEqual(double(2), 4)
+        self.assertEqual(double(value=3), 6)
+        self.assertEqual(self.calls, 2)
@@ -0,0 +1,38 @@
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from .. import importtime
+
+
+class ImportTimerTestCase(SimpleTestCase):
+
+    def test_ok_new_imports_only(self):
+        sys.modules.pop('colorsys', None)
+        with importtime.ImportTimer() as timer:
+            import os  # noqa
+            import colorsys  # noqa
+        names = [node.name for node in timer.root.children]
+        self.assertEqual(names, ['colorsys'])
+
+    def test_ok_nested_times(self):
+        node = importtime.ImportNode('parent')
+        node.total = 0.5
+        child = importtime.ImportNode('child')
+        child.total = 0.2
+        node.children.append(child)
+
+        self.assertAlmostEqual(node.self_time, 0.3)
+        self.assertEqual(node.as_dict()['children'][0]['name'], 'child')
+
+
+class ImportTimeBudgetTestCase(SimpleTestCase):
+
+    def test_ok_wsgi_within_budget(self):
+        """
+        Cold import of the WSGI application fits IMPORT_TIME_BUDGET
+        """
+        tree = importtime.profile('config.wsgi')
+        self.assertLess(tree['total'], settings.IMPORT_TIME_BUDGET,
+                        'config.wsgi import took %.3f s' % tree['total'])
@@ -0,0 +1,65 @@
+import json
+import logging
+from io import StringIO
+
+from django.test import SimpleTestCase
+
+from ..log import BufferedHandler, JSONFormatter
+
+
+class BufferedHandlerTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.stream = StringIO()
+        self.logger = logging.getLogger('jobs_backend.tests.log')
+        self.logger.propagate = False
+
+    def tearDown(self):
+        self.logger.handlers = []
+        self.logger.propagate = True
+
+    def add_handler(self, **kwargs):
+        handler = BufferedHandler(stream=self.stream, **kwargs)
+        handler.setFormatter(JSONFormatter())
+        self.logger.addHandler(handler)
+        return handler
+
+    def test_ok_json(self):
+        handler = self.add_handler()
+
+        self.logger.warning('Hello %s', 'world', extra={'data': {'id': 1}})
+        handler.queue.join()
+
+        record = json.loads(self.stream.getvalue())
+        self.assertEqual(record['message'], 'Hello world')
+        self.assertEqual(record['level'], 'WARNING')
+        self.assertEqual(record['id'], 1)
+
+    def test_ok_exception(self):
+        handler = self.add_handler()
+
+        try:
+            raise ValueError('bad')
+        except ValueError:
+            self.logger.exception('Failed')
+        handler.queue.join()
+
+        record = json.loads(self.stream.getvalue())
+        self.assertIn('ValueError: bad', record['exception'])
+
+    def test_ok_drops_when_full(self):
+        handler = self.add_handler(capacity=1)
+        # Holding the writer back
+        handler.acquire()
+        try:
+            handler.queue.put_nowait(logging.makeLogRecord({'msg': 'first'}))
+            handler.emit(logging.makeLogRecord({'msg': 'second'}))
+        finally:
+            handler.release()
+        handler.drain()
+        handler._report_dropped()
+
+        lines = [json.loads(line)['message']
+                 for line in self.stream.getvalue().splitlines()]
+        self.assertEqual(lines, ['first', '1 log records dropped, the '
+                                          'handler is too slow'])
@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .. import metrics
+
+COUNTER = metrics.Counter('test_total', 'Test counter', ('kind',))
+HISTOGRAM = metrics.Histogram('test_seconds', 'Test histogram',
+                              buckets=(0.1, 1.0))
+
+
+class MetricsTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.settings = override_settings(METRICS_DIR=self.metrics_dir)
+        self.settings.enable()
+        metrics.clear()
+
+    def tearDown(self):
+        metrics.clear()
+        self.settings.disable()
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+    def test_ok_counter(self):
+        COUNTER.inc(('a',))
+        COUNTER.inc(('a',), 2)
+        COUNTER.inc(('b"',))
+
+        output = metrics.render()
+        self.assertIn('# TYPE test_total counter', output)
+        self.assertIn('test_total{kind="a"} 3', output)
+        self.assertIn('test_total{kind="b\\""} 1', output)
+
+    def test_ok_histogram(self):
+        for value in (0.05, 0.5, 0.5, 5):
+            HISTOGRAM.observe(value)
+
+        output = metrics.render()
+        self.assertIn('test_seconds_bucket{le="0.1"} 1', output)
+        self.assertIn('test_seconds_bucket{le="1"} 3', output)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 4', output)
+        self.assertIn('test_seconds_count 4', output)
+        self.assertIn('test_seconds_sum 6.05', output)
+
+    def test_ok_summed_across_processes(self):
+        COUNTER.inc(('a',))
+        pid = os.fork()
+        if not pid:
+            try:
+                COUNTER.inc(('a',), 2)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+        self.assertEqual(len(os.listdir(self.metrics_dir)), 4)
+        self.assertIn('test_total{kind="a"} 3', metrics.render())
+
+    @override_settings(METRICS_MAX_SAMPLES=1)
+    def test_fail_too_many_samples(self):
+        metrics.clear()
+        COUNTER.inc(('a',))
+        with self.assertLogs('jobs_backend.core.metrics', 'WARNING'):
+            COUNTER.inc(('b',))
+
+        output = metrics.render()
+        self.assertIn('test_total{kind="a"} 1', output)
+        self.assertNotIn('kind="b"', output)
+
+    @override_settings(METRICS_DIR=None)
+    def test_ok_disabled(self):
+        COUNTER.inc(('a',))
+        self.assertNotIn('test_total{', metrics.render())
+
+
+class MetricsViewTestCase(TestCase):
+
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.settings = override_settings(METRICS_DIR=self.metrics_dir,
+                                          METRICS_TOKEN='secret')
+        self.settings.enable()
+        metrics.clear()
+
+    def tearDown(self):
+        metrics.clear()
+        self.settings.disable()
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+    def test_ok_requests_recorded(self):
+        self.client.get('/api/vacancies/')
+
+        response = self.client.get('/metrics',
+                                   HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        output = response.content.decode()
+        self.assertIn('http_requests_total{method="GET",status="200",'
+                      'view="api:vacancies:vacancy-list"} 1', output)
+        self.assertIn('http_request_duration_seconds_count'
+                      '{view="api:vacancies:vacancy-list"} 1', output)
+        self.assertIn('db_query_duration_seconds_count{database="default"}',
+                      output)
+
+    def test_fail_no_token(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 404)
+
+    def test_fail_wrong_token(self):
+        response = self.client.get('/metrics',
+                                   HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_fail_disabled(self):
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from jobs_backend.users.tests.factories import ActiveUserFactory
+from ..middleware import is_stateless_api_request
+
+
+class IsStatelessApiRequestTestCase(TestCase):
+
+    def setUp(self):
+        self.rf = RequestFactory()
+
+    def test_ok_anonymous_api_read(self):
+        request = self.rf.get('/api/vacancies/')
+        self.assertTrue(is_stateless_api_request(request))
+
+    def test_ok_token_api_write(self):
+        request = self.rf.post('/api/vacancies/',
+                               HTTP_AUTHORIZATION='Token abcd')
+        self.assertTrue(is_stateless_api_request(request))
+
+    def test_ok_bearer_api_write(self):
+        request = self.rf.post('/api/vacancies/',
+                               HTTP_AUTHORIZATION='Bearer abcd')
+        self.assertTrue(is_stateless_api_request(request))
+
+    def test_fail_anonymous_api_write(self):
+        request = self.rf.post('/api/vacancies/')
+        self.assertFalse(is_stateless_api_request(request))
+
+    def test_fail_session_api_read(self):
+        request = self.rf.get('/api/vacancies/')
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = 'key'
+        self.assertFalse(is_stateless_api_request(request))
+
+    def test_fail_not_api(self):
+        request = self.rf.get('/admin/')
+        self.assertFalse(is_stateless_api_request(request))
+
+    def test_fail_excluded(self):
+        request = self.rf.get('/api/api-auth/login/')
+        self.assertFalse(is_stateless_api_request(request))
+
+
+class StatelessMiddlewareTestCase(APITestCase):
+    url = reverse('api:vacancies:vacancy-list')
+
+    def setUp(self):
+        self.user = ActiveUserFactory.create()
+
+    def test_ok_token_request_skips_session(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+        response = self.client.post(self.url, {'title': 'title',
+                                               'description': 'description'})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+        self.assertFalse(hasattr(response.wsgi_request, '_messages'))
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    def test_ok_session_request_keeps_session(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.wsgi_request.user, self.user)
+        self.assertTrue(hasattr(response.wsgi_request, 'session'))
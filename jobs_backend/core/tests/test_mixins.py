@@ -0,0 +1,56 @@
+from django.test import TestCase
+
+from rest_framework import mixins, status, viewsets
+from rest_framework.test import APIRequestFactory
+
+from jobs_backend.vacancies.models import Vacancy
+from jobs_backend.vacancies.serializers import VacancySerializer
+from ..mixins import BatchCreateMixin
+
+
+class VacancyBatchViewSet(BatchCreateMixin,
+                          mixins.CreateModelMixin,
+                          viewsets.GenericViewSet):
+    queryset = Vacancy.objects.all()
+    serializer_class = VacancySerializer
+    permission_classes = ()
+    batch_create_max = 2
+
+
+class BatchCreateMixinTestCase(TestCase):
+
+    def setUp(self):
+        self.view = VacancyBatchViewSet.as_view({'post': 'create'})
+
+    def post(self, data, path='/'):
+        request = APIRequestFactory().post(path, data, format='json')
+        return self.view(request)
+
+    def test_ok_saved_one_by_one(self):
+        response = self.post([
+            {'title': 'Python developer', 'description': 'Django'},
+            {'title': 'Go developer', 'description': 'gRPC'},
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['title'] for item in response.data],
+                         ['Python developer', 'Go developer'])
+        self.assertEqual(
+            list(Vacancy.objects.order_by('pk').values_list('pk', flat=True)),
+            [item['id'] for item in response.data])
+
+    def test_ok_partial(self):
+        response = self.post(
+            [{'title': ''}, {'title': 'Go developer', 'description': 'gRPC'}],
+            '/?mode=partial')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(response.data['results'][0])
+        self.assertEqual(Vacancy.objects.count(), 1)
+
+    def test_fail_too_many(self):
+        response = self.post([{'title': 'a'}, {'title': 'b'}, {'title': 'c'}])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['non_field_errors'],
+                         ['Expected 1 to 2 items.'])
@@ -0,0 +1,52 @@
+from unittest import mock
+
+from django.core.paginator import EmptyPage
+from django.test import TestCase, override_settings
+
+from jobs_backend.vacancies.models import Vacancy
+from jobs_backend.vacancies.tests.factories import VacancyFactory
+from ..pagination import EstimatedCountPaginator, estimate_count
+
+
+@override_settings(PAGINATION_ESTIMATE_THRESHOLD=100)
+class EstimatedCountPaginatorTestCase(TestCase):
+
+    def setUp(self):
+        VacancyFactory.create_batch(3)
+        self.queryset = Vacancy.objects.order_by('pk')
+
+    def test_ok_no_estimate(self):
+        # SQLite has no planner estimates
+        self.assertIsNone(estimate_count(self.queryset))
+
+        paginator = EstimatedCountPaginator(self.queryset, 2)
+        self.assertEqual(paginator.count, 3)
+        self.assertFalse(paginator.estimated)
+
+    @mock.patch('jobs_backend.core.pagination.estimate_count',
+                return_value=50)
+    def test_ok_exact_below_threshold(self, _):
+        paginator = EstimatedCountPaginator(self.queryset, 2)
+        self.assertEqual(paginator.count, 3)
+        self.assertFalse(paginator.estimated)
+        self.assertRaises(EmptyPage, paginator.page, 3)
+
+    @mock.patch('jobs_backend.core.pagination.estimate_count',
+                return_value=500)
+    def test_ok_estimate_above_threshold(self, _):
+        paginator = EstimatedCountPaginator(self.queryset, 2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 500)
+            self.assertEqual(len(paginator.page(2).object_list), 1)
+        self.assertTrue(paginator.estimated)
+
+    @mock.patch('jobs_backend.core.pagination.estimate_count',
+                return_value=100)
+    def test_ok_estimate_too_low(self, _):
+        paginator = EstimatedCountPaginator(self.queryset, 1)
+        paginator.count
+
+        # Page beyond estimated count is not rejected
+        self.assertEqual(len(paginator.page(200).object_list), 0)
+        self.assertRaises(EmptyPage, paginator.page, 0)
@@ -0,0 +1,113 @@
+import os
+import pstats
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from jobs_backend.users.tests.factories import ActiveUserFactory, AdminFactory
+from ..models import RequestProfile
+
+
+class ProfilerMiddlewareTestCase(TestCase):
+
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.settings = override_settings(PROFILER_DIR=self.profile_dir)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+    def get(self, user=None, **extra):
+        if user is not None:
+            token = Token.objects.create(user=user)
+            extra['HTTP_AUTHORIZATION'] = 'Token ' + token.key
+        return self.client.get('/api/vacancies/?ordering=popular', **extra)
+
+    def test_ok_staff_header(self):
+        admin = AdminFactory.create()
+        response = self.get(admin, HTTP_X_PROFILE='1')
+
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.user, admin)
+        self.assertEqual(profile.path, '/api/vacancies/?ordering=popular')
+        self.assertEqual(profile.view, 'api:vacancies:vacancy-list')
+        self.assertEqual(profile.status, 200)
+        self.assertEqual(profile.request_id, response['X-Request-ID'])
+        stats = pstats.Stats(profile.get_file_path())
+        self.assertGreater(stats.total_calls, 0)
+
+    def test_fail_not_staff(self):
+        self.get(ActiveUserFactory.create(), HTTP_X_PROFILE='1')
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_fail_anonymous(self):
+        self.get(HTTP_X_PROFILE='1')
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_fail_invalid_token(self):
+        self.get(HTTP_X_PROFILE='1', HTTP_AUTHORIZATION='Token invalid')
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_fail_no_header(self):
+        self.get(AdminFactory.create())
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILER_SAMPLE_RATE=1)
+    def test_ok_sampled(self):
+        self.get()
+        self.assertIsNone(RequestProfile.objects.get().user)
+
+    @override_settings(PROFILER_SAMPLE_RATE=1, PROFILER_MAX_PROFILES=2)
+    def test_ok_old_removed(self):
+        for _ in range(3):
+            self.get()
+
+        self.assertEqual(RequestProfile.objects.count(), 2)
+        self.assertEqual(len(os.listdir(self.profile_dir)), 2)
+
+
+@override_settings(PROFILER_SAMPLE_RATE=1)
+class RequestProfileAdminTestCase(TestCase):
+
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.settings = override_settings(PROFILER_DIR=self.profile_dir)
+        self.settings.enable()
+        self.client.get('/api/vacancies/')
+        self.profile = RequestProfile.objects.get()
+        self.client.force_login(AdminFactory.create())
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+    def test_ok_list(self):
+        response = self.client.get(
+            reverse('admin:core_requestprofile_changelist'))
+        self.assertContains(response, '/api/vacancies/')
+
+    def test_ok_download(self):
+        response = self.client.get(reverse(
+            'admin:core_requestprofile_download', args=[self.profile.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        with open(self.profile.get_file_path(), 'rb') as profile_file:
+            self.assertEqual(b''.join(response.streaming_content),
+                             profile_file.read())
+
+    def test_fail_download_not_staff(self):
+        self.client.force_login(ActiveUserFactory.create())
+        response = self.client.get(reverse(
+            'admin:core_requestprofile_download', args=[self.profile.pk]))
+        self.assertEqual(response.status_code, 302)
+
+    def test_ok_delete_removes_file(self):
+        path = self.profile.get_file_path()
+        self.profile.delete()
+        self.assertFalse(os.path.exists(path))
@@ -0,0 +1,23 @@
+from django.test import SimpleTestCase
+
+from .. import startup
+
+
+class WarmUpTestCase(SimpleTestCase):
+
+    def test_ok_warm_urls(self):
+        self.assertGreater(startup.warm_urls(), 0)
+
+    def test_ok_warm_templates(self):
+        self.assertGreaterEqual(startup.warm_templates(), 4)
+
+    def test_ok_warm_serializers(self):
+        self.assertGreater(startup.warm_serializers(), 0)
+
+    def test_ok_warm_api_root(self):
+        self.assertEqual(startup.warm_api_root(), 200)
+
+    def test_ok_warm_up(self):
+        timings = startup.warm_up(freeze=False)
+        self.assertEqual(list(timings),
+                         ['urls', 'templates', 'serializers', 'api_root'])
@@ -0,0 +1,35 @@
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from .. import tasks
+
+
+class EnqueueTestCase(TestCase):
+
+    def test_ok_eager(self):
+        func = mock.Mock(__name__='func')
+        with override_settings(TASKS_ALWAYS_EAGER=True):
+            tasks.enqueue(func, 1, key='value')
+        func.assert_called_once_with(1, key='value')
+
+
+class EnqueueBackgroundTestCase(TransactionTestCase):
+
+    @override_settings(TASKS_ALWAYS_EAGER=False)
+    def test_ok_background(self):
+        func = mock.Mock(__name__='func')
+        tasks.enqueue(func, 1)
+        tasks._queue.join()
+        func.assert_called_once_with(1)
+
+    @override_settings(TASKS_ALWAYS_EAGER=False)
+    def test_ok_failure_does_not_stop_worker(self):
+        failing = mock.Mock(__name__='failing', side_effect=ValueError)
+        func = mock.Mock(__name__='func')
+        with self.assertLogs('jobs_backend.core.tasks', 'ERROR'):
+            tasks.enqueue(failing)
+            tasks._queue.join()
+        tasks.enqueue(func)
+        tasks._queue.join()
+        func.assert_called_once_with()
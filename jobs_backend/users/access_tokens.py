@@ -0,0 +1,277 @@
+"""
+Signed access tokens.
+
+Login returns a short-lived access token next to the auth token, which is
+stored in the database and serves as the refresh token. Access tokens are
+sent as ``Authorization: Bearer <token>`` and checked by
+`AccessTokenAuthentication` with an HMAC signature, with no query: the user
+row is only read if the view uses more than its pk.
+
+A token is ``<key id>.<user id>.<issued at, ms>.<signature>``. It is signed
+with the first of ``ACCESS_TOKEN_KEYS`` and verified with any of them, so a
+key is rotated by putting a new one first and dropping the old one
+``ACCESS_TOKEN_TTL`` seconds later. Access tokens are disabled while no key
+is set.
+
+`revoke` rejects tokens of a user issued until now. It is called on logout,
+password change and reset, and when an active user is saved deactivated
+(not by QuerySet.update()). Each
+process keeps revocations in memory until the tokens they cover expire,
+receives those of other processes by broadcast and reads the recent ones
+from AccessTokenRevocation when it starts listening and whenever broadcast
+messages may have been lost.
+"""
+import base64
+import collections
+import copy
+import datetime
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.deprecation import CallableFalse, CallableTrue
+from django.utils.functional import SimpleLazyObject, empty
+
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication, get_authorization_header,
+)
+
+from jobs_backend.core import broadcast
+from .models import AccessTokenRevocation, User
+
+logger = logging.getLogger(__name__)
+
+KEYWORD = 'Bearer'
+REVOCATION_CHANNEL = 'access_token_revocations'
+# Tokens issued that many ms ahead, by a server with a faster clock, pass
+CLOCK_SKEW = 5000
+
+
+def get_ttl():
+    return getattr(settings, 'ACCESS_TOKEN_TTL', 900)
+
+
+def _now():
+    return int(time.time() * 1000)
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+_keys_cache = (None, None, None)
+
+
+def _get_keys():
+    """
+    Returns (key id, key) to sign with and {key id: key} to verify with
+    """
+    global _keys_cache
+    secrets = getattr(settings, 'ACCESS_TOKEN_KEYS', ())
+    cached_secrets, signing, keys = _keys_cache
+    if cached_secrets is not secrets:
+        keys = collections.OrderedDict(
+            (hashlib.sha256(secret.encode()).hexdigest()[:8], secret.encode())
+            for secret in secrets)
+        signing = next(iter(keys.items()), None)
+        _keys_cache = (secrets, signing, keys)
+    return signing, keys
+
+
+def is_enabled():
+    return bool(getattr(settings, 'ACCESS_TOKEN_KEYS', ()))
+
+
+def _sign(key, payload):
+    return _b64(hmac.new(key, payload.encode(), hashlib.sha256).digest())
+
+
+def issue(user):
+    """
+    Returns a new access token of the user
+    """
+    signing, _ = _get_keys()
+    if signing is None:
+        raise ValueError('ACCESS_TOKEN_KEYS is not set')
+    key_id, key = signing
+    payload = '%s.%d.%d' % (key_id, user.pk, _now())
+    return '%s.%s' % (payload, _sign(key, payload))
+
+
+def verify(token):
+    """
+    Returns the user id of a valid token, or None
+    """
+    try:
+        payload, signature = token.rsplit('.', 1)
+        key_id, user_id, issued_at = payload.split('.')
+        user_id, issued_at = int(user_id), int(issued_at)
+    except ValueError:
+        return None
+    _, keys = _get_keys()
+    key = keys.get(key_id)
+    if key is None or not hmac.compare_digest(_sign(key, payload), signature):
+        return None
+    now = _now()
+    if not now - get_ttl() * 1000 < issued_at <= now + CLOCK_SKEW:
+        return None
+    if denylist.is_revoked(user_id, issued_at):
+        return None
+    return user_id
+
+
+class Denylist(object):
+    """
+    Times until which tokens of users are revoked, kept until the tokens
+    they cover expire
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # user id -> revoked until, ms, oldest first
+        self._revoked = collections.OrderedDict()
+        self._subscription = None
+        self._pid = None
+
+    def add(self, user_id, revoked_at):
+        with self._lock:
+            revoked_at = max(revoked_at, self._revoked.pop(user_id, 0))
+            self._revoked[user_id] = revoked_at
+            expired = _now() - get_ttl() * 1000 - CLOCK_SKEW
+            while self._revoked:
+                oldest, oldest_revoked_at = next(iter(self._revoked.items()))
+                if oldest_revoked_at >= expired:
+                    break
+                del self._revoked[oldest]
+
+    def is_revoked(self, user_id, issued_at):
+        self.receive()
+        return issued_at <= self._revoked.get(user_id, 0)
+
+    def receive(self):
+        """
+        Adds revocations published by other processes
+        """
+        # A forked process has no listener of its own yet
+        if self._pid != os.getpid() or self._subscription.dropped:
+            self._listen()
+        while True:
+            try:
+                message = self._subscription.get(0)
+            except EOFError:
+                # Messages were lost, e.g. the broadcast listener reconnected
+                logger.warning('Access token revocations were dropped, '
+                               'reloading them')
+                self._listen()
+                continue
+            if message is None:
+                return
+            self.add(message['user_id'], message['revoked_at'])
+
+    def _listen(self):
+        self.close()
+        with self._lock:
+            self._subscription = broadcast.subscribe(REVOCATION_CHANNEL)
+            self._pid = os.getpid()
+        # Listening already, so revocations committed after the load are
+        # received
+        since = timezone.now() - datetime.timedelta(
+            seconds=get_ttl(), milliseconds=CLOCK_SKEW)
+        for user_id, revoked_on in AccessTokenRevocation.objects.filter(
+                revoked_on__gte=since).values_list('user_id', 'revoked_on'):
+            self.add(user_id, int(revoked_on.timestamp() * 1000))
+
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+
+    def close(self):
+        with self._lock:
+            if self._subscription is not None and self._pid == os.getpid():
+                self._subscription.close()
+            self._subscription = self._pid = None
+
+
+denylist = Denylist()
+
+
+def _get_user(user_id):
+    try:
+        return User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        # Deleted since the token was issued
+        raise exceptions.AuthenticationFailed('User not found.')
+
+
+def revoke(user):
+    """
+    Rejects access tokens of the user issued until now, in all processes
+    """
+    revoked_at = _now()
+    denylist.add(user.pk, revoked_at)
+    revoked_on = datetime.datetime.fromtimestamp(revoked_at / 1000,
+                                                 timezone.utc)
+    AccessTokenRevocation.objects.filter(revoked_on__lt=revoked_on - (
+        datetime.timedelta(seconds=get_ttl(), milliseconds=CLOCK_SKEW))
+    ).delete()
+    AccessTokenRevocation.objects.create(user_id=user.pk,
+                                         revoked_on=revoked_on)
+    broadcast.publish(REVOCATION_CHANNEL, {'user_id': user.pk,
+                                           'revoked_at': revoked_at})
+
+
+class TokenUser(SimpleLazyObject):
+    """
+    Authenticated user whose row is read on first use of other attributes
+    than pk, which raises AuthenticationFailed if it was deleted
+    """
+    is_authenticated = CallableTrue
+    is_anonymous = CallableFalse
+
+    def __init__(self, user_id):
+        super(TokenUser, self).__init__(lambda: _get_user(user_id))
+        self.__dict__['pk'] = self.__dict__['id'] = user_id
+
+    def __bool__(self):
+        # Checked by permissions, must not read the user
+        return True
+
+    def __copy__(self):
+        if self._wrapped is empty:
+            return type(self)(self.pk)
+        return copy.copy(self._wrapped)
+
+    def __deepcopy__(self, memo):
+        if self._wrapped is empty:
+            return type(self)(self.pk)
+        return copy.deepcopy(self._wrapped, memo)
+
+
+class AccessTokenAuthentication(BaseAuthentication):
+    """
+    Authenticates requests with `Authorization: Bearer <access token>`
+    """
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != KEYWORD.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(
+                'Invalid token header. Token string should not contain '
+                'spaces.')
+        try:
+            token = auth[1].decode('ascii')
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        user_id = verify(token)
+        if user_id is None:
+            raise exceptions.AuthenticationFailed('Invalid or expired token.')
+        return TokenUser(user_id), token
+
+    def authenticate_header(self, request):
+        return KEYWORD
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
+from jobs_backend.core.pagination import EstimatedCountPaginator
 from .forms import UserChangeForm, UserCreationForm
 from .models import User
 
@@ -30,3 +31,6 @@ class UserAdmin(UserAdmin):
     ordering = ('email',)
     filter_horizontal = ()
     readonly_fields = ('last_login',)
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
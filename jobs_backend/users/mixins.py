@@ -1,6 +1,7 @@
 from django.contrib.auth import update_session_auth_hash
 
 from .models import User
+from . import access_tokens
 from . import utils
 
 
@@ -24,6 +25,8 @@ class PasswordChangeMixin(object):
             user = User.objects.get(pk=uid, is_active=True)
         user.set_password(new_password)
         user.save()
+        if access_tokens.is_enabled():
+            access_tokens.revoke(user)
 
-        if invalidate_sessions:
+        if invalidate_sessions and hasattr(request, 'session'):
             update_session_auth_hash(request, serializer.user)
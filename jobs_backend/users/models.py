@@ -1,8 +1,13 @@
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.core.mail import send_mail
 from django.contrib.auth.models import PermissionsMixin
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.urls import reverse
+from django.utils import timezone
+
+MAX_EMAIL_CASE_VARIANTS = 10
 
 
 class UserManager(BaseUserManager):
@@ -29,6 +34,19 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault('is_active', False)
         return self._create_user(email, password, **extra_fields)
 
+    def get_active_by_email(self, email):
+        """
+        Returns the active user with the email in any case, or None.
+        Looked up by the UPPER(email) index on PostgreSQL.
+        """
+        users = list(self.filter(email__iexact=email, is_active=True)
+                     .order_by('pk')[:MAX_EMAIL_CASE_VARIANTS])
+        # Emails are unique case-sensitively, prefer the exact one
+        for user in users:
+            if user.email == email:
+                return user
+        return users[0] if users else None
+
     def create_superuser(self, email, password, **extra_fields):
         """
         Creates superuser with abilities to login at admin panel
@@ -78,3 +96,31 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def get_absolute_url(self):
         return reverse('api:users:user-detail', kwargs={'pk': self.pk})
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super(User, cls).from_db(db, field_names, values)
+        # Tells deactivation apart on save
+        user._saved_is_active = user.__dict__.get('is_active')
+        return user
+
+
+class AccessTokenRevocation(models.Model):
+    """
+    Access tokens of the user issued until revoked_on are rejected, read by
+    processes which start listening to revocations, see access_tokens
+    """
+    user_id = models.PositiveIntegerField()
+    revoked_on = models.DateTimeField(default=timezone.now, db_index=True)
+
+
+@receiver(post_save, sender=User)
+def _revoke_access_tokens(sender, instance, created, **kwargs):
+    if not created and not instance.is_active and \
+            getattr(instance, '_saved_is_active', False):
+        # access_tokens imports this module
+        from . import access_tokens
+
+        if access_tokens.is_enabled():
+            access_tokens.revoke(instance)
+    instance._saved_is_active = instance.is_active
@@ -1,5 +1,9 @@
+from collections import OrderedDict
+
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.tokens import default_token_generator
+from django.db import transaction
 
 from rest_framework import (
     exceptions,
@@ -28,6 +32,48 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return user
 
 
+class UserInviteSerializer(serializers.Serializer):
+    """
+    Creates inactive users without password for the list of emails
+    """
+    emails = serializers.ListField(child=serializers.EmailField())
+
+    def validate_emails(self, value):
+        max_emails = getattr(settings, 'USER_INVITE_MAX_EMAILS', 5000)
+        if not value:
+            raise serializers.ValidationError('Provide at least one email')
+        if len(value) > max_emails:
+            raise serializers.ValidationError(
+                'No more than %s emails at once' % max_emails)
+
+        # Drops duplicates, keeps order
+        emails = list(OrderedDict(
+            (User.objects.normalize_email(email), None) for email in value
+        ))
+        existing = User.objects.filter(email__in=emails) \
+            .values_list('email', flat=True)
+        if existing:
+            raise serializers.ValidationError(
+                'Users with these emails already exist: %s'
+                % ', '.join(sorted(existing)))
+        return emails
+
+    def create(self, validated_data):
+        emails = validated_data['emails']
+        users = []
+        for email in emails:
+            user = User(email=email, is_active=False)
+            user.set_unusable_password()
+            users.append(user)
+
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+        if users[0].pk is None:
+            # Primary keys are set by bulk_create on PostgreSQL only
+            users = list(User.objects.filter(email__in=emails).order_by('pk'))
+        return users
+
+
 class UserRetrieveSerializer(serializers.ModelSerializer):
     """
     Serializer for retrieve user object(s)
@@ -82,6 +128,25 @@ class AuthTokenSerializer(serializers.ModelSerializer):
         fields = ('auth_token',)
 
 
+class AccessTokenRefreshSerializer(serializers.Serializer):
+    """
+    Checks the auth token given to get a new access token
+    """
+    refresh_token = serializers.CharField()
+
+    default_error_messages = {
+        'refresh_token_invalid': 'Invalid token or user account is inactive.'
+    }
+
+    def validate_refresh_token(self, value):
+        token = Token.objects.filter(key=value).select_related('user').first()
+        if token is None or not token.user.is_active:
+            raise serializers.ValidationError(
+                self.error_messages['refresh_token_invalid'])
+        self.user = token.user
+        return value
+
+
 class AuthTokenValidateSerializer(serializers.ModelSerializer):
     auth_token = serializers.CharField(source='key')
     user = UserRetrieveSerializer(read_only=True)
@@ -144,12 +209,13 @@ class ActivationSerializer(UidTokenSerializer):
 
 class PasswordResetSerializer(serializers.Serializer):
     """
-    Checks registered active user with provided email
+    Checks registered active user with provided email, in any case
     """
     email = serializers.EmailField()
 
     def validate_email(self, value):
-        if not User.objects.filter(email=value, is_active=True).exists():
+        self.user = User.objects.get_active_by_email(value)
+        if self.user is None:
             raise serializers.ValidationError(
                 'User with this email is not found')
         return value
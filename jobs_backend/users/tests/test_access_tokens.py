@@ -0,0 +1,182 @@
+import datetime
+import time
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory
+
+from jobs_backend.core import broadcast
+from .. import access_tokens
+from ..access_tokens import (
+    REVOCATION_CHANNEL, AccessTokenAuthentication, Denylist,
+)
+from ..models import AccessTokenRevocation, User
+from . import factories
+
+
+def sign(payload, secret='test-access-token-key'):
+    return '%s.%s' % (payload, access_tokens._sign(secret.encode(), payload))
+
+
+class AccessTokenTestCase(TestCase):
+
+    def setUp(self):
+        access_tokens.denylist.clear()
+        self.user = factories.ActiveUserFactory.create()
+
+    def test_ok_verify(self):
+        token = access_tokens.issue(self.user)
+        self.assertEqual(access_tokens.verify(token), self.user.pk)
+
+    def test_fail_tampered(self):
+        token = access_tokens.issue(self.user)
+        key_id, user_id, issued_at, signature = token.split('.')
+        other = '.'.join((key_id, str(self.user.pk + 1), issued_at, signature))
+
+        self.assertIsNone(access_tokens.verify(other))
+        self.assertIsNone(access_tokens.verify(token[:-2]))
+        self.assertIsNone(access_tokens.verify('garbage'))
+        self.assertIsNone(access_tokens.verify('a.b.c.d'))
+
+    def test_ok_key_rotation(self):
+        token = access_tokens.issue(self.user)
+
+        with override_settings(ACCESS_TOKEN_KEYS=[
+                'new-key', 'test-access-token-key']):
+            self.assertEqual(access_tokens.verify(token), self.user.pk)
+            new_token = access_tokens.issue(self.user)
+        with override_settings(ACCESS_TOKEN_KEYS=['new-key']):
+            self.assertIsNone(access_tokens.verify(token))
+            self.assertEqual(access_tokens.verify(new_token), self.user.pk)
+
+    def test_fail_expired(self):
+        key_id = access_tokens.issue(self.user).split('.')[0]
+        issued_at = int((time.time() - access_tokens.get_ttl() - 1) * 1000)
+
+        self.assertIsNone(access_tokens.verify(sign(
+            '%s.%d.%d' % (key_id, self.user.pk, issued_at))))
+        self.assertIsNone(access_tokens.verify(sign(
+            '%s.%d.%d' % (key_id, self.user.pk, time.time() * 1000 + 60000))))
+
+    def test_ok_revoke(self):
+        other = factories.ActiveUserFactory.create()
+        token = access_tokens.issue(self.user)
+        other_token = access_tokens.issue(other)
+
+        access_tokens.revoke(self.user)
+        time.sleep(0.002)
+
+        self.assertIsNone(access_tokens.verify(token))
+        self.assertEqual(access_tokens.verify(other_token), other.pk)
+        self.assertEqual(
+            access_tokens.verify(access_tokens.issue(self.user)), self.user.pk)
+        self.assertTrue(AccessTokenRevocation.objects.filter(
+            user_id=self.user.pk).exists())
+
+
+class DenylistTestCase(TestCase):
+
+    def setUp(self):
+        self.denylist = Denylist()
+
+    def tearDown(self):
+        self.denylist.close()
+
+    def test_ok_expired_removed(self):
+        denylist = self.denylist
+        now = time.time() * 1000
+        denylist.add(1, now - access_tokens.get_ttl() * 1000 - 60000)
+        denylist.add(2, now)
+
+        self.assertEqual(list(denylist._revoked), [2])
+
+    def test_ok_received(self):
+        denylist = self.denylist
+        denylist.receive()
+        now = int(time.time() * 1000)
+
+        broadcast.get_backend().publish(
+            REVOCATION_CHANNEL, {'user_id': 5, 'revoked_at': now})
+
+        self.assertTrue(denylist.is_revoked(5, now))
+        self.assertFalse(denylist.is_revoked(5, now + 1))
+
+    def test_ok_loaded_on_listen(self):
+        revoked_on = timezone.now()
+        AccessTokenRevocation.objects.create(user_id=7, revoked_on=revoked_on)
+        AccessTokenRevocation.objects.create(
+            user_id=8, revoked_on=revoked_on - datetime.timedelta(days=1))
+        denylist = self.denylist
+
+        self.assertTrue(denylist.is_revoked(
+            7, int(revoked_on.timestamp() * 1000)))
+        self.assertEqual(list(denylist._revoked), [7])
+
+    def test_ok_reloaded_when_dropped(self):
+        denylist = self.denylist
+        denylist.receive()
+        revoked_on = timezone.now()
+        # Its message was lost
+        AccessTokenRevocation.objects.create(user_id=9, revoked_on=revoked_on)
+        broadcast.hub.drop_all()
+
+        self.assertTrue(denylist.is_revoked(
+            9, int(revoked_on.timestamp() * 1000)))
+
+
+class AccessTokenAuthenticationTestCase(TestCase):
+
+    def setUp(self):
+        access_tokens.denylist.clear()
+        access_tokens.denylist.receive()
+        self.user = factories.ActiveUserFactory.create()
+        self.factory = APIRequestFactory()
+
+    def authenticate(self, header):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=header)
+        return AccessTokenAuthentication().authenticate(request)
+
+    def test_ok_no_query(self):
+        token = access_tokens.issue(self.user)
+
+        with self.assertNumQueries(0):
+            user, auth = self.authenticate('Bearer ' + token)
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertTrue(user.is_authenticated)
+        self.assertEqual(auth, token)
+        # Read when needed
+        self.assertEqual(user.email, self.user.email)
+
+    def test_fail_user_deleted(self):
+        token = access_tokens.issue(self.user)
+        user, _ = self.authenticate('Bearer ' + token)
+        self.user.delete()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            user.email
+
+    def test_fail_user_deactivated(self):
+        token = access_tokens.issue(self.user)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate('Bearer ' + token)
+
+    def test_ok_active_user_saved(self):
+        token = access_tokens.issue(self.user)
+        user = User.objects.get(pk=self.user.pk)
+        user.save()
+
+        self.assertIsNotNone(self.authenticate('Bearer ' + token))
+
+    def test_ok_other_keyword(self):
+        self.assertIsNone(self.authenticate('Token abc'))
+
+    def test_fail_invalid(self):
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate('Bearer invalid')
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate('Bearer')
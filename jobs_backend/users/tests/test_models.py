@@ -101,3 +101,14 @@ class UserManagerTestCase(TestCase):
         self.assertRaises(
             ValueError, User.objects.create_superuser, **self.data
         )
+
+    def test_ok_get_active_by_email(self):
+        user = factories.ActiveUserFactory(email='Obi-Wan@example.com')
+        exact = factories.ActiveUserFactory(email='obi-wan@example.com')
+        factories.BaseUserFactory(email='yoda@example.com')
+
+        self.assertEqual(
+            User.objects.get_active_by_email('OBI-WAN@example.com'), user)
+        self.assertEqual(
+            User.objects.get_active_by_email('obi-wan@example.com'), exact)
+        self.assertIsNone(User.objects.get_active_by_email('yoda@example.com'))
@@ -163,6 +163,7 @@ class PasswordResetSerializerTestCase(TestCase):
     def test_ok_validate_email(self):
         serializer = serializers.PasswordResetSerializer(data=self.data)
         self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.user, self.user)
 
     def test_fail_validate_email(self):
         self.user.is_active = False
@@ -1,12 +1,17 @@
+from smtplib import SMTPException
+from unittest import mock
+
 from django.contrib.auth.tokens import default_token_generator
 from django.core import mail
+from django.core.cache import cache
+from django.test import override_settings
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 
-from .. import utils
+from .. import access_tokens, utils
 from ..models import User
 from . import factories
 
@@ -42,6 +47,28 @@ class UserViewSetTestCase(APITestCase):
             response.data['results'][1]['id']
         )
 
+    def test_ok_list_ids(self):
+        first, second = factories.ActiveUserFactory.create_batch(2)
+        missing = second.pk + 1
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url_list, {
+                'ids': '%s,%s,%s,%s' % (first.pk, missing, second.pk, first.pk)
+            })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']],
+                         [first.pk, second.pk])
+        self.assertEqual(response.data['missing'], [missing])
+
+    def test_fail_list_ids(self):
+        with self.settings(BATCH_RETRIEVE_MAX_IDS=2):
+            for ids in ('1,a', '', '1,2,3'):
+                response = self.client.get(self.url_list, {'ids': ids})
+                self.assertEqual(response.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+                self.assertIn('ids', response.data)
+
     def test_ok_detail(self):
         user = factories.ActiveUserFactory.create()
         url = reverse(self.url_detail, args=[user.pk])
@@ -64,6 +91,20 @@ class UserViewSetTestCase(APITestCase):
         self.assertEqual(response.data['email'], self.data['email'])
         self.assertEqual(response.data['name'], self.data['name'])
 
+    def test_ok_create_idempotent(self):
+        cache.clear()
+        first = self.client.post(self.url_create, self.data,
+                                 HTTP_IDEMPOTENCY_KEY='signup-1')
+        with self.assertNumQueries(0):
+            repeat = self.client.post(self.url_create, self.data,
+                                      HTTP_IDEMPOTENCY_KEY='signup-1')
+
+        self.assertEqual(repeat.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(repeat.data, first.data)
+        self.assertEqual(repeat['Idempotent-Replayed'], 'true')
+        self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
     def test_fail_email_exists(self):
         existing_user = factories.ActiveUserFactory()
         data = {
@@ -114,6 +155,70 @@ class UserViewSetTestCase(APITestCase):
         self.assertTrue(User.objects.get(name='Jane Doe'))
 
 
+class UserInviteTestCase(APITestCase):
+    url = reverse('api:users:user-invite')
+
+    def setUp(self):
+        self.admin = factories.AdminFactory.create()
+        self.data = {
+            'emails': ['john.doe@example.com', 'jane.doe@example.com'],
+        }
+
+    def test_ok_invite(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(self.url, self.data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([user['email'] for user in response.data],
+                         self.data['emails'])
+        for email in self.data['emails']:
+            user = User.objects.get(email=email)
+            self.assertFalse(user.is_active)
+            self.assertFalse(user.has_usable_password())
+
+    def test_ok_activation_emails(self):
+        self.client.force_login(self.admin)
+        with self.settings(USER_INVITE_MAIL_BATCH_SIZE=1):
+            self.client.post(self.url, self.data)
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertCountEqual([message.to[0] for message in mail.outbox],
+                              self.data['emails'])
+        self.assertIn('activation', mail.outbox[0].subject.lower())
+
+    def test_ok_duplicates_collapsed(self):
+        self.data['emails'].append('john.doe@EXAMPLE.com')
+        self.client.force_login(self.admin)
+        response = self.client.post(self.url, self.data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 2)
+
+    def test_fail_existing_email(self):
+        existing = factories.ActiveUserFactory.create()
+        self.data['emails'].append(existing.email)
+        self.client.force_login(self.admin)
+        response = self.client.post(self.url, self.data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(existing.email, response.data['emails'][0])
+        self.assertEqual(User.objects.count(), 2)
+
+    def test_fail_too_many_emails(self):
+        self.client.force_login(self.admin)
+        with self.settings(USER_INVITE_MAX_EMAILS=1):
+            response = self.client.post(self.url, self.data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('emails', response.data)
+
+    def test_fail_not_staff(self):
+        self.client.force_login(factories.ActiveUserFactory.create())
+        response = self.client.post(self.url, self.data)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
 class LoginViewTestCase(APITestCase):
     url = reverse('api:account:login')
 
@@ -133,6 +238,16 @@ class LoginViewTestCase(APITestCase):
 
         self.user.refresh_from_db()
         self.assertEqual(response.data['auth_token'], self.user.auth_token.key)
+        self.assertEqual(access_tokens.verify(response.data['access_token']),
+                         self.user.pk)
+        self.assertEqual(response.data['expires_in'],
+                         access_tokens.get_ttl())
+
+    @override_settings(ACCESS_TOKEN_KEYS=[])
+    def test_ok_login_access_tokens_disabled(self):
+        response = self.client.post(self.url, self.data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('access_token', response.data)
 
     def test_fail_email(self):
         self.data['email'] = 'invalid@example.com'
@@ -206,10 +321,66 @@ class LogoutViewTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
     def test_ok_token(self):
-        self.fail('Not implemented. Test with valid token')
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
 
     def test_fail_wrong_token(self):
-        self.fail('Not implemented. Test with invalid token')
+        Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(Token.objects.filter(user=self.user).exists())
+
+    def test_ok_access_token_revoked(self):
+        access_tokens.denylist.clear()
+        Token.objects.create(user=self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Bearer ' + access_tokens.issue(self.user))
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AccessTokenRefreshViewTestCase(APITestCase):
+    url = reverse('api:account:access_token_refresh')
+
+    def setUp(self):
+        self.user = factories.ActiveUserFactory.create()
+        self.token = Token.objects.create(user=self.user)
+
+    def test_ok_refresh(self):
+        response = self.client.post(self.url,
+                                    {'refresh_token': self.token.key})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(access_tokens.verify(response.data['access_token']),
+                         self.user.pk)
+
+    def test_fail_invalid_token(self):
+        response = self.client.post(self.url, {'refresh_token': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('refresh_token', response.data)
+
+    def test_fail_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(self.url,
+                                    {'refresh_token': self.token.key})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(ACCESS_TOKEN_KEYS=[])
+    def test_fail_disabled(self):
+        response = self.client.post(self.url,
+                                    {'refresh_token': self.token.key})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
 class PasswordChangeViewTestCase(APITestCase):
@@ -239,6 +410,26 @@ class PasswordChangeViewTestCase(APITestCase):
         response = self.client.post(self.url, self.data)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_ok_access_token_revoked(self):
+        access_tokens.denylist.clear()
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Bearer ' + access_tokens.issue(self.user))
+        response = self.client.post(self.url, self.data)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.data['current_password'] = self.data['new_password']
+        response = self.client.post(self.url, self.data)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_fail_access_token_of_deleted_user(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Bearer ' + access_tokens.issue(self.user))
+        self.user.delete()
+        response = self.client.post(self.url, self.data)
+        # Session authentication comes first and sends no challenge
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['detail'], 'User not found.')
+
     def test_fail_wrong_current_password(self):
         self.client.force_login(self.user)
         self.data['current_password'] = 'invalid'
@@ -272,6 +463,7 @@ class PasswordResetViewTestCase(APITestCase):
     url = reverse('api:account:password_reset')
 
     def setUp(self):
+        cache.clear()
         self.user = factories.ActiveUserFactory.create()
         self.data = {
             'email': self.user.email
@@ -284,6 +476,38 @@ class PasswordResetViewTestCase(APITestCase):
         self.assertIn(self.data['email'], mail.outbox[0].to)
         self.assertIn('password', mail.outbox[0].subject.lower())
 
+    def test_ok_email_case_insensitive(self):
+        self.data['email'] = self.user.email.upper()
+        response = self.client.post(self.url, self.data)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(mail.outbox[0].to, [self.user.email])
+
+    def test_ok_repeated_coalesced(self):
+        for _ in range(3):
+            response = self.client.post(self.url, self.data)
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(len(mail.outbox), 1)
+
+        other = factories.ActiveUserFactory.create()
+        self.client.post(self.url, {'email': other.email})
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_ok_repeat_after_failed_send(self):
+        with mock.patch('jobs_backend.users.utils.send_user_emails',
+                        side_effect=SMTPException):
+            # Tasks run in the request in tests
+            with self.assertRaises(SMTPException):
+                self.client.post(self.url, self.data)
+
+        response = self.client.post(self.url, self.data)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(mail.outbox[-1].to, [self.user.email])
+
+    def test_ok_single_query(self):
+        # Only the user lookup
+        with self.assertNumQueries(1):
+            self.client.post(self.url, self.data)
+
     def test_fail_invalid_email(self):
         self.data['email'] = 'invalid@example.com'
         response = self.client.post(self.url, self.data)
@@ -320,6 +544,14 @@ class PasswordResetConfirmViewTestCase(APITestCase):
         user = User.objects.get(pk=self.user.pk)
         self.assertTrue(user.check_password(self.data['new_password']))
 
+    def test_ok_access_token_revoked(self):
+        access_tokens.denylist.clear()
+        token = access_tokens.issue(self.user)
+        response = self.client.post(self.url, self.data)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertIsNone(access_tokens.verify(token))
+
     def test_fail_invalid_uid(self):
         self.data['uid'] = 'invalid'
         response = self.client.post(self.url, self.data)
@@ -6,6 +6,8 @@ from jobs_backend.users import views
 urlpatterns = [
     url(r'^login/$', views.LoginView.as_view(), name='login'),
     url(r'^logout/$', views.LogoutView.as_view(), name='logout'),
+    url(r'^token/refresh/$', views.AccessTokenRefreshView.as_view(),
+        name='access_token_refresh'),
 
     url(r'^activate/$', views.ActivationView.as_view(), name='activation'),
 
@@ -2,12 +2,15 @@ from django.conf import settings
 from django.contrib.auth import logout
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.sites.shortcuts import get_current_site
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_text
 
 from rest_framework.authtoken.models import Token
 
+from . import access_tokens
+
 
 def encode_uid(pk):
     return urlsafe_base64_encode(force_bytes(pk)).decode()
@@ -25,7 +28,29 @@ def login_user(request, user):
 
 def logout_user(request):
     Token.objects.filter(user=request.user).delete()
-    logout(request)
+    if access_tokens.is_enabled():
+        access_tokens.revoke(request.user)
+    # Stateless API requests come without session
+    if hasattr(request, 'session'):
+        logout(request)
+
+
+def send_user_emails(mails):
+    """
+    Renders and sends user emails over a single connection
+    """
+    messages = []
+    for mail in mails:
+        envelope = dict(mail)
+        message = EmailMultiAlternatives(
+            subject=envelope['subject'],
+            body=envelope['message'],
+            from_email=envelope['from_email'],
+            to=[mail.user.email],
+        )
+        message.attach_alternative(envelope['html_message'], 'text/html')
+        messages.append(message)
+    get_connection().send_messages(messages)
 
 
 class UserEmailBase(object):
@@ -1,3 +1,15 @@
 from django.contrib import admin
 
-# Register your models here.
+from jobs_backend.core.pagination import EstimatedCountPaginator
+from .models import Vacancy
+
+
+@admin.register(Vacancy)
+class VacancyAdmin(admin.ModelAdmin):
+    list_display = ('title', 'created_on', 'modified_on', 'views_count')
+    search_fields = ('title',)
+    ordering = ('-pk',)
+    readonly_fields = ('created_on', 'modified_on', 'views_count', 'duplicate_of')
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
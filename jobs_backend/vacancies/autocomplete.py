@@ -0,0 +1,209 @@
+"""
+In-memory vacancy title autocomplete.
+
+Every worker process keeps distinct titles in a sorted list, so the titles
+starting with a prefix form a contiguous range found by binary search. Titles
+are ranked by the number of vacancies sharing them. Short prefixes match huge
+ranges, so their top titles are memoized until a matching title is added.
+
+The index catches up with new vacancies at most once per
+``VACANCY_AUTOCOMPLETE_REFRESH_INTERVAL`` seconds by loading rows with a
+larger pk, and is rebuilt from scratch every
+``VACANCY_AUTOCOMPLETE_REBUILD_INTERVAL`` seconds to drop edited and deleted
+titles. Both run in a background thread while requests use the index as it
+is, so a process returns no titles until its first build is done. With
+``TASKS_ALWAYS_EAGER`` the request runs them instead, e.g. in tests.
+"""
+import bisect
+import heapq
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from .models import Vacancy
+
+logger = logging.getLogger(__name__)
+
+# Ranges larger than that are ranked once and memoized
+MEMO_MIN_RANGE = 256
+LOAD_CHUNK_SIZE = 10000
+
+
+def normalize(title):
+    return ' '.join(title.lower().split())
+
+
+class TitleIndex(object):
+
+    def __init__(self, memo_size=20):
+        self.memo_size = memo_size
+        self._keys = []
+        self._titles = {}
+        self._counts = {}
+        # prefix -> top memo_size keys, most common first
+        self._memo = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, title):
+        key = normalize(title)
+        if not key:
+            return
+        if key in self._counts:
+            self._counts[key] += 1
+        else:
+            bisect.insort(self._keys, key)
+            self._titles[key] = title.strip()
+            self._counts[key] = 1
+        # Counts only grow, so a key can only enter top lists of its prefixes
+        for length in range(1, len(key) + 1):
+            top = self._memo.get(key[:length])
+            if top is None:
+                continue
+            if key not in top:
+                top.append(key)
+            top.sort(key=self._counts.__getitem__, reverse=True)
+            del top[self.memo_size:]
+
+    def add_many(self, titles):
+        """
+        Adds titles at once, much faster than add() for large batches
+        """
+        new_keys = []
+        for title in titles:
+            key = normalize(title)
+            if not key:
+                continue
+            if key in self._counts:
+                self._counts[key] += 1
+            else:
+                self._titles[key] = title.strip()
+                self._counts[key] = 1
+                new_keys.append(key)
+        # Sorting two sorted runs is a linear merge
+        new_keys.sort()
+        self._keys.extend(new_keys)
+        self._keys.sort()
+        self._memo.clear()
+
+    def _top(self, prefix, limit):
+        start = bisect.bisect_left(self._keys, prefix)
+        # Every key starting with prefix sorts below prefix + max code point
+        end = bisect.bisect_left(self._keys, prefix + '\U0010ffff', start)
+        if end - start < MEMO_MIN_RANGE or limit > self.memo_size:
+            return heapq.nlargest(limit, self._keys[start:end],
+                                  key=self._counts.__getitem__)
+        top = self._memo[prefix] = heapq.nlargest(
+            self.memo_size, self._keys[start:end],
+            key=self._counts.__getitem__)
+        return top
+
+    def search(self, prefix, limit):
+        """
+        Returns up to limit titles starting with prefix, most common first
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        top = self._memo.get(prefix)
+        if top is None or limit > self.memo_size:
+            top = self._top(prefix, limit)
+        return [self._titles[key] for key in top[:limit]]
+
+    def warm(self, max_length=2):
+        """
+        Memoizes top titles of all prefixes up to max_length characters
+        """
+        for length in range(1, max_length + 1):
+            for prefix in sorted({key[:length] for key in self._keys}):
+                if prefix not in self._memo:
+                    self._top(prefix, self.memo_size)
+
+
+class VacancyTitleIndex(object):
+    """
+    TitleIndex kept in sync with the vacancy table
+    """
+    def __init__(self):
+        # Guards the live index, held for short lookups and additions only
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._index = None
+        self._last_pk = 0
+        self._refreshed_at = 0.0
+        self._built_at = 0.0
+
+    def _load(self, last_pk, add):
+        while True:
+            rows = list(Vacancy.objects.filter(pk__gt=last_pk)
+                        .order_by('pk')
+                        .values_list('pk', 'title')[:LOAD_CHUNK_SIZE])
+            if not rows:
+                return last_pk
+            add([title for _, title in rows])
+            last_pk = rows[-1][0]
+
+    def _add(self, titles):
+        with self._lock:
+            for title in titles:
+                self._index.add(title)
+
+    def rebuild(self):
+        # The old index keeps serving requests meanwhile
+        index = TitleIndex(memo_size=getattr(
+            settings, 'VACANCY_AUTOCOMPLETE_MAX_LIMIT', 20))
+        last_pk = self._load(0, index.add_many)
+        index.warm()
+        with self._lock:
+            self._index = index
+            self._last_pk = last_pk
+            self._built_at = self._refreshed_at = time.monotonic()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._index is None or now - self._built_at >= getattr(
+                settings, 'VACANCY_AUTOCOMPLETE_REBUILD_INTERVAL', 3600):
+            self.rebuild()
+        elif now - self._refreshed_at >= getattr(
+                settings, 'VACANCY_AUTOCOMPLETE_REFRESH_INTERVAL', 5):
+            self._last_pk = self._load(self._last_pk, self._add)
+            self._refreshed_at = now
+
+    def _refresh_in_background(self):
+        try:
+            self._refresh()
+        except Exception:
+            logger.exception('Failed to refresh vacancy title index')
+        finally:
+            # Connections of the thread are not reused
+            connections.close_all()
+            self._refresh_lock.release()
+
+    def refresh(self):
+        if self._index is not None and \
+                time.monotonic() - self._refreshed_at < getattr(
+                    settings, 'VACANCY_AUTOCOMPLETE_REFRESH_INTERVAL', 5):
+            return
+        if getattr(settings, 'TASKS_ALWAYS_EAGER', False):
+            with self._refresh_lock:
+                self._refresh()
+            return
+        # Only one thread refreshes, the rest use the index as it is
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        threading.Thread(target=self._refresh_in_background,
+                         name='autocomplete', daemon=True).start()
+
+    def search(self, prefix, limit):
+        self.refresh()
+        with self._lock:
+            if self._index is None:
+                return []
+            return self._index.search(prefix, limit)
+
+
+title_index = VacancyTitleIndex()
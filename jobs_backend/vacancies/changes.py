@@ -0,0 +1,93 @@
+"""
+Vacancy change feed.
+
+Changed vacancies are read in (modified_on, id) order and deleted ones in
+(deleted_on, id) order, each from the position saved in the cursor, so a page
+costs an index range scan however long the history is. Rows modified within
+``VACANCY_CHANGES_LAG`` seconds are held back: their transactions may still be
+in flight while those with later timestamps are already visible, and a cursor
+moved past them would never return to them.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Vacancy, VacancyTombstone
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Cursor(object):
+
+    def __init__(self, changed=None, deleted=None):
+        # (timestamp, id) of the last returned row of each stream
+        self.changed = changed
+        self.deleted = deleted
+
+    def encode(self):
+        data = [[position[0].isoformat(), position[1]] if position else None
+                for position in (self.changed, self.deleted)]
+        return base64.urlsafe_b64encode(
+            json.dumps(data, separators=(',', ':')).encode()).decode()
+
+    @classmethod
+    def decode(cls, value):
+        try:
+            data = json.loads(base64.urlsafe_b64decode(value.encode()).decode())
+            positions = []
+            for position in data:
+                if position is None:
+                    positions.append(None)
+                    continue
+                timestamp, pk = position
+                timestamp = parse_datetime(timestamp)
+                if timestamp is None or not isinstance(pk, int):
+                    raise InvalidCursor(value)
+                positions.append((timestamp, pk))
+            return cls(*positions)
+        except (binascii.Error, UnicodeError, TypeError, ValueError):
+            raise InvalidCursor(value)
+
+
+def _after(queryset, field, position):
+    if position is None:
+        return queryset
+    timestamp, pk = position
+    return queryset.filter(Q(**{field + '__gt': timestamp}) |
+                           Q(**{field: timestamp, 'id__gt': pk}))
+
+
+def get_changes(cursor, limit):
+    """
+    Returns (changed vacancies, deleted vacancy ids, next cursor, has more)
+    """
+    until = timezone.now() - datetime.timedelta(
+        seconds=getattr(settings, 'VACANCY_CHANGES_LAG', 5))
+
+    changed = list(
+        _after(Vacancy.objects.all(), 'modified_on', cursor.changed)
+        .filter(modified_on__lte=until)
+        .order_by('modified_on', 'id')[:limit + 1])
+    deleted = list(
+        _after(VacancyTombstone.objects.all(), 'deleted_on', cursor.deleted)
+        .filter(deleted_on__lte=until)
+        .order_by('deleted_on', 'id')[:limit + 1])
+    more = len(changed) > limit or len(deleted) > limit
+    changed, deleted = changed[:limit], deleted[:limit]
+
+    next_cursor = Cursor(
+        (changed[-1].modified_on, changed[-1].id) if changed
+        else cursor.changed,
+        (deleted[-1].deleted_on, deleted[-1].id) if deleted
+        else cursor.deleted,
+    )
+    return changed, [tombstone.vacancy_id for tombstone in deleted], \
+        next_cursor, more
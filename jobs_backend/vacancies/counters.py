@@ -0,0 +1,142 @@
+"""
+Buffered vacancy view counters.
+
+Incrementing a row on every detail request turns a read-heavy endpoint into
+a write hotspot, so views are accumulated in a per-process buffer and written
+by a background thread once ``VACANCY_VIEWS_FLUSH_INTERVAL`` seconds passed
+or ``VACANCY_VIEWS_FLUSH_THRESHOLD`` views were buffered, whichever comes
+first, with one UPDATE statement per ``FLUSH_BATCH_SIZE`` vacancies. The
+buffer is flushed on interpreter exit as well, so a crashed worker loses at
+most that many views. With ``TASKS_ALWAYS_EAGER`` the request which makes a
+flush due runs it instead, e.g. in tests.
+
+The list of most viewed vacancies is recomputed on every flush and kept in
+cache, so it is never calculated on the request path.
+"""
+import atexit
+import collections
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, close_old_connections
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Vacancy
+
+logger = logging.getLogger(__name__)
+
+POPULAR_CACHE_KEY = 'vacancies:popular'
+# Each vacancy takes three UPDATE parameters
+FLUSH_BATCH_SIZE = 100
+
+
+def get_popular_ids():
+    """
+    Returns ids of the most viewed vacancies, most viewed first
+    """
+    ids = cache.get(POPULAR_CACHE_KEY)
+    if ids is None:
+        ids = refresh_popular_ids()
+    return ids
+
+
+def refresh_popular_ids():
+    size = getattr(settings, 'VACANCY_POPULAR_SIZE', 20)
+    ids = list(Vacancy.objects.order_by('-views_count', '-pk')
+               .values_list('pk', flat=True)[:size])
+    cache.set(POPULAR_CACHE_KEY, ids, None)
+    return ids
+
+
+class ViewCounterBuffer(object):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = collections.Counter()
+        self._pending_total = 0
+        self._flushed_at = time.monotonic()
+        self._due = threading.Event()
+        self._flusher = None
+
+    def increment(self, pk):
+        with self._lock:
+            self._pending[pk] += 1
+            self._pending_total += 1
+            full = self._pending_total >= getattr(
+                settings, 'VACANCY_VIEWS_FLUSH_THRESHOLD', 1000)
+            due = full or time.monotonic() - self._flushed_at >= getattr(
+                settings, 'VACANCY_VIEWS_FLUSH_INTERVAL', 10)
+        if getattr(settings, 'TASKS_ALWAYS_EAGER', False):
+            if due:
+                self.flush()
+            return
+        self._ensure_flusher()
+        if full:
+            self._due.set()
+
+    def _ensure_flusher(self):
+        # Threads do not survive fork(), so a preforked worker starts its own
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(
+                    target=self._flush_periodically, name='view-counters',
+                    daemon=True)
+                self._flusher.start()
+
+    def _flush_periodically(self):
+        while True:
+            self._due.wait(getattr(settings, 'VACANCY_VIEWS_FLUSH_INTERVAL',
+                                   10))
+            self._due.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Failed to flush vacancy view counters')
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = collections.Counter()
+            self._pending_total = 0
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+
+        items = sorted(pending.items())
+        for start in range(0, len(items), FLUSH_BATCH_SIZE):
+            batch = items[start:start + FLUSH_BATCH_SIZE]
+            increment = Case(
+                *[When(pk=pk, then=Value(count)) for pk, count in batch],
+                output_field=IntegerField()
+            )
+            try:
+                Vacancy.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                    views_count=F('views_count') + increment)
+            except DatabaseError:
+                logger.exception('Failed to flush vacancy view counters')
+                unsaved = collections.Counter(dict(items[start:]))
+                with self._lock:
+                    self._pending.update(unsaved)
+                    self._pending_total += sum(unsaved.values())
+                return
+
+        refresh_popular_ids()
+
+
+view_counter = ViewCounterBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        view_counter.flush()
+    except Exception:
+        logger.exception('Failed to flush vacancy view counters on exit')
@@ -0,0 +1,232 @@
+"""
+Fast vacancy loading.
+
+On PostgreSQL `load` streams rows with ``COPY FROM STDIN`` into a temporary
+staging table and merges them into the vacancy table with a single
+``INSERT ... SELECT ... ON CONFLICT`` per chunk, which is several times
+faster than multi-row INSERT statements. Other databases fall back to
+bulk_create.
+
+On PostgreSQL rows without a pk get one from the table sequence up front,
+so loaded instances end up with their pks set like after save(). Rows with a pk
+conflicting with an existing vacancy are skipped or update it, keeping its
+creation date, views and duplicate. Given created_on and modified_on values
+of inserted rows are kept, updated rows are modified at load time so the
+change feed reports them. Signatures and statistics are computed, but
+near-duplicates are not looked for. Signals are not sent, except post_save
+of updated rows by the fallback, which saves them one by one.
+"""
+import contextlib
+import itertools
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from jobs_backend.core import cache
+from .models import CACHE_NAMESPACE, Vacancy, VacancyStat
+
+SKIP = 'skip'
+UPDATE = 'update'
+CHUNK_SIZE = 50000
+STAGING_TABLE = 'vacancy_staging'
+EXISTING_BATCH_SIZE = 500
+# Fields set on conflicting rows by UPDATE
+UPDATE_FIELDS = tuple(
+    field.name for field in Vacancy._meta.concrete_fields
+    if not field.primary_key and
+    field.name not in ('created_on', 'views_count', 'duplicate_of'))
+
+# Special characters of the COPY text format
+_COPY_ESCAPES = str.maketrans({
+    '\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r',
+})
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return value.translate(_COPY_ESCAPES)
+    return str(value)
+
+
+def copy_line(values):
+    """
+    Returns a row in the COPY text format
+    """
+    return '\t'.join(_copy_value(value) for value in values) + '\n'
+
+
+class CopyStream(object):
+    """
+    File-like object reading COPY lines from an iterable of rows
+    """
+    def __init__(self, rows):
+        self._lines = (copy_line(row) for row in rows)
+        self._buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._lines)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    readline = read
+
+
+def _prepare(vacancy, now):
+    # What pre_save() of auto_now fields would do
+    if vacancy.created_on is None:
+        vacancy.created_on = now
+    if vacancy.modified_on is None:
+        vacancy.modified_on = now
+
+
+@contextlib.contextmanager
+def explicit_timestamps(model):
+    """
+    Lets bulk_create and save() keep the given created_on and modified_on
+    values. Not thread-safe, the fields are shared by all instances.
+    """
+    fields = [model._meta.get_field(name)
+              for name in ('created_on', 'modified_on')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _load_chunk_postgresql(connection, cursor, vacancies, on_conflict):
+    table = connection.ops.quote_name(Vacancy._meta.db_table)
+    # What save() would do, bulk_create() and save() do it on other databases
+    for vacancy in vacancies:
+        vacancy.update_signature()
+    new = [vacancy for vacancy in vacancies if vacancy.pk is None]
+    if new:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+            "FROM generate_series(1, %s)", [Vacancy._meta.db_table, len(new)])
+        for vacancy, (pk,) in zip(new, cursor.fetchall()):
+            vacancy.pk = pk
+
+    fields = Vacancy._meta.concrete_fields
+    columns = ', '.join(connection.ops.quote_name(field.column)
+                        for field in fields)
+    cursor.copy_expert(
+        'COPY %s (%s) FROM STDIN' % (STAGING_TABLE, columns),
+        CopyStream([field.get_db_prep_save(getattr(vacancy, field.attname),
+                                           connection)
+                    for field in fields] for vacancy in vacancies))
+
+    params = []
+    if on_conflict == UPDATE:
+        assignments = []
+        for field in fields:
+            column = connection.ops.quote_name(field.column)
+            if field.name == 'modified_on':
+                assignments.append('%s = %%s' % column)
+                params.append(field.get_db_prep_save(timezone.now(),
+                                                     connection))
+            elif field.name in UPDATE_FIELDS:
+                assignments.append('%s = EXCLUDED.%s' % (column, column))
+        conflict = 'DO UPDATE SET ' + ', '.join(assignments)
+    else:
+        conflict = 'DO NOTHING'
+    # xmax of inserted rows is 0, updated ones are locked by this transaction
+    cursor.execute(
+        'INSERT INTO %s (%s) SELECT %s FROM %s ON CONFLICT (id) %s '
+        'RETURNING created_on, xmax = 0' % (
+            table, columns, columns, STAGING_TABLE, conflict), params)
+    rows = cursor.fetchall()
+    cursor.execute('TRUNCATE %s' % STAGING_TABLE)
+    VacancyStat.objects.db_manager(connection.alias).record(
+        created_on for created_on, inserted in rows if inserted)
+    return len(rows)
+
+
+def _load_postgresql(connection, chunks, on_conflict):
+    table = connection.ops.quote_name(Vacancy._meta.db_table)
+    count = 0
+    explicit_pks = False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMPORARY TABLE IF NOT EXISTS %s '
+            '(LIKE %s INCLUDING DEFAULTS) '
+            'ON COMMIT DROP' % (STAGING_TABLE, table))
+        for chunk in chunks:
+            explicit_pks = explicit_pks or any(
+                vacancy.pk is not None for vacancy in chunk)
+            count += _load_chunk_postgresql(connection, cursor, chunk,
+                                            on_conflict)
+        if explicit_pks:
+            # Later inserts must not collide with the given pks
+            cursor.execute(
+                "SELECT setval(pg_get_serial_sequence(%%s, 'id'), "
+                "GREATEST((SELECT MAX(id) FROM %s), "
+                "nextval(pg_get_serial_sequence(%%s, 'id'))))" % table,
+                [Vacancy._meta.db_table] * 2)
+    return count
+
+
+def _load_fallback(using, chunks, on_conflict):
+    count = 0
+    for chunk in chunks:
+        pks = [vacancy.pk for vacancy in chunk if vacancy.pk is not None]
+        existing = set()
+        # SQLite limits the number of query parameters
+        for start in range(0, len(pks), EXISTING_BATCH_SIZE):
+            existing.update(Vacancy.objects.using(using).filter(
+                pk__in=pks[start:start + EXISTING_BATCH_SIZE]
+            ).values_list('pk', flat=True))
+        new = [vacancy for vacancy in chunk if vacancy.pk not in existing]
+        with explicit_timestamps(Vacancy):
+            if on_conflict == UPDATE:
+                for vacancy in chunk:
+                    if vacancy.pk in existing:
+                        vacancy.modified_on = timezone.now()
+                        vacancy.save(using=using, update_fields=UPDATE_FIELDS)
+                        count += 1
+            Vacancy.objects.using(using).bulk_create(new)
+        count += len(new)
+    return count
+
+
+def load(vacancies, on_conflict=SKIP, using='default'):
+    """
+    Inserts Vacancy instances in one transaction, returns the number of
+    inserted and updated rows. Vacancies are validated already, on_conflict
+    is SKIP or UPDATE.
+    """
+    if on_conflict not in (SKIP, UPDATE):
+        raise ValueError('Unknown on_conflict: %r' % on_conflict)
+    now = timezone.now()
+    vacancies = iter(vacancies)
+
+    def chunks():
+        while True:
+            chunk = list(itertools.islice(vacancies, CHUNK_SIZE))
+            if not chunk:
+                return
+            for vacancy in chunk:
+                _prepare(vacancy, now)
+            yield chunk
+
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        if connection.vendor == 'postgresql':
+            count = _load_postgresql(connection, chunks(), on_conflict)
+        else:
+            count = _load_fallback(using, chunks(), on_conflict)
+        # Signals are not sent
+        transaction.on_commit(lambda: cache.invalidate(CACHE_NAMESPACE),
+                              using=using)
+    return count
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from jobs_backend.vacancies import stats
+
+
+class Command(BaseCommand):
+    help = ('Recomputes vacancy statistics from vacancies. Run it once '
+            'after migrating, rollups are kept up to date afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since', help='YYYY-MM-DD, recompute the week of that day '
+                            'and later ones only')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_date(options['since'])
+            except ValueError:
+                pass
+            if since is None:
+                raise CommandError('--since must be a YYYY-MM-DD date')
+        started = time.perf_counter()
+        count = stats.backfill(since)
+        self.stdout.write(self.style.SUCCESS(
+            'Wrote %d rollups in %.1f s' % (
+                count, time.perf_counter() - started)))
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs_backend.vacancies import similarity
+
+
+class Command(BaseCommand):
+    help = ('Builds TF-IDF index of vacancies used by the similar vacancies '
+            'endpoint. Run it periodically, workers pick up new versions.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = similarity.build()
+        self.stdout.write(self.style.SUCCESS(
+            'Indexed %d vacancies in %.1f s' % (
+                count, time.perf_counter() - started)))
@@ -0,0 +1,143 @@
+import datetime
+import multiprocessing
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+
+from jobs_backend.users.models import User
+from jobs_backend.vacancies import loader
+from jobs_backend.vacancies.models import Vacancy
+from jobs_backend.vacancies.synthetic import TextGenerator
+
+_generators = {}
+
+
+def _get_generator(seed):
+    # Built once per worker process
+    if seed not in _generators:
+        _generators[seed] = TextGenerator(seed)
+    return _generators[seed]
+
+
+def generate_users(seed, first, count, password):
+    rnd = random.Random('users:%d:%d' % (seed, first))
+    words = _get_generator(seed).words
+    users = [User(email='user%d-%d@example.com' % (seed, index),
+                  name=rnd.choice(words).capitalize(), password=password,
+                  is_active=True)
+             for index in range(first, first + count)]
+    User.objects.bulk_create(users)
+    # Ids are not returned by bulk inserts on every backend
+    ids = User.objects.filter(email__in=[user.email for user in users]) \
+        .values_list('pk', flat=True)
+    Token.objects.bulk_create([
+        Token(key='%040x' % rnd.getrandbits(160), user_id=pk) for pk in ids])
+    return count
+
+
+def generate_vacancies(seed, first, count, start, end):
+    rnd = random.Random('vacancies:%d:%d' % (seed, first))
+    return loader.load(
+        Vacancy(title=title, description=description, created_on=created_on,
+                modified_on=created_on, views_count=views_count)
+        for title, description, created_on, views_count in
+        _get_generator(seed).vacancies(rnd, count, start, end))
+
+
+def _run(task):
+    func, args = task
+    return func(*args)
+
+
+class Command(BaseCommand):
+    help = ('Fills the database with synthetic users with API tokens and '
+            'vacancies for benchmarks. The same seed gives the same data, '
+            'use another one to add more users to a database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=0)
+        parser.add_argument('--vacancies', type=int, default=0)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--days', type=int, default=365,
+                            help='Vacancies are created over that many days '
+                                 'until today')
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help='Rows inserted by a single transaction')
+        parser.add_argument(
+            '--processes', type=int,
+            help='Parallel workers, the number of CPUs by default on '
+                 'PostgreSQL, other databases take one writer at a time')
+        parser.add_argument('--password', default='password',
+                            help='Password of all users')
+
+    def get_tasks(self, options):
+        chunk_size = options['chunk_size']
+        seed = options['seed']
+        # Same dates for the same seed on the same day
+        end = timezone.now().replace(hour=0, minute=0, second=0,
+                                     microsecond=0)
+        start = end - datetime.timedelta(days=options['days'])
+        span = end - start
+
+        tasks = []
+        password = make_password(options['password'])
+        for first in range(0, options['users'], chunk_size):
+            tasks.append((generate_users, (
+                seed, first, min(chunk_size, options['users'] - first),
+                password)))
+        total = options['vacancies']
+        for first in range(0, total, chunk_size):
+            count = min(chunk_size, total - first)
+            # Each chunk takes its own time slice, so pks follow dates
+            tasks.append((generate_vacancies, (
+                seed, first, count, start + span * first / total,
+                start + span * (first + count) / total)))
+        return tasks
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+        processes = options['processes']
+        if processes is None:
+            processes = multiprocessing.cpu_count() \
+                if connection.vendor == 'postgresql' else 1
+
+        tasks = self.get_tasks(options)
+        total = options['users'] + options['vacancies']
+        done = 0
+        started = time.perf_counter()
+
+        if processes > 1:
+            # Workers must open connections of their own
+            connections.close_all()
+            pool = multiprocessing.get_context('fork').Pool(processes)
+            results = pool.imap_unordered(_run, tasks)
+        else:
+            pool = None
+            results = map(_run, tasks)
+        try:
+            for count in results:
+                done += count
+                if options['verbosity'] > 1:
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write('%d of %d rows, %.0f rows/s' % (
+                        done, total, done / elapsed))
+        except BaseException:
+            if pool is not None:
+                pool.terminate()
+            raise
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            'Generated %d users and %d vacancies in %.1f s' % (
+                options['users'], options['vacancies'], elapsed)))
@@ -0,0 +1,114 @@
+import csv
+import json
+import sys
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from jobs_backend.vacancies import loader
+from jobs_backend.vacancies.models import SIGNATURE_BAND_FIELDS, Vacancy
+
+FIELDS = ('id', 'title', 'description', 'created_on')
+# Not loaded, but validated by clean_fields()
+EXCLUDED_FIELDS = SIGNATURE_BAND_FIELDS + ('views_count', 'duplicate_of')
+
+
+def read_json_lines(file):
+    """
+    Yields (line number, row) of non-empty lines
+    """
+    for number, line in enumerate(file, 1):
+        if line.strip():
+            yield number, line
+
+
+def parse_json_line(line):
+    try:
+        row = json.loads(line)
+    except ValueError as e:
+        raise ValidationError('Invalid JSON: %s' % e)
+    if not isinstance(row, dict):
+        raise ValidationError('Expected an object')
+    return row
+
+
+def read_csv(file):
+    reader = csv.DictReader(file)
+    for row in reader:
+        # Empty cells are missing values
+        yield reader.line_num, {name: value for name, value in row.items()
+                                if value != ''}
+
+
+def make_vacancy(row):
+    """
+    Returns a validated vacancy of the row, raises ValidationError
+    """
+    unknown = set(row) - set(FIELDS)
+    if unknown:
+        raise ValidationError('Unknown fields: %s' % ', '.join(sorted(
+            str(name) for name in unknown)))
+    vacancy = Vacancy(**row)
+    vacancy.clean_fields(exclude=EXCLUDED_FIELDS)
+    if vacancy.created_on is not None and \
+            timezone.is_naive(vacancy.created_on):
+        vacancy.created_on = timezone.make_aware(vacancy.created_on)
+    return vacancy
+
+
+class Command(BaseCommand):
+    help = ('Loads vacancies from a file of JSON lines or a CSV file with '
+            'title, description and optional id and created_on fields. '
+            'Uses COPY on PostgreSQL. Rows are loaded in one transaction.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Path of the file, - for stdin')
+        parser.add_argument('--format', choices=('jsonl', 'csv'),
+                            default='jsonl')
+        parser.add_argument(
+            '--on-conflict', choices=(loader.SKIP, loader.UPDATE),
+            default=loader.SKIP,
+            help='What to do with rows whose id exists already')
+        parser.add_argument('--skip-invalid', action='store_true',
+                            help='Report invalid rows and load the others '
+                                 'instead of failing')
+
+    def read(self, file, options):
+        if options['format'] == 'jsonl':
+            rows, parse = read_json_lines(file), parse_json_line
+        else:
+            rows, parse = read_csv(file), dict
+        for number, row in rows:
+            try:
+                yield make_vacancy(parse(row))
+            except ValidationError as e:
+                if hasattr(e, 'error_dict'):
+                    messages = ['%s: %s' % (name, ' '.join(field_messages))
+                                for name, field_messages
+                                in sorted(e.message_dict.items())]
+                else:
+                    messages = e.messages
+                message = 'Line %d: %s' % (number, '; '.join(messages))
+                if not options['skip_invalid']:
+                    raise CommandError(message)
+                self.invalid += 1
+                self.stderr.write(message)
+
+    def handle(self, *args, **options):
+        self.invalid = 0
+        started = time.perf_counter()
+        if options['file'] == '-':
+            count = loader.load(self.read(sys.stdin, options),
+                                options['on_conflict'])
+        else:
+            with open(options['file'], newline='',
+                      encoding='utf-8') as file:
+                count = loader.load(self.read(file, options),
+                                    options['on_conflict'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            'Loaded %d vacancies in %.1f s, %.0f rows/s, %d invalid rows '
+            'skipped' % (count, elapsed, count / elapsed if elapsed else 0,
+                         self.invalid)))
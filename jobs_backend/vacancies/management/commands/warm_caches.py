@@ -0,0 +1,112 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from jobs_backend.core.pagination import estimate_count
+from jobs_backend.core.startup import internal_get
+from jobs_backend.vacancies.counters import get_popular_ids
+from jobs_backend.vacancies.models import Vacancy
+
+API_PREFIX = '/api/vacancies/'
+
+
+class RateLimiter(object):
+    """
+    Spaces out calls of wait() to at most rate per second
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_at = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next_at)
+            self._next_at = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+class Command(BaseCommand):
+    help = ('Fills vacancy caches by requesting the most used pages: first '
+            'list pages of each preset and the most viewed vacancies. Run it '
+            'after a deploy or cache flush.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int,
+            default=getattr(settings, 'VACANCY_WARM_PAGES', 5),
+            help='List pages per preset')
+        parser.add_argument(
+            '--details', type=int,
+            default=getattr(settings, 'VACANCY_POPULAR_SIZE', 20),
+            help='Most viewed vacancies to request')
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='Requests handled at once')
+        parser.add_argument(
+            '--rate', type=float, default=20,
+            help='Max requests per second, 0 for no limit')
+        parser.add_argument(
+            '--host', help='Host the clients use, the first of ALLOWED_HOSTS '
+                           'by default')
+        parser.add_argument(
+            '--insecure', action='store_true',
+            help='Cache http:// instead of https:// responses')
+
+    def get_paths(self, pages, details):
+        # Page sizes are the same for all presets
+        count = estimate_count(Vacancy.objects.all())
+        if count is None:
+            count = Vacancy.objects.count()
+        pages = min(pages, max(1, math.ceil(
+            count / settings.REST_FRAMEWORK['PAGE_SIZE'])))
+
+        paths = []
+        for preset in getattr(settings, 'VACANCY_WARM_LIST_PRESETS', ['']):
+            for page in range(1, pages + 1):
+                # Links to the first page have no page parameter
+                query = [preset] if preset else []
+                if page > 1:
+                    query.append('page=%d' % page)
+                paths.append(API_PREFIX + ('?' + '&'.join(query)
+                                           if query else ''))
+        paths.append(API_PREFIX + 'popular/')
+        paths.extend('%s%d/' % (API_PREFIX, pk)
+                     for pk in get_popular_ids()[:details])
+        return paths
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        paths = self.get_paths(options['pages'], options['details'])
+        limiter = RateLimiter(options['rate'])
+
+        def warm(path):
+            limiter.wait()
+            try:
+                return internal_get(path, host=options['host'],
+                                    secure=not options['insecure'])
+            finally:
+                # Worker threads would keep their connections open otherwise
+                if not connection.in_atomic_block:
+                    connection.close()
+
+        failed = 0
+        with ThreadPoolExecutor(max(1, options['concurrency'])) as executor:
+            for path, response in zip(paths, executor.map(warm, paths)):
+                if response.status_code != 200:
+                    failed += 1
+                    self.stderr.write('%s: %d' % (path, response.status_code))
+                elif options['verbosity'] > 1:
+                    self.stdout.write(path)
+
+        self.stdout.write(self.style.SUCCESS(
+            'Warmed %d of %d pages in %.1f s' % (
+                len(paths) - failed, len(paths),
+                time.perf_counter() - started)))
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.5 on 2026-10-19 13:43
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from jobs_backend.vacancies.search import signature_bands, tokenize
+
+
+def compute_signatures(apps, schema_editor):
+    Vacancy = apps.get_model('vacancies', 'Vacancy')
+    for vacancy in Vacancy.objects.only('title', 'description').iterator():
+        bands = signature_bands(
+            tokenize('%s %s' % (vacancy.title, vacancy.description)))
+        if bands:
+            Vacancy.objects.filter(pk=vacancy.pk).update(**{
+                'signature_band%d' % index: band
+                for index, band in enumerate(bands)
+            })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vacancies', '0003_vacancy_views_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vacancy',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='vacancies.Vacancy'),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='signature_band0',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='signature_band1',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='signature_band2',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='signature_band3',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='signature_band4',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='signature_band5',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(compute_signatures, migrations.RunPython.noop),
+    ]
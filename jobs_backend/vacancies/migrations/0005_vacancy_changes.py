@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.5 on 2026-10-19 13:48
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vacancies', '0004_vacancy_signature'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VacancyTombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vacancy_id', models.PositiveIntegerField()),
+                ('deleted_on', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='vacancy',
+            index_together=set([('modified_on', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='vacancytombstone',
+            index_together=set([('deleted_on', 'id')]),
+        ),
+    ]
@@ -1,5 +1,81 @@
-from django.db import models
+import collections
+import datetime
+
+from django.conf import settings
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import Count, F, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.urls import reverse
+from django.utils import timezone
+
+from jobs_backend.core import cache
+from .search import SIGNATURE_BANDS, signature_bands, similarity, tokenize
+
+# Cached vacancy lists, see core.cache
+CACHE_NAMESPACE = 'vacancies'
+
+SIGNATURE_BAND_FIELDS = tuple('signature_band%d' % band
+                              for band in range(SIGNATURE_BANDS))
+
+
+class VacancyQuerySet(models.QuerySet):
+
+    def near_duplicates(self, tokens, min_similarity=None):
+        """
+        Returns vacancies whose search tokens are at least min_similarity
+        similar to tokens, most similar first.
+
+        Candidates are looked up by signature bands, so the cost depends on
+        the number of vacancies sharing a band rather than on the table size.
+        """
+        if min_similarity is None:
+            min_similarity = getattr(settings,
+                                     'VACANCY_DUPLICATE_MIN_SIMILARITY', 0.8)
+        bands = signature_bands(tokens)
+        if bands is None:
+            return []
+        condition = Q()
+        for field, band in zip(SIGNATURE_BAND_FIELDS, bands):
+            condition |= Q(**{field: band})
+        candidates = []
+        for vacancy in self.filter(condition).order_by('pk'):
+            score = similarity(tokens, vacancy.get_search_tokens())
+            if score >= min_similarity:
+                candidates.append((score, vacancy))
+        candidates.sort(key=lambda candidate: -candidate[0])
+        return [vacancy for _, vacancy in candidates]
+
+    def bulk_create(self, objs, batch_size=None):
+        """
+        Computes signatures save() would, records statistics and invalidates
+        cached vacancy lists. Vacancies are not compared with each other for
+        near-duplicates.
+        """
+        objs = list(objs)
+        # save() is bypassed
+        for vacancy in objs:
+            vacancy.update_signature()
+        with transaction.atomic(using=self.db):
+            objs = super(VacancyQuerySet, self).bulk_create(objs, batch_size)
+            VacancyStat.objects.db_manager(self.db).record(
+                vacancy.created_on for vacancy in objs)
+            # post_save is not sent
+            transaction.on_commit(lambda: cache.invalidate(CACHE_NAMESPACE),
+                                  using=self.db)
+        return objs
+
+    def create_many(self, vacancies):
+        """
+        Inserts vacancies in one transaction, setting their pks
+        """
+        with transaction.atomic(using=self.db):
+            if connections[self.db].features.can_return_ids_from_bulk_insert:
+                return self.bulk_create(vacancies)
+            # Other backends do not report ids of bulk inserted rows
+            for vacancy in vacancies:
+                vacancy.save(using=self.db)
+            return vacancies
 
 
 class Vacancy(models.Model):
@@ -7,9 +83,208 @@ class Vacancy(models.Model):
     description = models.TextField(max_length=1000)
     created_on = models.DateTimeField(auto_now_add=True)
     modified_on = models.DateTimeField(auto_now=True)
+    views_count = models.PositiveIntegerField(default=0, db_index=True,
+                                              editable=False)
+    # MinHash bands of search tokens, see search.signature_bands
+    signature_band0 = models.BigIntegerField(null=True, db_index=True,
+                                             editable=False)
+    signature_band1 = models.BigIntegerField(null=True, db_index=True,
+                                             editable=False)
+    signature_band2 = models.BigIntegerField(null=True, db_index=True,
+                                             editable=False)
+    signature_band3 = models.BigIntegerField(null=True, db_index=True,
+                                             editable=False)
+    signature_band4 = models.BigIntegerField(null=True, db_index=True,
+                                             editable=False)
+    signature_band5 = models.BigIntegerField(null=True, db_index=True,
+                                             editable=False)
+    duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL,
+                                     null=True, blank=True, editable=False,
+                                     related_name='duplicates')
+
+    objects = VacancyQuerySet.as_manager()
+
+    class Meta:
+        # Keyset order of the change feed
+        index_together = ('modified_on', 'id')
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.update_signature()
+        super(Vacancy, self).save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('api:vacancies:vacancy-detail', kwargs={'pk': self.pk})
+
+    def get_search_tokens(self):
+        return tokenize('%s %s' % (self.title, self.description))
+
+    def update_signature(self):
+        """
+        Recomputes signature bands, done on save() and bulk_create()
+        """
+        bands = signature_bands(self.get_search_tokens())
+        for index, field in enumerate(SIGNATURE_BAND_FIELDS):
+            setattr(self, field, bands[index] if bands else None)
+
+
+class SavedSearchManager(models.Manager):
+
+    def match(self, tokens):
+        """
+        Returns saved searches whose keywords are all present in tokens.
+
+        Uses the keyword index, so the cost depends on the number of
+        subscriptions sharing a keyword with tokens, not on their total.
+        """
+        if not tokens:
+            return self.none()
+        hits = (
+            SavedSearchKeyword.objects
+            .filter(keyword__in=tokens)
+            .values('search', 'search__keywords_count')
+            .annotate(hits=Count('id'))
+            .filter(hits=F('search__keywords_count'))
+        )
+        return self.filter(pk__in=[row['search'] for row in hits])
+
+
+class SavedSearch(models.Model):
+    """
+    Keywords the user wants to be notified about when a vacancy is posted
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE,
+                             related_name='saved_searches')
+    query = models.CharField(max_length=255)
+    keywords_count = models.PositiveSmallIntegerField(default=0,
+                                                      editable=False)
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    objects = SavedSearchManager()
+
+    def __str__(self):
+        return self.query
+
+    def get_absolute_url(self):
+        return reverse('api:vacancies:savedsearch-detail',
+                       kwargs={'pk': self.pk})
+
+    def save(self, *args, **kwargs):
+        keywords = tokenize(self.query)
+        self.keywords_count = len(keywords)
+        with transaction.atomic():
+            super(SavedSearch, self).save(*args, **kwargs)
+            self.keywords.all().delete()
+            SavedSearchKeyword.objects.bulk_create(
+                SavedSearchKeyword(search=self, keyword=keyword)
+                for keyword in keywords
+            )
+
+
+class SavedSearchKeyword(models.Model):
+    """
+    Inverted index entry: keyword -> saved search
+    """
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE,
+                               related_name='keywords')
+    keyword = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = ('keyword', 'search')
+
+
+class VacancyTombstone(models.Model):
+    """
+    Deleted vacancy, reported by the change feed
+    """
+    vacancy_id = models.PositiveIntegerField()
+    deleted_on = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        index_together = ('deleted_on', 'id')
+
+
+class VacancyStatManager(models.Manager):
+
+    def record(self, timestamps, delta=1):
+        """
+        Adds delta to the day and week rollups of each creation timestamp
+        """
+        increments = collections.Counter()
+        for timestamp in timestamps:
+            day = timezone.localtime(timestamp).date()
+            for period in (VacancyStat.DAY, VacancyStat.WEEK):
+                increments[period, VacancyStat.get_start(period, day)] += delta
+        # Rows are locked in the same order by all transactions
+        for (period, start), amount in sorted(increments.items()):
+            if amount:
+                self._add(period, start, amount)
+
+    def _add(self, period, start, amount):
+        rollup = self.filter(period=period, start=start)
+        if rollup.update(count=F('count') + amount):
+            return
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(period=period, start=start, count=amount)
+        except IntegrityError:
+            # Created by a concurrent transaction
+            rollup.update(count=F('count') + amount)
+
+
+class VacancyStat(models.Model):
+    """
+    Number of vacancies created in a day or a week starting on Monday, in
+    the current time zone. Kept up to date as vacancies are created and
+    deleted, see the backfill_vacancy_stats command to recompute them.
+    """
+    DAY = 'day'
+    WEEK = 'week'
+    PERIOD_CHOICES = ((DAY, 'Day'), (WEEK, 'Week'))
+
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    start = models.DateField()
+    count = models.IntegerField(default=0)
+
+    objects = VacancyStatManager()
+
+    class Meta:
+        unique_together = ('period', 'start')
+
+    def __str__(self):
+        return '%s %s: %d' % (self.period, self.start, self.count)
+
+    @classmethod
+    def get_start(cls, period, day):
+        """
+        Returns the first day of the period containing day
+        """
+        if period == cls.WEEK:
+            return day - datetime.timedelta(days=day.weekday())
+        return day
+
+
+@receiver(post_delete, sender=Vacancy)
+def _create_tombstone(sender, instance, **kwargs):
+    VacancyTombstone.objects.create(vacancy_id=instance.pk)
+
+
+@receiver(post_save, sender=Vacancy)
+def _record_created(sender, instance, created, **kwargs):
+    if created:
+        VacancyStat.objects.record([instance.created_on])
+
+
+@receiver(post_delete, sender=Vacancy)
+def _record_deleted(sender, instance, **kwargs):
+    VacancyStat.objects.record([instance.created_on], -1)
+
+
+@receiver(post_save, sender=Vacancy)
+@receiver(post_delete, sender=Vacancy)
+def _invalidate_cache(sender, **kwargs):
+    # Invalidated before commit, a list could be recomputed without the change
+    transaction.on_commit(lambda: cache.invalidate(CACHE_NAMESPACE))
@@ -0,0 +1,81 @@
+import functools
+import hashlib
+import random
+import re
+
+TOKEN_RE = re.compile(r'\w[\w+#]*', re.UNICODE)
+
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 64
+
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'the', 'to', 'we', 'with', 'you', 'your',
+))
+
+
+def tokenize(text):
+    """
+    Returns the set of normalized search tokens found in text
+    """
+    tokens = set()
+    for token in TOKEN_RE.findall(text.lower()):
+        if MIN_TOKEN_LENGTH <= len(token) <= MAX_TOKEN_LENGTH \
+                and token not in STOP_WORDS:
+            tokens.add(token)
+    return tokens
+
+
+# MinHash signature: SIGNATURE_BANDS bands of BAND_ROWS min-hashes each
+SIGNATURE_BANDS = 6
+BAND_ROWS = 4
+
+_PRIME = (1 << 61) - 1
+_random = random.Random(0)
+_PERMUTATIONS = [
+    (_random.randrange(1, _PRIME), _random.randrange(0, _PRIME))
+    for _ in range(SIGNATURE_BANDS * BAND_ROWS)
+]
+
+
+def _token_hash(token):
+    # Built-in hash() is salted per process, signatures must be stable
+    return int.from_bytes(
+        hashlib.md5(token.encode('utf-8')).digest()[:8], 'big')
+
+
+# Common tokens are hashed once, at about 1 KB each
+@functools.lru_cache(maxsize=4096)
+def _permuted_hashes(token):
+    value = _token_hash(token)
+    return tuple((a * value + b) % _PRIME for a, b in _PERMUTATIONS)
+
+
+def signature_bands(tokens):
+    """
+    Returns locality-sensitive band hashes of tokens, or None for no tokens.
+
+    Two token sets with Jaccard similarity J share at least one band with
+    probability 1 - (1 - J ** BAND_ROWS) ** SIGNATURE_BANDS: about 96% for
+    J = 0.8 and 1% for J = 0.2.
+    """
+    if not tokens:
+        return None
+    # Minimum of each permutation over all tokens
+    minhashes = list(map(min, zip(*map(_permuted_hashes, tokens))))
+    bands = []
+    for band in range(SIGNATURE_BANDS):
+        rows = minhashes[band * BAND_ROWS:(band + 1) * BAND_ROWS]
+        digest = hashlib.md5(repr(rows).encode('ascii')).digest()
+        # Fits signed BIGINT
+        bands.append(int.from_bytes(digest[:8], 'big') >> 1)
+    return bands
+
+
+def similarity(a, b):
+    """
+    Jaccard similarity of two token sets
+    """
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
@@ -1,6 +1,13 @@
+from django.conf import settings
+
 from rest_framework import serializers
 
-from .models import Vacancy
+from .changes import Cursor, InvalidCursor
+from .models import SavedSearch, Vacancy, VacancyStat
+from .search import tokenize
+
+DUPLICATE_FLAG = 'flag'
+DUPLICATE_REJECT = 'reject'
 
 
 class VacancySerializer(serializers.ModelSerializer):
@@ -10,8 +17,92 @@ class VacancySerializer(serializers.ModelSerializer):
     class Meta:
         model = Vacancy
         fields = (
-            'id', 'url', 'title', 'description', 'created_on', 'modified_on'
+            'id', 'url', 'title', 'description', 'created_on', 'modified_on',
+            'views_count', 'duplicate_of'
         )
         extra_kwargs = {
             'url': {'view_name': 'api:vacancies:vacancy-detail', 'read_only': True}
         }
+
+    def validate(self, attrs):
+        """
+        Flags or rejects near-duplicates of existing vacancies. Items of a
+        batch create are each compared with the saved vacancies only, not
+        with each other.
+        """
+        action = getattr(settings, 'VACANCY_DUPLICATE_ACTION', DUPLICATE_FLAG)
+        if not action:
+            return attrs
+
+        tokens = Vacancy(**attrs).get_search_tokens()
+        queryset = Vacancy.objects.all()
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        duplicates = queryset.near_duplicates(tokens)
+        if not duplicates:
+            return attrs
+
+        if action == DUPLICATE_REJECT:
+            raise serializers.ValidationError(
+                'Vacancy duplicates existing vacancy %s' % duplicates[0].pk)
+        attrs['duplicate_of'] = duplicates[0]
+        return attrs
+
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+    """
+    Saved search of the current user
+    """
+    class Meta:
+        model = SavedSearch
+        fields = ('id', 'url', 'query', 'created_on')
+        extra_kwargs = {
+            'url': {'view_name': 'api:vacancies:savedsearch-detail', 'read_only': True}
+        }
+
+    def validate_query(self, value):
+        if not tokenize(value):
+            raise serializers.ValidationError(
+                'Query should contain at least one keyword')
+        return value
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    """
+    Title autocomplete query parameters
+    """
+    prefix = serializers.CharField(max_length=128)
+    limit = serializers.IntegerField(min_value=1, default=10)
+
+    def validate_limit(self, value):
+        return min(value, getattr(settings, 'VACANCY_AUTOCOMPLETE_MAX_LIMIT', 20))
+
+
+class ChangesSerializer(serializers.Serializer):
+    """
+    Change feed query parameters
+    """
+    since = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, default=100)
+
+    def validate_since(self, value):
+        try:
+            return Cursor.decode(value)
+        except InvalidCursor:
+            raise serializers.ValidationError('Invalid cursor')
+
+    def validate_limit(self, value):
+        return min(value, getattr(settings, 'VACANCY_CHANGES_MAX_LIMIT', 1000))
+
+
+class StatsSerializer(serializers.Serializer):
+    """
+    Vacancy statistics query parameters
+    """
+    period = serializers.ChoiceField(VacancyStat.PERIOD_CHOICES,
+                                     default=VacancyStat.DAY)
+    until = serializers.DateField(required=False)
+    limit = serializers.IntegerField(min_value=1, default=30)
+
+    def validate_limit(self, value):
+        return min(value, getattr(settings, 'VACANCY_STATS_MAX_LIMIT', 366))
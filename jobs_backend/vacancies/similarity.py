@@ -0,0 +1,233 @@
+"""
+Similar vacancies by cosine similarity of TF-IDF vectors.
+
+`build` (run by the build_similarity_index command) stores unit-length TF-IDF
+vectors of all vacancies as a term-major sparse matrix, i.e. a posting list
+per term, in ``VACANCY_SIMILARITY_INDEX_DIR``. Workers map the arrays into
+memory, so they share a single copy through the page cache.
+
+Scoring a vacancy gathers the postings of its terms only and sums them per
+row with one NumPy call. Vacancies created after the build are folded in by
+pk with the stored IDF weights and kept in the worker until the next build.
+"""
+import json
+import math
+import os
+import shutil
+import threading
+import time
+from array import array
+
+import numpy as np
+from django.conf import settings
+
+from .models import Vacancy
+
+CURRENT = 'CURRENT'
+LOAD_CHUNK_SIZE = 10000
+
+
+def get_index_dir():
+    return getattr(settings, 'VACANCY_SIMILARITY_INDEX_DIR')
+
+
+def _read_chunks(last_pk=0):
+    while True:
+        rows = list(Vacancy.objects.filter(pk__gt=last_pk).order_by('pk')
+                    .only('pk', 'title', 'description')[:LOAD_CHUNK_SIZE])
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1].pk
+
+
+def build(index_dir=None):
+    """
+    Builds index of all vacancies, returns the number of indexed vacancies
+    """
+    index_dir = index_dir or get_index_dir()
+    terms = {}
+    ids, rows, columns = array('q'), array('i'), array('i')
+    for chunk in _read_chunks():
+        for vacancy in chunk:
+            row = len(ids)
+            ids.append(vacancy.pk)
+            for token in vacancy.get_search_tokens():
+                rows.append(row)
+                columns.append(terms.setdefault(token, len(terms)))
+
+    ids = np.frombuffer(ids, dtype=np.int64)
+    rows = np.frombuffer(rows, dtype=np.int32)
+    columns = np.frombuffer(columns, dtype=np.int32)
+    frequencies = np.bincount(columns, minlength=len(terms))
+    idf = (np.log((1.0 + len(ids)) / (1.0 + frequencies)) + 1.0) \
+        .astype(np.float32)
+
+    weights = idf[columns]
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights,
+                                minlength=len(ids)))
+    weights = (weights / norms[rows]).astype(np.float32)
+
+    order = np.argsort(columns, kind='mergesort')
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(frequencies, out=indptr[1:])
+
+    version = '%d' % (time.time() * 1000000)
+    path = os.path.join(index_dir, version)
+    os.makedirs(path)
+    np.save(os.path.join(path, 'ids.npy'), ids)
+    np.save(os.path.join(path, 'idf.npy'), idf)
+    np.save(os.path.join(path, 'indptr.npy'), indptr)
+    np.save(os.path.join(path, 'rows.npy'), rows[order])
+    np.save(os.path.join(path, 'weights.npy'), weights[order])
+    with open(os.path.join(path, 'terms.json'), 'w') as terms_file:
+        json.dump(sorted(terms, key=terms.get), terms_file)
+
+    # Switch readers to the new version atomically
+    pointer = os.path.join(index_dir, CURRENT + '.tmp')
+    with open(pointer, 'w') as pointer_file:
+        pointer_file.write(version)
+    os.replace(pointer, os.path.join(index_dir, CURRENT))
+
+    # Workers may still read the previous version
+    versions = sorted(name for name in os.listdir(index_dir) if name.isdigit())
+    for name in versions[:-2]:
+        shutil.rmtree(os.path.join(index_dir, name), ignore_errors=True)
+    return len(ids)
+
+
+def _current_version(index_dir):
+    try:
+        with open(os.path.join(index_dir, CURRENT)) as pointer_file:
+            return pointer_file.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+class SimilarityIndex(object):
+
+    def __init__(self, path):
+        for name in ('ids', 'idf', 'indptr', 'rows', 'weights'):
+            setattr(self, name, np.load(os.path.join(path, name + '.npy'),
+                                        mmap_mode='r'))
+        with open(os.path.join(path, 'terms.json')) as terms_file:
+            self.terms = {term: column
+                          for column, term in enumerate(json.load(terms_file))}
+        self.last_pk = int(self.ids[-1]) if len(self.ids) else 0
+        # Vacancies created after the build
+        self._extra_ids = []
+        self._extra_vectors = []
+
+    def vector(self, tokens):
+        """
+        Returns unit-length vector of tokens as (columns, weights)
+        """
+        columns = np.array(sorted(self.terms[token] for token in tokens
+                                  if token in self.terms), dtype=np.int64)
+        weights = np.asarray(self.idf[columns], dtype=np.float64)
+        norm = math.sqrt(float(np.dot(weights, weights)))
+        if norm:
+            weights /= norm
+        return columns, weights
+
+    def add(self, vacancy):
+        self._extra_ids.append(vacancy.pk)
+        self._extra_vectors.append(self.vector(vacancy.get_search_tokens()))
+        self.last_pk = max(self.last_pk, vacancy.pk)
+
+    @staticmethod
+    def _dot(columns, weights, vector):
+        other_columns, other_weights = vector
+        if not len(other_columns):
+            return 0.0
+        # Both column arrays are sorted
+        positions = np.searchsorted(columns, other_columns)
+        positions[positions == len(columns)] = 0
+        shared = columns[positions] == other_columns
+        return float(np.dot(weights[positions[shared]], other_weights[shared]))
+
+    def similar(self, vacancy, count):
+        """
+        Returns up to count (pk, score) pairs of vacancies most similar to
+        vacancy, most similar first
+        """
+        columns, query = self.vector(vacancy.get_search_tokens())
+        if not len(columns):
+            return []
+
+        starts = self.indptr[columns]
+        lengths = self.indptr[columns + 1] - starts
+        total = int(lengths.sum())
+        # Positions of all postings of query terms, without a Python loop
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) \
+            + np.arange(total)
+        scores = np.bincount(
+            self.rows[offsets],
+            weights=self.weights[offsets] * np.repeat(query, lengths),
+            minlength=len(self.ids))
+        ids = self.ids
+
+        if self._extra_ids:
+            extra = np.array([self._dot(columns, query, vector)
+                              for vector in self._extra_vectors])
+            scores = np.concatenate([scores, extra])
+            ids = np.concatenate([ids, self._extra_ids])
+
+        scores[ids == vacancy.pk] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > count:
+            candidates = candidates[
+                np.argpartition(-scores[candidates], count)[:count]]
+        candidates = candidates[np.argsort(-scores[candidates],
+                                           kind='mergesort')]
+        return [(int(ids[position]), float(scores[position]))
+                for position in candidates]
+
+
+class VacancySimilarity(object):
+    """
+    Latest built index with new vacancies folded in, per worker process
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+        self._refreshed_at = 0.0
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._index is not None and \
+                    now - self._refreshed_at < getattr(
+                        settings, 'VACANCY_SIMILARITY_REFRESH_INTERVAL', 5):
+                return
+            index_dir = get_index_dir()
+            version = _current_version(index_dir)
+            if version is None:
+                self._index = self._version = None
+                return
+            if version != self._version:
+                self._index = SimilarityIndex(os.path.join(index_dir, version))
+                self._version = version
+            for chunk in _read_chunks(self._index.last_pk):
+                for vacancy in chunk:
+                    self._index.add(vacancy)
+            self._refreshed_at = now
+
+    def similar(self, vacancy, count):
+        """
+        Returns (pk, score) pairs or None if the index is not built
+        """
+        self.refresh()
+        index = self._index
+        if index is not None and vacancy.pk > index.last_pk:
+            # Just created in another worker
+            self.refresh(force=True)
+            index = self._index
+        if index is None:
+            return None
+        with self._lock:
+            return index.similar(vacancy, count)
+
+
+similarity = VacancySimilarity()
@@ -0,0 +1,75 @@
+"""
+Vacancy statistics.
+
+Numbers of vacancies created per day and week are read from VacancyStat
+rollups, which are updated along with vacancies, so a request reads as many
+rows as it returns periods whatever the size of the vacancy table.
+`backfill` recomputes rollups from vacancies, e.g. after they were inserted
+by raw SQL.
+"""
+import collections
+import datetime
+
+from django.db import connections, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Vacancy, VacancyStat
+
+STEPS = {
+    VacancyStat.DAY: datetime.timedelta(days=1),
+    VacancyStat.WEEK: datetime.timedelta(days=7),
+}
+
+
+def get_stats(period, until, limit):
+    """
+    Returns [(start, count)] of limit periods up to the one containing
+    until, oldest first, periods without vacancies included
+    """
+    step = STEPS[period]
+    last = VacancyStat.get_start(period, until)
+    starts = [last - step * index for index in reversed(range(limit))]
+    counts = dict(VacancyStat.objects.filter(
+        period=period, start__range=(starts[0], last)
+    ).values_list('start', 'count'))
+    return [(start, counts.get(start, 0)) for start in starts]
+
+
+def backfill(since=None, using='default'):
+    """
+    Recomputes rollups of periods starting from the week containing since,
+    or all of them. Returns the number of rollups written.
+    """
+    vacancies = Vacancy.objects.using(using)
+    stats = VacancyStat.objects.using(using)
+    if since is not None:
+        # Whole weeks are recomputed
+        since = VacancyStat.get_start(VacancyStat.WEEK, since)
+        vacancies = vacancies.filter(created_on__gte=timezone.make_aware(
+            datetime.datetime.combine(since, datetime.time())))
+        stats = stats.filter(start__gte=since)
+
+    with transaction.atomic(using=using):
+        connection = connections[using]
+        if connection.vendor == 'postgresql':
+            # Vacancies committed meanwhile would be counted twice or lost.
+            # Waits for transactions which updated rollups, then blocks
+            # updates until the new rollups are committed.
+            with connection.cursor() as cursor:
+                cursor.execute('LOCK TABLE %s IN EXCLUSIVE MODE' %
+                               connection.ops.quote_name(
+                                   VacancyStat._meta.db_table))
+        days = (vacancies.order_by()
+                .annotate(day=TruncDate('created_on'))
+                .values_list('day').annotate(count=Count('pk')))
+        counts = collections.Counter()
+        for day, count in days:
+            for period in (VacancyStat.DAY, VacancyStat.WEEK):
+                counts[period, VacancyStat.get_start(period, day)] += count
+        stats.delete()
+        VacancyStat.objects.using(using).bulk_create(
+            VacancyStat(period=period, start=start, count=count)
+            for (period, start), count in sorted(counts.items()))
+    return len(counts)
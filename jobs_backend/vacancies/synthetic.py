@@ -0,0 +1,73 @@
+"""
+Synthetic vacancies for benchmarks, see the generate_data command.
+
+Words of titles and descriptions follow a Zipf distribution over a vocabulary
+generated from the seed, as words of real texts do, so search, duplicate
+detection and autocomplete see realistic token frequencies. The same seed
+always gives the same vacancies.
+"""
+import datetime
+import itertools
+import random
+
+LEVELS = ('Junior', 'Middle', 'Senior', 'Lead', 'Principal', 'Head of')
+ROLES = ('developer', 'engineer', 'architect', 'analyst', 'tester',
+         'designer', 'manager', 'administrator', 'consultant')
+SKILLS = ('Python', 'Django', 'JavaScript', 'React', 'Go', 'Java', 'Kotlin',
+          'PostgreSQL', 'DevOps', 'Data', 'Machine learning', 'Frontend',
+          'Backend', 'iOS', 'Android', 'QA', 'C++', 'Rust', 'PHP', 'Ruby')
+TITLE_MAX_LENGTH = 128
+DESCRIPTION_MAX_LENGTH = 1000
+
+
+def _zipf_weights(count, exponent=1.0):
+    return list(itertools.accumulate(
+        1.0 / (rank + 1) ** exponent for rank in range(count)))
+
+
+class TextGenerator(object):
+
+    def __init__(self, seed=0, vocabulary_size=20000):
+        rnd = random.Random('vocabulary:%d' % seed)
+        letters = 'abcdefghijklmnopqrstuvwxyz'
+        words = set()
+        while len(words) < vocabulary_size:
+            words.add(''.join(rnd.choice(letters)
+                              for _ in range(rnd.randint(2, 10))))
+        self.words = sorted(words)
+        rnd.shuffle(self.words)
+        self.word_weights = _zipf_weights(len(self.words))
+        self.skill_weights = _zipf_weights(len(SKILLS), 1.2)
+
+    def title(self, rnd):
+        parts = [rnd.choices(SKILLS, cum_weights=self.skill_weights)[0],
+                 rnd.choice(ROLES)]
+        if rnd.random() < 0.6:
+            parts.insert(0, rnd.choice(LEVELS))
+        if rnd.random() < 0.3:
+            parts.append(rnd.choices(self.words,
+                                     cum_weights=self.word_weights)[0])
+        title = ' '.join(parts)
+        return (title[0].upper() + title[1:])[:TITLE_MAX_LENGTH]
+
+    def description(self, rnd):
+        words = rnd.choices(self.words, cum_weights=self.word_weights,
+                            k=int(rnd.lognormvariate(4.0, 0.5)) + 5)
+        sentences = []
+        while words:
+            length = rnd.randint(5, 15)
+            sentence, words = words[:length], words[length:]
+            sentences.append(' '.join(sentence).capitalize() + '.')
+        return ' '.join(sentences)[:DESCRIPTION_MAX_LENGTH]
+
+    def vacancies(self, rnd, count, start, end):
+        """
+        Yields count (title, description, created_on, views_count) tuples
+        created between start and end, oldest first
+        """
+        span = (end - start).total_seconds()
+        offsets = sorted(rnd.random() * span for _ in range(count))
+        for offset in offsets:
+            yield (self.title(rnd), self.description(rnd),
+                   start + datetime.timedelta(seconds=offset),
+                   int(rnd.paretovariate(1.2)) - 1)
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import render_to_string
+
+from .models import SavedSearch, Vacancy
+
+
+def notify_saved_searches(vacancy_id, protocol, domain):
+    """
+    Emails owners of saved searches matching the vacancy, one mail per user
+    """
+    try:
+        vacancy = Vacancy.objects.get(pk=vacancy_id)
+    except Vacancy.DoesNotExist:
+        return
+
+    searches = (SavedSearch.objects.match(vacancy.get_search_tokens())
+                .select_related('user').filter(user__is_active=True))
+    by_user = {}
+    for search in searches:
+        by_user.setdefault(search.user, []).append(search)
+    if not by_user:
+        return
+
+    messages = []
+    for user, user_searches in by_user.items():
+        context = {
+            'user': user,
+            'vacancy': vacancy,
+            'searches': user_searches,
+            'protocol': protocol,
+            'domain': domain,
+        }
+        message = EmailMultiAlternatives(
+            subject='New vacancy: %s' % vacancy.title,
+            body=render_to_string('email_saved_search_body.txt', context),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[user.email],
+        )
+        message.attach_alternative(
+            render_to_string('email_saved_search_body.html', context),
+            'text/html'
+        )
+        messages.append(message)
+
+    get_connection().send_messages(messages)
@@ -1,6 +1,7 @@
 import factory
 
-from ..models import Vacancy
+from jobs_backend.users.tests.factories import ActiveUserFactory
+from ..models import SavedSearch, Vacancy
 
 
 class VacancyFactory(factory.DjangoModelFactory):
@@ -9,3 +10,11 @@ class VacancyFactory(factory.DjangoModelFactory):
 
     title = factory.Sequence(lambda n: 'title%s' % (n+1))
     description = factory.Sequence(lambda n: 'description%s' % (n+1))
+
+
+class SavedSearchFactory(factory.DjangoModelFactory):
+    class Meta:
+        model = SavedSearch
+
+    user = factory.SubFactory(ActiveUserFactory)
+    query = 'python django'
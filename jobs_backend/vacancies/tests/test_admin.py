@@ -0,0 +1,26 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from jobs_backend.users.tests.factories import AdminFactory
+from . import factories
+
+
+class VacancyAdminTestCase(TestCase):
+
+    def setUp(self):
+        self.client.force_login(AdminFactory.create())
+
+    def test_ok_changelist(self):
+        vacancy = factories.VacancyFactory.create()
+        response = self.client.get(
+            reverse('admin:vacancies_vacancy_changelist'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, vacancy.title)
+
+    def test_ok_change(self):
+        vacancy = factories.VacancyFactory.create()
+        response = self.client.get(
+            reverse('admin:vacancies_vacancy_change', args=(vacancy.pk,)))
+
+        self.assertEqual(response.status_code, 200)
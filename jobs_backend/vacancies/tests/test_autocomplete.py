@@ -0,0 +1,100 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .. import autocomplete
+from ..autocomplete import TitleIndex, VacancyTitleIndex
+from . import factories
+
+
+class TitleIndexTestCase(SimpleTestCase):
+
+    def test_prefix_match(self):
+        index = TitleIndex()
+        index.add_many(['Python developer', 'PHP developer', 'Go developer'])
+
+        self.assertCountEqual(index.search('p', 10),
+                              ['Python developer', 'PHP developer'])
+        self.assertEqual(index.search('  PYTHON  dev', 10),
+                         ['Python developer'])
+        self.assertEqual(index.search('ruby', 10), [])
+        self.assertEqual(index.search(' ', 10), [])
+
+    def test_most_common_first(self):
+        index = TitleIndex()
+        index.add_many(['Python developer', 'Python teacher',
+                        'python  developer'])
+        index.add('Python tester')
+        index.add('Python tester')
+        index.add('Python tester')
+
+        self.assertEqual(index.search('python', 2),
+                         ['Python tester', 'Python developer'])
+        self.assertEqual(len(index), 3)
+
+    def test_memoized_top_updated(self):
+        index = TitleIndex(memo_size=2)
+        index.add_many('a%04d' % number
+                       for number in range(autocomplete.MEMO_MIN_RANGE))
+        index.add('a0001')
+        index.warm()
+        self.assertIn('a', index._memo)
+
+        index.add('a0002')
+        index.add('a0002')
+        index.add('b')
+        self.assertEqual(index.search('a', 2), ['a0002', 'a0001'])
+        # Limits above memo size bypass it
+        self.assertEqual(index.search('a', 3)[:2], ['a0002', 'a0001'])
+
+
+class VacancyTitleIndexTestCase(TestCase):
+
+    def test_new_vacancies_loaded(self):
+        factories.VacancyFactory.create(title='Python developer')
+        index = VacancyTitleIndex()
+        self.assertEqual(index.search('py', 10), ['Python developer'])
+
+        factories.VacancyFactory.create(title='Python tester')
+        factories.VacancyFactory.create(title='Python tester')
+        with self.settings(VACANCY_AUTOCOMPLETE_REBUILD_INTERVAL=3600,
+                           VACANCY_AUTOCOMPLETE_REFRESH_INTERVAL=0):
+            with self.assertNumQueries(2):
+                self.assertEqual(index.search('py', 10),
+                                 ['Python tester', 'Python developer'])
+
+    @override_settings(TASKS_ALWAYS_EAGER=False)
+    def test_rebuilt_in_background(self):
+        index = VacancyTitleIndex()
+        built = threading.Event()
+        threads = []
+
+        def rebuild():
+            threads.append(threading.current_thread())
+            built.wait(5)
+
+        with mock.patch.object(index, 'rebuild', side_effect=rebuild):
+            # Nothing to serve until the first build is done
+            self.assertEqual(index.search('py', 10), [])
+            # The build in progress is not started again
+            self.assertEqual(index.search('py', 10), [])
+            built.set()
+        index._refresh_lock.acquire(timeout=5)
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.current_thread())
+
+    @override_settings(TASKS_ALWAYS_EAGER=False,
+                       VACANCY_AUTOCOMPLETE_REFRESH_INTERVAL=0)
+    def test_old_index_used_while_rebuilt(self):
+        index = VacancyTitleIndex()
+        index._index = TitleIndex()
+        index._index.add('Python developer')
+        built = threading.Event()
+
+        with mock.patch.object(index, 'rebuild',
+                               side_effect=lambda: built.wait(5)), \
+                self.assertNumQueries(0):
+            self.assertEqual(index.search('py', 10), ['Python developer'])
+            built.set()
+        index._refresh_lock.acquire(timeout=5)
@@ -0,0 +1,69 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ..changes import Cursor, InvalidCursor, get_changes
+from ..models import Vacancy, VacancyTombstone
+from . import factories
+
+
+class CursorTestCase(SimpleTestCase):
+
+    def test_round_trip(self):
+        cursor = Cursor.decode(Cursor().encode())
+        self.assertIsNone(cursor.changed)
+        self.assertIsNone(cursor.deleted)
+
+    def test_invalid(self):
+        for value in ('', 'garbage', Cursor().encode()[:-2], 'WzEsMl0='):
+            with self.assertRaises(InvalidCursor):
+                Cursor.decode(value)
+
+
+class ChangesTestCase(TestCase):
+
+    def sync(self, cursor, limit):
+        changed, deleted, cursor, more = get_changes(cursor, limit)
+        return [vacancy.pk for vacancy in changed], deleted, \
+            Cursor.decode(cursor.encode()), more
+
+    def test_pages(self):
+        vacancies = factories.VacancyFactory.create_batch(3)
+
+        changed, deleted, cursor, more = self.sync(Cursor(), 2)
+        self.assertEqual(changed, [vacancy.pk for vacancy in vacancies[:2]])
+        self.assertTrue(more)
+
+        changed, deleted, cursor, more = self.sync(cursor, 2)
+        self.assertEqual(changed, [vacancies[2].pk])
+        self.assertEqual(deleted, [])
+        self.assertFalse(more)
+
+        changed, deleted, same_cursor, more = self.sync(cursor, 2)
+        self.assertEqual(changed, [])
+        self.assertEqual(same_cursor.encode(), cursor.encode())
+
+    def test_modified_and_deleted(self):
+        first, second = factories.VacancyFactory.create_batch(2)
+        _, _, cursor, _ = self.sync(Cursor(), 10)
+
+        first.title = 'changed'
+        first.save()
+        second_pk = second.pk
+        second.delete()
+
+        changed, deleted, cursor, more = self.sync(cursor, 10)
+        self.assertEqual(changed, [first.pk])
+        self.assertEqual(deleted, [second_pk])
+
+        self.assertEqual(self.sync(cursor, 10)[:2], ([], []))
+
+    def test_bulk_delete_tombstones(self):
+        factories.VacancyFactory.create_batch(2)
+        Vacancy.objects.all().delete()
+        self.assertEqual(VacancyTombstone.objects.count(), 2)
+
+    @override_settings(VACANCY_CHANGES_LAG=60)
+    def test_recent_changes_held_back(self):
+        factories.VacancyFactory.create()
+        changed, deleted, cursor, more = self.sync(Cursor(), 10)
+        self.assertEqual(changed, [])
+        self.assertIsNone(cursor.changed)
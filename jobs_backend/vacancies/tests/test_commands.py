@@ -0,0 +1,201 @@
+import datetime
+import tempfile
+import time
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import (
+    SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+
+from jobs_backend.users.models import User
+from jobs_backend.vacancies.counters import view_counter
+from jobs_backend.vacancies.management.commands.warm_caches import RateLimiter
+from jobs_backend.vacancies.models import Vacancy, VacancyStat
+from . import factories
+
+
+@override_settings(VACANCY_LIST_CACHE_TTL=60, VACANCY_DETAIL_CACHE_TTL=60,
+                   VACANCY_WARM_LIST_PRESETS=['', 'ordering=popular'],
+                   VACANCY_VIEWS_FLUSH_THRESHOLD=1000)
+class WarmCachesTestCase(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        view_counter.flush()
+
+    def tearDown(self):
+        view_counter.flush()
+
+    def warm(self, *args):
+        out = StringIO()
+        # Host of the test client
+        call_command('warm_caches', *args, rate=0, host='testserver',
+                     stdout=out)
+        return out.getvalue()
+
+    def test_ok_warm(self):
+        vacancies = factories.VacancyFactory.create_batch(3)
+        Vacancy.objects.filter(pk=vacancies[0].pk).update(views_count=5)
+
+        out = self.warm('--details', '1')
+
+        # 2 presets, a single page each, popular list and 1 vacancy
+        self.assertIn('Warmed 4 of 4 pages', out)
+        with self.assertNumQueries(0):
+            self.client.get('/api/vacancies/', secure=True)
+            self.client.get('/api/vacancies/?ordering=popular', secure=True)
+            self.client.get('/api/vacancies/%d/' % vacancies[0].pk,
+                            secure=True)
+
+    def test_ok_warm_not_counted_as_view(self):
+        vacancy = factories.VacancyFactory.create(views_count=1)
+
+        self.warm()
+        view_counter.flush()
+
+        vacancy.refresh_from_db()
+        self.assertEqual(vacancy.views_count, 1)
+
+    def test_ok_warm_pages_bounded_by_count(self):
+        factories.VacancyFactory.create_batch(21)
+
+        out = self.warm('--pages', '5', '--details', '0')
+
+        # 2 pages of each preset and popular list
+        self.assertIn('Warmed 5 of 5 pages', out)
+
+
+class RateLimiterTestCase(SimpleTestCase):
+
+    def test_ok_spaced(self):
+        limiter = RateLimiter(100)
+        started = time.monotonic()
+        for _ in range(5):
+            limiter.wait()
+        # The first call does not wait
+        self.assertGreaterEqual(time.monotonic() - started, 0.04)
+
+
+class GenerateDataTestCase(TestCase):
+
+    def generate(self, *args):
+        call_command('generate_data', '--users', '3', '--vacancies', '25',
+                     '--chunk-size', '10', *args, stdout=StringIO())
+        return list(Vacancy.objects.order_by('pk').values_list(
+            'title', 'description', 'created_on', 'views_count'))
+
+    def test_ok_generated(self):
+        vacancies = self.generate()
+
+        self.assertEqual(len(vacancies), 25)
+        self.assertEqual(User.objects.filter(is_active=True).count(), 3)
+        self.assertEqual(Token.objects.count(), 3)
+        user = User.objects.first()
+        self.assertTrue(user.check_password('password'))
+        # Ordered by date like real ones
+        dates = [created_on for _, _, created_on, _ in vacancies]
+        self.assertEqual(dates, sorted(dates))
+        self.assertLessEqual(dates[-1], timezone.now())
+        self.assertFalse(Vacancy.objects.filter(
+            signature_band0__isnull=True).exists())
+
+    def test_ok_deterministic(self):
+        first = self.generate()
+        User.objects.all().delete()
+        Vacancy.objects.all().delete()
+
+        self.assertEqual(self.generate(), first)
+
+    def test_ok_other_seed(self):
+        first = self.generate()
+        self.assertNotEqual(self.generate('--seed', '1')[25:], first)
+
+
+class LoadVacanciesTestCase(TestCase):
+
+    def load(self, content, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt') as file:
+            file.write(content)
+            file.flush()
+            out, err = StringIO(), StringIO()
+            call_command('load_vacancies', file.name, *args, stdout=out,
+                         stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_ok_json_lines(self):
+        out, _ = self.load(
+            '{"title": "Python developer", "description": "Django"}\n'
+            '\n'
+            '{"id": 10, "title": "Go developer", "description": "gRPC", '
+            '"created_on": "2017-03-01T10:00:00"}\n')
+
+        self.assertIn('Loaded 2 vacancies', out)
+        vacancy = Vacancy.objects.get(pk=10)
+        self.assertEqual(vacancy.title, 'Go developer')
+        self.assertEqual(vacancy.created_on, datetime.datetime(
+            2017, 3, 1, 10, tzinfo=timezone.utc))
+        self.assertTrue(Vacancy.objects.filter(
+            title='Python developer').exists())
+
+    def test_ok_csv(self):
+        out, _ = self.load('title,description,id\n'
+                           'Python developer,"Django,\nDRF",\n'
+                           'Go developer,gRPC,10\n', '--format', 'csv')
+
+        self.assertIn('Loaded 2 vacancies', out)
+        self.assertEqual(Vacancy.objects.get(
+            title='Python developer').description, 'Django,\nDRF')
+        self.assertEqual(Vacancy.objects.get(pk=10).title, 'Go developer')
+
+    def test_fail_invalid(self):
+        with self.assertRaisesMessage(CommandError, 'Line 2: title:'):
+            self.load('{"title": "Python developer", "description": "a"}\n'
+                      '{"description": "No title"}\n')
+
+        self.assertFalse(Vacancy.objects.exists())
+
+    def test_ok_invalid_skipped(self):
+        out, err = self.load(
+            '{"title": "Python developer", "description": "a"}\n'
+            'not json\n'
+            '{"title": "Go developer", "description": "b", "salary": 1}\n'
+            '{"title": "%s", "description": "c"}\n' % ('x' * 200),
+            '--skip-invalid')
+
+        self.assertIn('Loaded 1 vacancies', out)
+        self.assertIn('3 invalid rows', out)
+        self.assertIn('Line 2: Invalid JSON', err)
+        self.assertIn('Line 3: Unknown fields: salary', err)
+        self.assertIn('Line 4: title:', err)
+        self.assertEqual(Vacancy.objects.count(), 1)
+
+    def test_ok_conflict_updated(self):
+        vacancy = factories.VacancyFactory(title='Old')
+
+        self.load('{"id": %d, "title": "New", "description": "New"}\n'
+                  % vacancy.pk, '--on-conflict', 'update')
+
+        self.assertEqual(Vacancy.objects.get(pk=vacancy.pk).title, 'New')
+
+
+class BackfillVacancyStatsTestCase(TestCase):
+
+    def test_ok_backfilled(self):
+        factories.VacancyFactory.create_batch(2)
+        VacancyStat.objects.all().delete()
+        out = StringIO()
+
+        call_command('backfill_vacancy_stats', stdout=out)
+
+        self.assertIn('Wrote 2 rollups', out.getvalue())
+        self.assertEqual(sorted(VacancyStat.objects.values_list(
+            'period', 'count')), [('day', 2), ('week', 2)])
+
+    def test_fail_invalid_since(self):
+        with self.assertRaisesMessage(CommandError, 'YYYY-MM-DD'):
+            call_command('backfill_vacancy_stats', since='2017-13-01')
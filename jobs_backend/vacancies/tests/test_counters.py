@@ -0,0 +1,119 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .. import counters
+from ..counters import ViewCounterBuffer, get_popular_ids
+from ..models import Vacancy
+from . import factories
+
+
+@override_settings(VACANCY_VIEWS_FLUSH_THRESHOLD=100,
+                   VACANCY_VIEWS_FLUSH_INTERVAL=3600)
+class ViewCounterBufferTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.buffer = ViewCounterBuffer()
+        self.first, self.second = factories.VacancyFactory.create_batch(2)
+
+    def test_ok_buffered_until_flush(self):
+        self.buffer.increment(self.first.pk)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.views_count, 0)
+
+        self.buffer.flush()
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.views_count, 1)
+
+    def test_ok_flush_single_query(self):
+        for _ in range(3):
+            self.buffer.increment(self.first.pk)
+        self.buffer.increment(self.second.pk)
+
+        # One UPDATE for counters and one SELECT for popular list
+        with self.assertNumQueries(2):
+            self.buffer.flush()
+
+        self.assertEqual(
+            dict(Vacancy.objects.values_list('pk', 'views_count')),
+            {self.first.pk: 3, self.second.pk: 1}
+        )
+
+    def test_ok_flush_batched(self):
+        self.buffer.increment(self.first.pk)
+        self.buffer.increment(self.second.pk)
+
+        # An UPDATE per vacancy and one SELECT for popular list
+        with mock.patch.object(counters, 'FLUSH_BATCH_SIZE', 1), \
+                self.assertNumQueries(3):
+            self.buffer.flush()
+
+        self.assertEqual(
+            dict(Vacancy.objects.values_list('pk', 'views_count')),
+            {self.first.pk: 1, self.second.pk: 1}
+        )
+
+    def test_ok_flush_on_threshold(self):
+        with override_settings(VACANCY_VIEWS_FLUSH_THRESHOLD=2):
+            self.buffer.increment(self.first.pk)
+            self.buffer.increment(self.first.pk)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.views_count, 2)
+
+    def test_ok_flush_on_interval(self):
+        with override_settings(VACANCY_VIEWS_FLUSH_INTERVAL=0):
+            self.buffer.increment(self.first.pk)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.views_count, 1)
+
+    def test_ok_flush_does_not_touch_modified_on(self):
+        modified_on = self.first.modified_on
+        self.buffer.increment(self.first.pk)
+        self.buffer.flush()
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.modified_on, modified_on)
+
+    def test_ok_popular_refreshed_on_flush(self):
+        self.buffer.increment(self.second.pk)
+        self.buffer.flush()
+        self.assertEqual(get_popular_ids(), [self.second.pk, self.first.pk])
+
+        with self.assertNumQueries(0):
+            get_popular_ids()
+
+    @override_settings(TASKS_ALWAYS_EAGER=False,
+                       VACANCY_VIEWS_FLUSH_THRESHOLD=2)
+    def test_ok_flush_in_background(self):
+        flushed = threading.Event()
+        caller = threading.current_thread()
+        threads = []
+
+        def flush():
+            threads.append(threading.current_thread())
+            self.buffer._pending.clear()
+            flushed.set()
+
+        with mock.patch.object(self.buffer, 'flush', side_effect=flush):
+            self.buffer.increment(self.first.pk)
+            self.assertFalse(flushed.wait(0.1))
+
+            self.buffer.increment(self.first.pk)
+            self.assertTrue(flushed.wait(5))
+        self.assertNotIn(caller, threads)
+
+    @override_settings(TASKS_ALWAYS_EAGER=False,
+                       VACANCY_VIEWS_FLUSH_INTERVAL=0.05)
+    def test_ok_flush_when_idle(self):
+        flushed = threading.Event()
+
+        def flush():
+            self.buffer._pending.clear()
+            flushed.set()
+
+        with mock.patch.object(self.buffer, 'flush', side_effect=flush):
+            self.buffer.increment(self.first.pk)
+            # No further views are needed
+            self.assertTrue(flushed.wait(5))
@@ -0,0 +1,72 @@
+import datetime
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from ..loader import SKIP, UPDATE, CopyStream, copy_line, load
+from ..models import Vacancy
+from . import factories
+
+
+class CopyLineTestCase(SimpleTestCase):
+
+    def test_ok_escaped(self):
+        self.assertEqual(copy_line(['a\tb\nc\rd\\e', None, 5]),
+                         'a\\tb\\nc\\rd\\\\e\t\\N\t5\n')
+
+    def test_ok_stream(self):
+        stream = CopyStream(iter([['one'], ['two']]))
+
+        self.assertEqual(stream.read(5), 'one\nt')
+        self.assertEqual(stream.read(100), 'wo\n')
+        self.assertEqual(stream.read(100), '')
+
+
+class LoadTestCase(TestCase):
+
+    def test_ok_inserted(self):
+        created_on = timezone.now() - datetime.timedelta(days=3)
+        vacancies = [Vacancy(title='Python developer', description='Django'),
+                     Vacancy(title='Go developer', description='gRPC',
+                             created_on=created_on, modified_on=created_on)]
+
+        self.assertEqual(load(vacancies), 2)
+
+        self.assertEqual(Vacancy.objects.count(), 2)
+        vacancy = Vacancy.objects.get(title='Go developer')
+        self.assertEqual(vacancy.created_on, created_on)
+        self.assertEqual(vacancy.modified_on, created_on)
+        self.assertIsNotNone(vacancy.signature_band0)
+        self.assertIsNotNone(Vacancy.objects.get(
+            title='Python developer').created_on)
+
+    def test_ok_conflict_skipped(self):
+        vacancy = factories.VacancyFactory(title='Old')
+
+        count = load([Vacancy(pk=vacancy.pk, title='New', description='New'),
+                      Vacancy(title='Other', description='Other')], SKIP)
+
+        self.assertEqual(count, 1)
+        self.assertEqual(Vacancy.objects.get(pk=vacancy.pk).title, 'Old')
+        self.assertEqual(Vacancy.objects.count(), 2)
+
+    def test_ok_conflict_updated(self):
+        vacancy = factories.VacancyFactory(title='Old', views_count=7)
+        # E.g. from an old export
+        exported_on = vacancy.modified_on - datetime.timedelta(days=1)
+
+        count = load([Vacancy(pk=vacancy.pk, title='New', description='New',
+                              modified_on=exported_on)], UPDATE)
+
+        self.assertEqual(count, 1)
+        updated = Vacancy.objects.get(pk=vacancy.pk)
+        self.assertEqual(updated.title, 'New')
+        self.assertEqual(updated.views_count, 7)
+        self.assertEqual(updated.created_on, vacancy.created_on)
+        # Reported by the change feed
+        self.assertGreater(updated.modified_on, vacancy.modified_on)
+        self.assertNotEqual(updated.signature_band0, vacancy.signature_band0)
+
+    def test_fail_unknown_on_conflict(self):
+        with self.assertRaises(ValueError):
+            load([], 'replace')
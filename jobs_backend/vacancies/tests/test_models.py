@@ -1,5 +1,9 @@
-from django.test import TestCase
+from unittest import mock
 
+from django.test import TestCase, TransactionTestCase
+
+from ..models import CACHE_NAMESPACE, SavedSearch, Vacancy
+from ..search import signature_bands
 from . import factories
 
 
@@ -12,3 +16,85 @@ class VacancyTestCase(TestCase):
     def test_absolute_url(self):
         v = factories.VacancyFactory.create()
         self.assertEqual(v.get_absolute_url(), '/api/vacancies/%s/' % v.pk)
+
+
+class VacancyBulkCreateTestCase(TransactionTestCase):
+
+    @mock.patch('jobs_backend.vacancies.models.cache.invalidate')
+    def test_cache_invalidated(self, invalidate):
+        Vacancy.objects.bulk_create(factories.VacancyFactory.build_batch(2))
+        invalidate.assert_called_once_with(CACHE_NAMESPACE)
+
+
+class VacancySignatureTestCase(TestCase):
+    description = (
+        'We are looking for a senior Python developer to build REST APIs '
+        'with Django, PostgreSQL and Celery. Remote work, flexible hours, '
+        'paid conferences and a friendly team of engineers.'
+    )
+
+    def test_signature_saved(self):
+        vacancy = factories.VacancyFactory.create(description=self.description)
+        vacancy.refresh_from_db()
+        bands = signature_bands(vacancy.get_search_tokens())
+        self.assertEqual(vacancy.signature_band0, bands[0])
+        self.assertEqual(vacancy.signature_band5, bands[5])
+
+    def test_no_signature_without_tokens(self):
+        vacancy = factories.VacancyFactory.create(title='a', description='')
+        self.assertIsNone(vacancy.signature_band0)
+        self.assertEqual(Vacancy.objects.near_duplicates(set()), [])
+
+    def test_near_duplicates(self):
+        original = factories.VacancyFactory.create(
+            title='Python developer', description=self.description)
+        factories.VacancyFactory.create(
+            title='Accountant', description='Spreadsheets and reports')
+        edited = Vacancy(title='Python developer',
+                         description=self.description + ' Apply now!')
+
+        with self.assertNumQueries(1):
+            duplicates = Vacancy.objects.near_duplicates(
+                edited.get_search_tokens())
+        self.assertEqual(duplicates, [original])
+
+    def test_near_duplicates_similarity(self):
+        original = factories.VacancyFactory.create(
+            title='Python developer', description=self.description)
+        tokens = original.get_search_tokens()
+        self.assertEqual(
+            Vacancy.objects.near_duplicates(tokens, min_similarity=1), [original])
+        self.assertEqual(
+            Vacancy.objects.exclude(pk=original.pk).near_duplicates(tokens), [])
+
+
+class SavedSearchTestCase(TestCase):
+
+    def test_keywords_indexed(self):
+        search = factories.SavedSearchFactory.create(query='Senior Python, Django')
+        self.assertEqual(search.keywords_count, 3)
+        self.assertCountEqual(
+            search.keywords.values_list('keyword', flat=True),
+            ['senior', 'python', 'django']
+        )
+
+    def test_keywords_reindexed_on_update(self):
+        search = factories.SavedSearchFactory.create(query='python django')
+        search.query = 'golang'
+        search.save()
+        self.assertEqual(search.keywords_count, 1)
+        self.assertEqual(
+            list(search.keywords.values_list('keyword', flat=True)), ['golang']
+        )
+
+    def test_match_all_keywords(self):
+        both = factories.SavedSearchFactory.create(query='python django')
+        one = factories.SavedSearchFactory.create(query='python')
+        factories.SavedSearchFactory.create(query='python flask')
+
+        matched = SavedSearch.objects.match({'python', 'django', 'senior'})
+        self.assertCountEqual(matched, [both, one])
+
+    def test_match_no_tokens(self):
+        factories.SavedSearchFactory.create()
+        self.assertFalse(SavedSearch.objects.match(set()).exists())
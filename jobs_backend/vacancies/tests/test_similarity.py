@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from .. import similarity
+from ..similarity import VacancySimilarity
+from . import factories
+
+
+class SimilarityTestCase(TestCase):
+
+    def setUp(self):
+        self.index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.index_dir)
+        settings_override = override_settings(
+            VACANCY_SIMILARITY_INDEX_DIR=self.index_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.python = factories.VacancyFactory.create(
+            title='Python developer', description='Django REST framework')
+        self.django = factories.VacancyFactory.create(
+            title='Django developer', description='Python and PostgreSQL')
+        self.flask = factories.VacancyFactory.create(
+            title='Flask developer', description='Python microservices')
+        self.cook = factories.VacancyFactory.create(
+            title='Cook', description='Italian cuisine')
+
+    def test_not_built(self):
+        self.assertIsNone(VacancySimilarity().similar(self.python, 10))
+
+    def test_similar(self):
+        self.assertEqual(similarity.build(), 4)
+
+        result = VacancySimilarity().similar(self.python, 10)
+
+        self.assertEqual([pk for pk, _ in result],
+                         [self.django.pk, self.flask.pk])
+        self.assertGreater(result[0][1], result[1][1])
+        self.assertLessEqual(result[0][1], 1)
+
+    def test_count(self):
+        similarity.build()
+        result = VacancySimilarity().similar(self.python, 1)
+        self.assertEqual([pk for pk, _ in result], [self.django.pk])
+
+    def test_new_vacancies_folded_in(self):
+        similarity.build()
+        index = VacancySimilarity()
+        index.similar(self.python, 10)
+
+        new = factories.VacancyFactory.create(
+            title='Python Django developer', description='Django REST')
+
+        self.assertEqual(index.similar(self.python, 1)[0][0], new.pk)
+        self.assertEqual(
+            [pk for pk, _ in index.similar(new, 10)][:2],
+            [self.python.pk, self.django.pk])
+
+    def test_rebuild_switches_version(self):
+        similarity.build()
+        index = VacancySimilarity()
+        index.similar(self.python, 10)
+        self.cook.title = 'Python cook'
+        self.cook.save()
+
+        similarity.build()
+        similarity.build()
+
+        self.assertIn(self.cook.pk,
+                      [pk for pk, _ in index.similar(self.python, 10)])
+        # The current and the previous versions are kept
+        self.assertEqual(len(os.listdir(self.index_dir)), 3)
@@ -0,0 +1,98 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import loader
+from ..models import Vacancy, VacancyStat
+from ..stats import backfill, get_stats
+from . import factories
+
+
+def at(day, hour=12):
+    return datetime.datetime(2017, 3, day, hour, tzinfo=timezone.utc)
+
+
+def rollups():
+    return sorted(VacancyStat.objects.filter(count__gt=0)
+                  .values_list('period', 'start', 'count'))
+
+
+class VacancyStatTestCase(TestCase):
+
+    def test_ok_recorded_on_create_and_delete(self):
+        vacancy = factories.VacancyFactory()
+        today = timezone.localtime(vacancy.created_on).date()
+        monday = today - datetime.timedelta(days=today.weekday())
+
+        self.assertEqual(rollups(), [('day', today, 1), ('week', monday, 1)])
+        factories.VacancyFactory()
+        vacancy.delete()
+        self.assertEqual(rollups(), [('day', today, 1), ('week', monday, 1)])
+        Vacancy.objects.all().delete()
+        self.assertEqual(rollups(), [])
+
+    def test_ok_recorded_on_load(self):
+        # 2017-03-06 is a Monday
+        loader.load([Vacancy(title='a', description='a', created_on=at(5)),
+                     Vacancy(title='b', description='b', created_on=at(6)),
+                     Vacancy(title='c', description='c', created_on=at(6))])
+
+        self.assertEqual(rollups(), [
+            ('day', datetime.date(2017, 3, 5), 1),
+            ('day', datetime.date(2017, 3, 6), 2),
+            ('week', datetime.date(2017, 2, 27), 1),
+            ('week', datetime.date(2017, 3, 6), 2),
+        ])
+
+    def test_ok_updated_rows_not_counted(self):
+        vacancy = factories.VacancyFactory()
+        expected = rollups()
+
+        loader.load([Vacancy(pk=vacancy.pk, title='New', description='New')],
+                    loader.UPDATE)
+
+        self.assertEqual(rollups(), expected)
+
+    def test_ok_get_stats(self):
+        VacancyStat.objects.record([at(1), at(3), at(3)])
+
+        self.assertEqual(get_stats('day', datetime.date(2017, 3, 3), 3), [
+            (datetime.date(2017, 3, 1), 1),
+            (datetime.date(2017, 3, 2), 0),
+            (datetime.date(2017, 3, 3), 2),
+        ])
+        self.assertEqual(get_stats('week', datetime.date(2017, 3, 3), 2), [
+            (datetime.date(2017, 2, 20), 0),
+            (datetime.date(2017, 2, 27), 3),
+        ])
+
+
+class BackfillTestCase(TestCase):
+
+    def setUp(self):
+        loader.load([Vacancy(title=str(day), description='a',
+                             created_on=at(day, hour))
+                     for day, hour in ((1, 0), (1, 23), (8, 12), (20, 5))])
+        self.expected = rollups()
+
+    def test_ok_all(self):
+        VacancyStat.objects.all().delete()
+
+        self.assertEqual(backfill(), 6)
+        self.assertEqual(rollups(), self.expected)
+
+    def test_ok_since(self):
+        VacancyStat.objects.update(count=100)
+
+        backfill(datetime.date(2017, 3, 9))
+
+        # Recomputed from the Monday of that week
+        self.assertEqual(rollups(), [
+            ('day', datetime.date(2017, 3, 1), 100),
+            ('day', datetime.date(2017, 3, 8), 1),
+            ('day', datetime.date(2017, 3, 20), 1),
+            ('week', datetime.date(2017, 2, 27), 100),
+            ('week', datetime.date(2017, 3, 6), 1),
+            ('week', datetime.date(2017, 3, 20), 1),
+        ])
@@ -1,9 +1,24 @@
+import datetime
+import shutil
+import tempfile
+
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
 
-from jobs_backend.vacancies.models import Vacancy
+from jobs_backend.core import broadcast
+from jobs_backend.users import access_tokens
+from jobs_backend.vacancies import similarity
+from jobs_backend.vacancies.counters import view_counter
+from jobs_backend.vacancies.models import SavedSearch, Vacancy, VacancyStat
+from jobs_backend.vacancies.views import VACANCY_CHANNEL
 from jobs_backend.users.tests.factories import ActiveUserFactory
 from . import factories
 
@@ -12,6 +27,7 @@ class VacancyViewSetTestCase(APITestCase):
     url_create = 'api:vacancies:vacancy-list'
     url_detail = 'api:vacancies:vacancy-detail'
     url_list = 'api:vacancies:vacancy-list'
+    url_popular = 'api:vacancies:vacancy-popular'
 
     def test_ok_list_empty(self):
         """
@@ -36,6 +52,20 @@ class VacancyViewSetTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), Vacancy.objects.count())
 
+    def test_ok_list_ids(self):
+        first, second = factories.VacancyFactory.create_batch(2)
+        url = reverse(self.url_list)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {
+                'ids': '%s,%s,0' % (second.id, first.id)
+            })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']],
+                         [second.id, first.id])
+        self.assertEqual(response.data['missing'], [0])
+
     def test_ok_detail(self):
         """
         Checks retrieved data for existed vacancy object
@@ -50,6 +80,205 @@ class VacancyViewSetTestCase(APITestCase):
         self.assertEqual(response.data.get('title'), obj.title)
         self.assertEqual(response.data.get('description'), obj.description)
 
+    def test_ok_detail_counts_views(self):
+        """
+        Each retrieval of a vacancy is counted
+        """
+        obj = factories.VacancyFactory.create()
+        url = reverse(self.url_detail, args=(obj.id,))
+
+        self.client.get(url)
+        self.client.get(url)
+
+        obj.refresh_from_db()
+        self.assertEqual(obj.views_count, 2)
+
+    def test_ok_popular(self):
+        """
+        Most viewed vacancies go first
+        """
+        less, more = factories.VacancyFactory.create_batch(2)
+        self.client.get(reverse(self.url_detail, args=(less.id,)))
+        for _ in range(2):
+            self.client.get(reverse(self.url_detail, args=(more.id,)))
+
+        response = self.client.get(reverse(self.url_popular))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data],
+                         [more.id, less.id])
+
+    def test_ok_list_ordering_popular(self):
+        less, more = factories.VacancyFactory.create_batch(2)
+        Vacancy.objects.filter(pk=more.pk).update(views_count=5)
+
+        response = self.client.get(reverse(self.url_list),
+                                   {'ordering': 'popular'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']],
+                         [more.id, less.id])
+
+    def test_ok_autocomplete(self):
+        factories.VacancyFactory.create(title='Python developer')
+        factories.VacancyFactory.create(title='Python tester')
+        factories.VacancyFactory.create(title='python tester')
+        factories.VacancyFactory.create(title='Go developer')
+
+        response = self.client.get(reverse('api:vacancies:vacancy-autocomplete'),
+                                   {'prefix': 'pyth', 'limit': 5})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, ['Python tester', 'Python developer'])
+
+    def test_fail_autocomplete_no_prefix(self):
+        response = self.client.get(reverse('api:vacancies:vacancy-autocomplete'))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('prefix', response.data)
+
+    def test_ok_similar(self):
+        vacancy = factories.VacancyFactory.create(
+            title='Python developer', description='Django REST framework')
+        similar = factories.VacancyFactory.create(
+            title='Django developer', description='Python')
+        factories.VacancyFactory.create(title='Cook', description='Pasta')
+        index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index_dir)
+
+        with self.settings(VACANCY_SIMILARITY_INDEX_DIR=index_dir):
+            similarity.build()
+            response = self.client.get(
+                reverse('api:vacancies:vacancy-similar', args=(vacancy.id,)))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data], [similar.id])
+
+    def test_fail_similar_not_built(self):
+        vacancy = factories.VacancyFactory.create()
+        index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index_dir)
+
+        with self.settings(VACANCY_SIMILARITY_INDEX_DIR=index_dir):
+            response = self.client.get(
+                reverse('api:vacancies:vacancy-similar', args=(vacancy.id,)))
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def test_ok_changes(self):
+        first, second = factories.VacancyFactory.create_batch(2)
+        url = reverse('api:vacancies:vacancy-changes')
+
+        response = self.client.get(url, {'limit': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['changed']],
+                         [first.id])
+        self.assertTrue(response.data['more'])
+
+        second_id = second.id
+        second.delete()
+        response = self.client.get(url, {'since': response.data['next']})
+        self.assertEqual(response.data['changed'], [])
+        self.assertEqual(response.data['deleted'], [second_id])
+        self.assertFalse(response.data['more'])
+
+    def test_fail_changes_invalid_cursor(self):
+        response = self.client.get(reverse('api:vacancies:vacancy-changes'),
+                                   {'since': 'garbage'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('since', response.data)
+
+    def test_ok_stats(self):
+        day = datetime.datetime(2017, 3, 1, 12, tzinfo=timezone.utc)
+        VacancyStat.objects.record([day, day, day - datetime.timedelta(2)])
+
+        response = self.client.get(reverse('api:vacancies:vacancy-stats'),
+                                   {'until': '2017-03-01', 'limit': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'period': 'day', 'results': [
+            {'start': datetime.date(2017, 2, 27), 'count': 1},
+            {'start': datetime.date(2017, 2, 28), 'count': 0},
+            {'start': datetime.date(2017, 3, 1), 'count': 2},
+        ]})
+
+        response = self.client.get(reverse('api:vacancies:vacancy-stats'), {
+            'period': 'week', 'until': '2017-03-05', 'limit': 1})
+        self.assertEqual(response.data['results'], [
+            {'start': datetime.date(2017, 2, 27), 'count': 3}])
+
+    def test_ok_stats_today(self):
+        factories.VacancyFactory.create_batch(2)
+
+        response = self.client.get(reverse('api:vacancies:vacancy-stats'))
+        self.assertEqual(len(response.data['results']), 30)
+        self.assertEqual(response.data['results'][-1]['count'], 2)
+
+    def test_fail_stats_invalid(self):
+        response = self.client.get(reverse('api:vacancies:vacancy-stats'),
+                                   {'period': 'year', 'limit': 0})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('period', response.data)
+        self.assertIn('limit', response.data)
+
+    @override_settings(VACANCY_STREAM_HEARTBEAT=0.01)
+    def test_ok_stream(self):
+        missed = factories.VacancyFactory.create()
+        response = self.client.get(reverse('api:vacancies:vacancy-stream'),
+                                   HTTP_LAST_EVENT_ID=str(missed.id - 1))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = iter(response.streaming_content)
+
+        self.assertEqual(next(events), b'retry: 5000\n\n')
+        self.assertIn(b'id: %d\nevent: vacancy\n' % missed.id, next(events))
+        self.assertEqual(next(events), b': keep-alive\n\n')
+
+        broadcast.hub.dispatch('vacancies', {'id': missed.id})
+        broadcast.hub.dispatch('vacancies', {'id': missed.id + 1})
+        self.assertEqual(
+            next(events),
+            b'id: %d\nevent: vacancy\ndata: {"id":%d}\n\n' % (
+                missed.id + 1, missed.id + 1))
+        response.close()
+        # Other channels have long-lived subscribers, e.g. access tokens
+        self.assertNotIn(VACANCY_CHANNEL, broadcast.hub._subscribers)
+
+    @override_settings(VACANCY_STREAM_HEARTBEAT=0.01,
+                       VACANCY_STREAM_REPLAY_LIMIT=2)
+    def test_ok_stream_replay_paged(self):
+        missed = factories.VacancyFactory.create_batch(5)
+        response = self.client.get(reverse('api:vacancies:vacancy-stream'),
+                                   HTTP_LAST_EVENT_ID=str(missed[0].id - 1))
+        events = iter(response.streaming_content)
+        next(events)
+
+        for vacancy in missed:
+            self.assertIn(b'id: %d\n' % vacancy.id, next(events))
+        self.assertEqual(next(events), b': keep-alive\n\n')
+        response.close()
+
+    def test_ok_create_access_token_no_user_query(self):
+        user = ActiveUserFactory.create()
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Bearer ' + access_tokens.issue(user))
+        data = {'title': 'awesome vacancy', 'description': 'be awesome'}
+        # Revocations and statistics rows are loaded and created already
+        access_tokens.denylist.receive()
+        factories.VacancyFactory.create()
+
+        # Duplicates lookup, insert, two statistics updates and the saved
+        # search notification task, which runs in the request in tests
+        with self.assertNumQueries(6), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse(self.url_create), data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse([query for query in queries.captured_queries
+                          if 'users_user' in query['sql']])
+
     def test_fail_detail_not_found(self):
         """
         Getting message about non-existent vacancy
@@ -89,3 +318,265 @@ class VacancyViewSetTestCase(APITestCase):
         self.assertEqual(Vacancy.objects.count(), 1)
         self.assertEqual(response.data.get('title'), data['title'])
         self.assertEqual(response.data.get('description'), data['description'])
+
+    def test_ok_create_notifies_saved_searches(self):
+        """
+        Owners of matching saved searches are notified about new vacancy
+        """
+        matching = factories.SavedSearchFactory.create(query='python django')
+        factories.SavedSearchFactory.create(query='golang')
+        url = reverse(self.url_create)
+        data = {'title': 'Python developer',
+                'description': 'Django and DRF'}
+
+        self.client.force_login(ActiveUserFactory.create())
+        self.client.post(url, data)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [matching.user.email])
+        self.assertIn(data['title'], mail.outbox[0].subject)
+
+    def test_ok_create_many(self):
+        data = [{'title': 'Python developer', 'description': 'Django'},
+                {'title': 'Cook', 'description': 'Pasta'}]
+
+        self.client.force_login(ActiveUserFactory.create())
+        response = self.client.post(reverse(self.url_create), data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['title'] for item in response.data],
+                         ['Python developer', 'Cook'])
+        vacancy = Vacancy.objects.get(pk=response.data[0]['id'])
+        self.assertTrue(response.data[0]['url'].endswith(
+            vacancy.get_absolute_url()))
+        self.assertIsNotNone(vacancy.signature_band0)
+
+    def test_fail_create_many_atomic(self):
+        data = [{'title': 'Python developer', 'description': 'Django'},
+                {'title': ''}]
+
+        self.client.force_login(ActiveUserFactory.create())
+        response = self.client.post(reverse(self.url_create), data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('title', response.data[1])
+        self.assertEqual(Vacancy.objects.count(), 0)
+
+    def test_ok_create_many_partial(self):
+        data = [{'title': ''},
+                {'title': 'Python developer', 'description': 'Django'}]
+
+        self.client.force_login(ActiveUserFactory.create())
+        response = self.client.post(
+            reverse(self.url_create) + '?mode=partial', data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(response.data['results'][0])
+        self.assertEqual(response.data['results'][1]['title'],
+                         'Python developer')
+        self.assertIn('title', response.data['errors'][0])
+        self.assertEqual(response.data['errors'][1], {})
+        self.assertEqual(Vacancy.objects.count(), 1)
+
+    def test_fail_create_many_too_many(self):
+        self.client.force_login(ActiveUserFactory.create())
+        with self.settings(VACANCY_BATCH_CREATE_MAX=1):
+            response = self.client.post(reverse(self.url_create),
+                                        [{'title': 'a'}, {'title': 'b'}])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', response.data)
+
+    def test_ok_create_idempotent(self):
+        cache.clear()
+        data = {'title': 'awesome vacancy', 'description': 'be awesome'}
+        self.client.force_login(ActiveUserFactory.create())
+
+        first = self.client.post(reverse(self.url_create), data,
+                                 HTTP_IDEMPOTENCY_KEY='key')
+        repeat = self.client.post(reverse(self.url_create), data,
+                                  HTTP_IDEMPOTENCY_KEY='key')
+        other = self.client.post(reverse(self.url_create), data,
+                                 HTTP_IDEMPOTENCY_KEY='other key')
+
+        self.assertEqual(repeat.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(repeat.data, first.data)
+        self.assertEqual(repeat['Idempotent-Replayed'], 'true')
+        self.assertNotEqual(other.data['id'], first.data['id'])
+        self.assertEqual(Vacancy.objects.count(), 2)
+
+    def test_fail_create_idempotency_key_reused(self):
+        cache.clear()
+        self.client.force_login(ActiveUserFactory.create())
+        self.client.post(reverse(self.url_create),
+                         {'title': 'first', 'description': 'first'},
+                         HTTP_IDEMPOTENCY_KEY='key')
+
+        response = self.client.post(reverse(self.url_create),
+                                    {'title': 'second', 'description': 'second'},
+                                    HTTP_IDEMPOTENCY_KEY='key')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Idempotency-Key', response.data)
+        self.assertEqual(Vacancy.objects.count(), 1)
+
+    def test_fail_create_idempotent_not_cached(self):
+        cache.clear()
+        self.client.force_login(ActiveUserFactory.create())
+        response = self.client.post(reverse(self.url_create), {'title': ''},
+                                    HTTP_IDEMPOTENCY_KEY='key')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(reverse(self.url_create),
+                                    {'title': 'fixed', 'description': 'fixed'},
+                                    HTTP_IDEMPOTENCY_KEY='key')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_ok_create_flags_duplicate(self):
+        original = factories.VacancyFactory.create(
+            title='Python developer', description='Django, DRF and Celery')
+        data = {'title': 'Python developer',
+                'description': 'Django, DRF and Celery!'}
+
+        self.client.force_login(ActiveUserFactory.create())
+        response = self.client.post(reverse(self.url_create), data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['duplicate_of'], original.pk)
+
+    @override_settings(VACANCY_DUPLICATE_ACTION='reject')
+    def test_fail_create_duplicate_rejected(self):
+        factories.VacancyFactory.create(
+            title='Python developer', description='Django, DRF and Celery')
+        data = {'title': 'python developer',
+                'description': 'django, drf and celery'}
+
+        self.client.force_login(ActiveUserFactory.create())
+        response = self.client.post(reverse(self.url_create), data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', response.data)
+        self.assertEqual(Vacancy.objects.count(), 1)
+
+
+@override_settings(VACANCY_LIST_CACHE_TTL=60, VACANCY_DETAIL_CACHE_TTL=60,
+                   VACANCY_VIEWS_FLUSH_THRESHOLD=1000)
+class VacancyListCacheTestCase(APITransactionTestCase):
+    url_list = 'api:vacancies:vacancy-list'
+    url_detail = 'api:vacancies:vacancy-detail'
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        view_counter.flush()
+
+    def test_ok_list_cached(self):
+        factories.VacancyFactory.create()
+        self.client.get(reverse(self.url_list))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse(self.url_list))
+        self.assertEqual(response.data['count'], 1)
+
+    def test_ok_list_recomputed_after_create(self):
+        factories.VacancyFactory.create()
+        self.client.get(reverse(self.url_list))
+        factories.VacancyFactory.create()
+
+        # The first request after a change revalidates
+        response = self.client.get(reverse(self.url_list))
+        self.assertEqual(response.data['count'], 2)
+
+    def test_ok_detail_cached(self):
+        obj = factories.VacancyFactory.create()
+        url = reverse(self.url_detail, kwargs={'pk': obj.pk})
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data['id'], obj.pk)
+
+    def test_fail_detail_not_found(self):
+        response = self.client.get(reverse(self.url_detail, kwargs={'pk': 1}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SavedSearchViewSetTestCase(APITestCase):
+    url_list = 'api:vacancies:savedsearch-list'
+    url_detail = 'api:vacancies:savedsearch-detail'
+
+    def setUp(self):
+        self.user = ActiveUserFactory.create()
+
+    def test_fail_unauth_list(self):
+        response = self.client.get(reverse(self.url_list))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_ok_list_access_token_no_user_query(self):
+        search = factories.SavedSearchFactory.create(user=self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Bearer ' + access_tokens.issue(self.user))
+        access_tokens.denylist.receive()
+
+        # Count and page of the user's searches
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse(self.url_list))
+        self.assertEqual([item['id'] for item in response.data['results']],
+                         [search.pk])
+
+    def test_ok_create_access_token(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Bearer ' + access_tokens.issue(self.user))
+        response = self.client.post(reverse(self.url_list),
+                                    {'query': 'python django'})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SavedSearch.objects.get().user, self.user)
+
+    def test_ok_list_own_only(self):
+        own = factories.SavedSearchFactory.create(user=self.user)
+        factories.SavedSearchFactory.create()
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse(self.url_list))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']], [own.id]
+        )
+
+    def test_ok_create(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse(self.url_list),
+                                    {'query': 'python django'})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        search = SavedSearch.objects.get()
+        self.assertEqual(search.user, self.user)
+        self.assertEqual(search.keywords_count, 2)
+
+    def test_fail_create_without_keywords(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse(self.url_list), {'query': 'a'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('query', response.data)
+
+    def test_ok_delete(self):
+        search = factories.SavedSearchFactory.create(user=self.user)
+
+        self.client.force_login(self.user)
+        response = self.client.delete(reverse(self.url_detail, args=(search.id,)))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(SavedSearch.objects.exists())
+
+    def test_fail_delete_foreign(self):
+        search = factories.SavedSearchFactory.create()
+
+        self.client.force_login(self.user)
+        response = self.client.delete(reverse(self.url_detail, args=(search.id,)))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
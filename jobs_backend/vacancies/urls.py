@@ -1,9 +1,16 @@
+from django.conf.urls import url
+
 from rest_framework.routers import DefaultRouter
 
-from .views import VacancyViewSet
+from .views import SavedSearchViewSet, VacancyViewSet, vacancy_stream
 
 
 vacancy_router = DefaultRouter()
+# Must precede the vacancy routes, otherwise `searches` is taken for a pk
+vacancy_router.register(r'searches', SavedSearchViewSet)
 vacancy_router.register(r'', VacancyViewSet)
 
-urlpatterns = vacancy_router.urls
+urlpatterns = [
+    # Must precede the vacancy routes as well
+    url(r'^stream/$', vacancy_stream, name='vacancy-stream'),
+] + vacancy_router.urls
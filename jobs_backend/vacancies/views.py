@@ -1,10 +1,46 @@
-from rest_framework import mixins, permissions, viewsets
+import hashlib
+import json
 
-from .models import Vacancy
-from .serializers import VacancySerializer
+from django.conf import settings
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
 
+from rest_framework import exceptions, mixins, permissions, status, viewsets
+from rest_framework.decorators import detail_route, list_route
+from rest_framework.response import Response
 
-class VacancyViewSet(mixins.CreateModelMixin,
+from jobs_backend.core import broadcast, cache
+from jobs_backend.core.mixins import (
+    BatchCreateMixin, BatchRetrieveMixin, IdempotentCreateMixin,
+)
+from jobs_backend.core.startup import INTERNAL_REQUEST
+from jobs_backend.core.tasks import enqueue
+from .autocomplete import title_index
+from .changes import Cursor, get_changes
+from .counters import get_popular_ids, view_counter
+from .models import CACHE_NAMESPACE, SavedSearch, Vacancy
+from .serializers import (
+    AutocompleteSerializer, ChangesSerializer, SavedSearchSerializer,
+    StatsSerializer, VacancySerializer,
+)
+from .stats import get_stats
+from .tasks import notify_saved_searches
+
+
+VACANCY_CHANNEL = 'vacancies'
+
+
+class IndexNotBuilt(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Similarity index is not built yet.'
+
+
+class VacancyViewSet(IdempotentCreateMixin,
+                     BatchCreateMixin,
+                     BatchRetrieveMixin,
+                     mixins.CreateModelMixin,
                      mixins.RetrieveModelMixin,
                      mixins.ListModelMixin,
                      viewsets.GenericViewSet):
@@ -14,3 +50,219 @@ class VacancyViewSet(mixins.CreateModelMixin,
     queryset = Vacancy.objects.all()
     serializer_class = VacancySerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
+
+    def get_queryset(self):
+        queryset = super(VacancyViewSet, self).get_queryset()
+        if self.request.query_params.get('ordering') == 'popular':
+            queryset = queryset.order_by('-views_count', '-pk')
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        ttl = getattr(settings, 'VACANCY_LIST_CACHE_TTL', 10)
+        if not ttl:
+            return super(VacancyViewSet, self).list(request, *args, **kwargs)
+        # Links in the response are absolute
+        uri = request.build_absolute_uri().encode()
+        data = cache.get_or_set(
+            'vacancies:list:%s' % hashlib.md5(uri).hexdigest(),
+            lambda: super(VacancyViewSet, self).list(
+                request, *args, **kwargs).data,
+            ttl, getattr(settings, 'VACANCY_LIST_CACHE_STALE_TTL', 30),
+            namespace=CACHE_NAMESPACE)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        ttl = getattr(settings, 'VACANCY_DETAIL_CACHE_TTL', 30)
+        if ttl:
+            uri = request.build_absolute_uri().encode()
+            data = cache.get_or_set(
+                'vacancies:detail:%s' % hashlib.md5(uri).hexdigest(),
+                lambda: self.get_serializer(self.get_object()).data,
+                ttl, getattr(settings, 'VACANCY_LIST_CACHE_STALE_TTL', 30),
+                namespace=CACHE_NAMESPACE)
+        else:
+            data = self.get_serializer(self.get_object()).data
+        # Cache warming is not a view
+        if not request.META.get(INTERNAL_REQUEST):
+            view_counter.increment(data['id'])
+        return Response(data)
+
+    @list_route()
+    def popular(self, request):
+        """
+        Most viewed vacancies, refreshed each time view counters are saved
+        """
+        ids = get_popular_ids()
+        vacancies = Vacancy.objects.in_bulk(ids)
+        serializer = self.get_serializer(
+            [vacancies[pk] for pk in ids if pk in vacancies], many=True)
+        return Response(serializer.data)
+
+    @list_route()
+    def autocomplete(self, request):
+        """
+        Titles starting with ?prefix=, most common first
+        """
+        serializer = AutocompleteSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(title_index.search(**serializer.validated_data))
+
+    @list_route()
+    def changes(self, request):
+        """
+        Vacancies changed and deleted since the ?since= cursor. Start without
+        it and pass "next" of each response until "more" is false.
+        """
+        serializer = ChangesSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        changed, deleted, cursor, more = get_changes(
+            serializer.validated_data.get('since') or Cursor(),
+            serializer.validated_data['limit'])
+        return Response({
+            'changed': self.get_serializer(changed, many=True).data,
+            'deleted': deleted,
+            'next': cursor.encode(),
+            'more': more,
+        })
+
+    @list_route()
+    def stats(self, request):
+        """
+        Vacancies created per ?period=day or week, for ?limit= periods up to
+        the one containing ?until= (today by default)
+        """
+        serializer = StatsSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        period = serializer.validated_data['period']
+        until = serializer.validated_data.get('until') or \
+            timezone.localtime(timezone.now()).date()
+        return Response({
+            'period': period,
+            'results': [
+                {'start': start, 'count': count} for start, count in
+                get_stats(period, until, serializer.validated_data['limit'])
+            ],
+        })
+
+    @detail_route()
+    def similar(self, request, pk=None):
+        """
+        Vacancies most similar to this one by their text
+        """
+        # NumPy is only needed here, keep it out of worker startup
+        from .similarity import similarity
+
+        vacancy = self.get_object()
+        result = similarity.similar(
+            vacancy, getattr(settings, 'VACANCY_SIMILAR_COUNT', 10))
+        if result is None:
+            raise IndexNotBuilt()
+        vacancies = Vacancy.objects.in_bulk([pk for pk, _ in result])
+        serializer = self.get_serializer(
+            [vacancies[pk] for pk, _ in result if pk in vacancies], many=True)
+        return Response(serializer.data)
+
+    def get_batch_create_max(self):
+        return getattr(settings, 'VACANCY_BATCH_CREATE_MAX', 100)
+
+    def perform_create(self, serializer):
+        vacancy = serializer.save()
+        self.vacancy_created(vacancy, serializer.data)
+
+    def perform_create_many(self, serializers):
+        # One bulk insert instead of a save() per vacancy
+        vacancies = Vacancy.objects.create_many([
+            Vacancy(**serializer.validated_data) for serializer in serializers
+        ])
+        for serializer, vacancy in zip(serializers, vacancies):
+            serializer.instance = vacancy
+            self.vacancy_created(vacancy, serializer.data)
+
+    def vacancy_created(self, vacancy, data):
+        protocol = 'https' if self.request.is_secure() else 'http'
+        enqueue(notify_saved_searches, vacancy.pk, protocol,
+                self.request.get_host())
+        broadcast.publish(VACANCY_CHANNEL, data)
+
+
+class SavedSearchViewSet(mixins.CreateModelMixin,
+                         mixins.RetrieveModelMixin,
+                         mixins.ListModelMixin,
+                         mixins.DestroyModelMixin,
+                         viewsets.GenericViewSet):
+    """
+    Saved searches of the current user. Owners are notified by email
+    when a vacancy containing all the keywords of the query is posted.
+    """
+    queryset = SavedSearch.objects.all()
+    serializer_class = SavedSearchSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get_queryset(self):
+        # By pk, users of access tokens are not read
+        return self.queryset.filter(
+            user_id=self.request.user.pk).order_by('-pk')
+
+    def perform_create(self, serializer):
+        serializer.save(user_id=self.request.user.pk)
+
+
+def _format_event(data):
+    return 'id: %s\nevent: vacancy\ndata: %s\n\n' % (
+        data['id'], json.dumps(data, separators=(',', ':')))
+
+
+def _replay(request, last_id, limit):
+    vacancies = Vacancy.objects.filter(pk__gt=last_id).order_by('pk')[:limit]
+    return VacancySerializer(vacancies, many=True,
+                             context={'request': request}).data
+
+
+def _stream_events(request, last_id):
+    # Listening before replaying, so vacancies committed meanwhile are
+    # received
+    with broadcast.subscribe(VACANCY_CHANNEL) as subscription:
+        yield 'retry: %d\n\n' % (
+            getattr(settings, 'VACANCY_STREAM_RETRY', 5) * 1000)
+        # Replayed in pages until a short one
+        limit = getattr(settings, 'VACANCY_STREAM_REPLAY_LIMIT', 100)
+        while last_id is not None:
+            page = _replay(request, last_id, limit)
+            for data in page:
+                last_id = data['id']
+                yield _format_event(data)
+            if len(page) < limit:
+                break
+        # Idle streams must not hold database connections
+        if not connection.in_atomic_block:
+            connection.close()
+
+        heartbeat = getattr(settings, 'VACANCY_STREAM_HEARTBEAT', 15)
+        while True:
+            try:
+                data = subscription.get(timeout=heartbeat)
+            except EOFError:
+                # Too slow, the client reconnects and catches up by id
+                return
+            if data is None:
+                yield ': keep-alive\n\n'
+            elif last_id is None or data['id'] > last_id:
+                yield _format_event(data)
+
+
+@require_GET
+def vacancy_stream(request):
+    """
+    Server-sent events stream of new vacancies. Reconnecting clients get
+    vacancies they missed after Last-Event-ID.
+    """
+    try:
+        last_id = int(request.META.get('HTTP_LAST_EVENT_ID', ''))
+    except ValueError:
+        last_id = None
+    response = StreamingHttpResponse(_stream_events(request, last_id),
+                                     content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Disables response buffering of nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,13 +1,22 @@
 from collections import OrderedDict
 
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.urls import NoReverseMatch
 from django.core.urlresolvers import RegexURLResolver, RegexURLPattern
+from django.utils.crypto import constant_time_compare
 
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.reverse import reverse
 from rest_framework.views import APIView
 
+from jobs_backend.core import metrics
+
+
+# Hosts are validated against ALLOWED_HOSTS, bounded anyway in case of '*'
+API_ROOT_MEMO_SIZE = 32
+
 
 class APIRoot(APIView):
     """
@@ -16,8 +25,20 @@ class APIRoot(APIView):
     permission_classes = (AllowAny,)
     urlpatterns = None
     app_namespace = None
+    # (namespace, scheme, host, format) -> data, URLs do not change while
+    # the process runs
+    _memo = {}
 
     def get(self, request, format=None):
+        key = (self.app_namespace, request.scheme, request.get_host(), format)
+        data = self._memo.get(key)
+        if data is None:
+            data = self.get_data(request, format)
+            if len(self._memo) < API_ROOT_MEMO_SIZE:
+                self._memo[key] = data
+        return Response(data)
+
+    def get_data(self, request, format=None):
         assert self.urlpatterns is not None, "Provide urlpatterns argument if you want to use this view!"
         assert self.app_namespace is not None, "Provide app_namespace argument if you want to use this view!"
 
@@ -49,6 +70,16 @@ class APIRoot(APIView):
 
             return data
 
-        data = parse_urlpatterns(self.urlpatterns, self.app_namespace)
+        return parse_urlpatterns(self.urlpatterns, self.app_namespace)
 
-        return Response(data)
+
+def metrics_view(request):
+    """
+    Metrics of all worker processes in the Prometheus text format. Requires
+    `Authorization: Bearer <METRICS_TOKEN>`, not found if it is not set.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token or not constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), 'Bearer ' + token):
+        raise Http404
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)